@@ -0,0 +1,350 @@
+"""Benchmark cases for vector math, ships and whole turns
+
+Each case is a function registered with `benchmark`. It is called with a size
+and does its setup outside the timed region, returning a callable that does
+the work being measured.
+"""
+import random
+import tempfile
+
+from combat import attack_phase
+from fleet import Fleet
+from galaxy import GalaxyGenerator
+from intercept import InterceptPlanner
+from movement import move_ships
+from parallel import ParallelTurnExecutor
+from ship import Ship, status_reports
+from simulation import Simulation
+import snapshot
+from spatial import SpatialGrid
+from system import System
+from travel import TravelGraph
+from vector import Vector, TAU, direction_vectors, rotate_all
+from visibility import Visibility
+from wire import DeltaEncoder
+
+SHIP_SIZES = (1000, 100000, 1000000)
+SYSTEM_SIZES = (1000, 100000, 1000000)
+VECTOR_COUNT = 10000
+
+# (name, function, sizes) in registration order
+BENCHMARKS = []
+
+
+def benchmark(name, sizes=None):
+    """Registers a benchmark case
+
+    Parameters
+    ----------
+    name : str
+    sizes : sequence of int
+        optional, each size becomes its own result, named `name[size]`
+    """
+    def register(function):
+        BENCHMARKS.append((name, function, sizes))
+        return function
+    return register
+
+
+def _vectors(count, seed=1):
+    rng = random.Random(seed)
+    return [Vector(rng.uniform(-100, 100), rng.uniform(-100, 100))
+            for _ in range(count)]
+
+
+def _ships(count, seed=1, spread=1000.0):
+    rng = random.Random(seed)
+    ships = []
+    for number in range(count):
+        ship = Ship('Ship {}'.format(number), 10 ** 9, 10 ** 9, 5, 20, 1)
+        ship._move_to(rng.uniform(0, spread), rng.uniform(0, spread))
+        ship.set_course(Vector(rng.uniform(0, spread) + spread * 10,
+                               rng.uniform(0, spread)))
+        ship.empire = number % 2
+        ships.append(ship)
+    return ships
+
+
+@benchmark('vector.norm')
+def vector_norm(size):
+    vectors = _vectors(VECTOR_COUNT)
+    return lambda: [vector.norm() for vector in vectors]
+
+
+@benchmark('vector.normalize')
+def vector_normalize(size):
+    vectors = _vectors(VECTOR_COUNT)
+    return lambda: [vector.normalize() for vector in vectors]
+
+
+@benchmark('vector.rotate_by_angle')
+def vector_rotate_by_angle(size):
+    vectors = _vectors(VECTOR_COUNT)
+    return lambda: [vector.rotate_by_angle(TAU / 7) for vector in vectors]
+
+
+@benchmark('vector.rotate_all')
+def vector_rotate_all(size):
+    vectors = _vectors(VECTOR_COUNT)
+    return lambda: rotate_all(vectors, TAU / 7)
+
+
+@benchmark('vector.direction_vectors')
+def vector_direction_vectors(size):
+    origins = _vectors(VECTOR_COUNT, seed=1)
+    destinations = _vectors(VECTOR_COUNT, seed=2)
+    return lambda: direction_vectors(origins, destinations)
+
+
+@benchmark('vector.argument')
+def vector_argument(size):
+    vectors = _vectors(VECTOR_COUNT)
+    return lambda: sorted(vectors, key=Vector.argument)
+
+
+@benchmark('vector.pseudo_argument')
+def vector_pseudo_argument(size):
+    vectors = _vectors(VECTOR_COUNT)
+    return lambda: sorted(vectors, key=Vector.pseudo_argument)
+
+
+@benchmark('vector.matrix_mult')
+def vector_matrix_mult(size):
+    vectors = _vectors(VECTOR_COUNT)
+    matrix = ((0.5, -1.5), (2, 0.25))
+    return lambda: [vector.matrix_mult(matrix) for vector in vectors]
+
+
+@benchmark('vector.add')
+def vector_add(size):
+    vectors = _vectors(VECTOR_COUNT)
+    others = _vectors(VECTOR_COUNT, seed=2)
+    return lambda: [a + b for a, b in zip(vectors, others)]
+
+
+@benchmark('vector.sub')
+def vector_sub(size):
+    vectors = _vectors(VECTOR_COUNT)
+    others = _vectors(VECTOR_COUNT, seed=2)
+    return lambda: [a - b for a, b in zip(vectors, others)]
+
+
+@benchmark('vector.mul')
+def vector_mul(size):
+    vectors = _vectors(VECTOR_COUNT)
+    return lambda: [vector * 2.5 for vector in vectors]
+
+
+@benchmark('vector.dot')
+def vector_dot(size):
+    vectors = _vectors(VECTOR_COUNT)
+    others = _vectors(VECTOR_COUNT, seed=2)
+    return lambda: [a * b for a, b in zip(vectors, others)]
+
+
+@benchmark('ship.take_damage', SHIP_SIZES)
+def ship_take_damage(size):
+    ships = _ships(size)
+
+    def run():
+        for ship in ships:
+            ship.take_damage(3)
+    return run
+
+
+@benchmark('ship.process_turn', SHIP_SIZES)
+def ship_process_turn(size):
+    ships = _ships(size)
+
+    def run():
+        for ship in ships:
+            ship.process_turn()
+    return run
+
+
+@benchmark('ship.status_reports', SHIP_SIZES)
+def ship_status_reports(size):
+    ships = _ships(size)
+    return lambda: status_reports(ships)
+
+
+@benchmark('movement.move_ships', SHIP_SIZES)
+def movement_move_ships(size):
+    ships = _ships(size)
+    return lambda: move_ships(ships)
+
+
+@benchmark('combat.attack_phase', SHIP_SIZES)
+def combat_attack_phase(size):
+    ships = _ships(size, spread=size ** 0.5 * 10)
+    index = SpatialGrid(20, ships)
+    return lambda: attack_phase(ships, index)
+
+
+def galaxy(size, seed=1):
+    """Systems with `size` ships clustered around them, split between empires
+
+    Parameters
+    ----------
+    size : int
+        number of ships
+    seed : int
+        optional
+
+    Returns
+    -------
+    tuple of (list of System, list of Ship)
+    """
+    rng = random.Random(seed)
+    systems = [System('System {}'.format(number),
+                      Vector(rng.uniform(0, 10000), rng.uniform(0, 10000)))
+               for number in range(max(1, size // 100))]
+    ships = []
+    for number in range(size):
+        home = rng.choice(systems).position
+        ship = Ship('Ship {}'.format(number), 100, 50, rng.randint(1, 10),
+                    rng.randint(5, 30), rng.randint(1, 10))
+        ship._move_to(home[0] + rng.uniform(-50, 50),
+                      home[1] + rng.uniform(-50, 50))
+        ship.set_course(rng.choice(systems).position)
+        ship.empire = number % 4
+        ships.append(ship)
+    return systems, ships
+
+
+@benchmark('turn.simulation', SHIP_SIZES)
+def turn_simulation(size):
+    _, ships = galaxy(size)
+    simulation = Simulation(ships, index=SpatialGrid(30, ships))
+    return simulation.tick
+
+
+@benchmark('turn.parallel', SHIP_SIZES)
+def turn_parallel(size):
+    # The turn.simulation galaxy, sharded by system but run in this process,
+    # so that it shows the executor's overhead against turn.simulation
+    systems, ships = galaxy(size)
+    executor = ParallelTurnExecutor(systems, ships, 100, processes=0)
+    return executor.run_turn
+
+
+def _pursuers(size):
+    # Every even ship chases the odd ship after it, which keeps its course
+    ships = _ships(size)
+    for hunter, target in zip(ships[::2], ships[1::2]):
+        hunter._destination = None
+        hunter.speed = 7
+        hunter.set_target(target)
+    return ships
+
+
+@benchmark('intercept.plan', SHIP_SIZES)
+def intercept_plan(size):
+    # Steady pursuit, where every course comes out of the cache
+    ships = _pursuers(size)
+    planner = InterceptPlanner()
+    planner.plan(ships)
+    return lambda: planner.plan(ships)
+
+
+@benchmark('intercept.replan', SHIP_SIZES)
+def intercept_replan(size):
+    # Every course solved afresh, as without the cache
+    ships = _pursuers(size)
+    return lambda: InterceptPlanner().plan(ships)
+
+
+@benchmark('travel.next_hops', SHIP_SIZES)
+def travel_next_hops(size):
+    # Every ship asks for its next jump across a 400 system galaxy at once
+    systems = list(GalaxyGenerator(seed=1).generate(400))
+    graph = TravelGraph.from_proximity(systems, 1500)
+    graph.build()
+    rng = random.Random(1)
+    origins = [rng.choice(systems) for _ in range(size)]
+    destinations = [rng.choice(systems) for _ in range(size)]
+    return lambda: graph.next_hops(origins, destinations)
+
+
+@benchmark('turn.visibility', SHIP_SIZES)
+def turn_visibility(size):
+    # The turn.simulation galaxy split between 36 empires, with fog of war
+    systems, ships = galaxy(size)
+    for number, ship in enumerate(ships):
+        ship.empire = number % 36
+    simulation = Simulation(ships, index=SpatialGrid(30, ships),
+                            visibility=Visibility(30, ships, systems))
+    return simulation.tick
+
+
+def _snapshot(size):
+    """A snapshot of the turn.simulation galaxy, deleted once unreferenced"""
+    systems, ships = galaxy(size)
+    saved = tempfile.NamedTemporaryFile(suffix='.snap')
+    snapshot.save(saved.name, [], systems, ships)
+    return saved
+
+
+@benchmark('snapshot.load', SHIP_SIZES)
+def snapshot_load(size):
+    # Opening a snapshot and reading every ship column, without objects
+    saved = _snapshot(size)
+    columns = [column for column, _ in dict(snapshot.TABLES)['ships']]
+
+    def run():
+        with snapshot.load(saved.name) as loaded:
+            for column in columns:
+                loaded.column('ships', column)
+    return run
+
+
+@benchmark('snapshot.restore', SHIP_SIZES)
+def snapshot_restore(size):
+    saved = _snapshot(size)
+
+    def run():
+        with snapshot.load(saved.name) as loaded:
+            loaded.restore()
+    return run
+
+
+@benchmark('turn.wire', SHIP_SIZES)
+def turn_wire(size):
+    # The turn.simulation galaxy, with every turn's changes encoded to send
+    systems, ships = galaxy(size)
+    simulation = Simulation(ships, index=SpatialGrid(30, ships))
+    encoder = DeltaEncoder()
+    encoder.encode(0, ships)
+
+    def run():
+        simulation.tick()
+        encoder.encode(simulation.turn, ships)
+    return run
+
+
+@benchmark('galaxy.generate', SYSTEM_SIZES)
+def galaxy_generate(size):
+    generator = GalaxyGenerator(seed=1)
+
+    def run():
+        for _ in generator.generate(size):
+            pass
+    return run
+
+
+@benchmark('turn.fleets', SHIP_SIZES)
+def turn_fleets(size):
+    # The turn.simulation galaxy, with each empire's ships in fleets of 100
+    _, ships = galaxy(size)
+    by_empire = {}
+    for ship in ships:
+        by_empire.setdefault(ship.empire, []).append(ship)
+    fleets = []
+    for empire, members in sorted(by_empire.items()):
+        for start in range(0, len(members), 100):
+            fleet = Fleet('Fleet {}'.format(len(fleets)),
+                          members[start:start + 100])
+            fleet.empire = empire
+            fleets.append(fleet)
+    simulation = Simulation(fleets, index=SpatialGrid(30, fleets))
+    return simulation.tick
@@ -0,0 +1,67 @@
+"""Compares the memory cost of slotted `Ship`s with dict-backed ones
+
+Usage: python -m benchmarks.memory [count]
+"""
+import sys
+
+from ship import Ship
+from vector import Vector
+
+
+class DictShip(object):
+    """A `Ship` stored the old way, with a per-instance __dict__"""
+    __init__ = Ship.__dict__['__init__']
+
+
+def instance_size(obj):
+    """Bytes used by an object, its __dict__ and its own position vector"""
+    size = sys.getsizeof(obj)
+    if hasattr(obj, '__dict__'):
+        size += sys.getsizeof(obj.__dict__)
+    return size
+
+
+def position_size(position, seen):
+    """Bytes used by a position vector, counting shared vectors once"""
+    if id(position) in seen:
+        return 0
+    seen.add(id(position))
+    return instance_size(position) + sys.getsizeof(position.values)
+
+
+def measure(cls, count):
+    """Average bytes per ship for `count` fresh ships of class `cls`
+
+    Parameters
+    ----------
+    cls : type
+    count : int
+
+    Returns
+    -------
+    float
+    """
+    ships = [cls('Ship {}'.format(i), 100, 50, 5, 10, 25)
+             for i in range(count)]
+    if cls is DictShip:
+        # The old constructor allocated a fresh origin for every ship
+        for ship in ships:
+            ship._position = Vector(0, 0)
+
+    seen = set()
+    total = sum(instance_size(ship) + position_size(ship._position, seen)
+                for ship in ships)
+    return total / float(count)
+
+
+def main(count=100000):
+    before = measure(DictShip, count)
+    after = measure(Ship, count)
+    print 'ships: {}'.format(count)
+    print 'dict-backed: {:.1f} bytes/ship'.format(before)
+    print 'slotted:     {:.1f} bytes/ship'.format(after)
+    print 'reduction:   {:.1f}x'.format(before / after)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,158 @@
+"""Runs the benchmark suite, emitting JSON and flagging regressions
+
+Usage: python -m benchmarks.run [options]
+
+Each benchmark is timed several times and the fastest run is kept. Results
+are written as JSON, and every benchmark in the baseline file is compared
+against the new result. The exit status is 1 if any benchmark got slower than
+the baseline by more than the threshold, and 2 if there is no baseline to
+compare against: record one on the machine being tested with
+`--save-baseline`, or pass `--no-baseline` to only time.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import re
+import sys
+import timeit
+
+from benchmarks.cases import BENCHMARKS
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+
+def time_case(work, repeats):
+    """Fastest of `repeats` timings of `work`, in seconds
+
+    Parameters
+    ----------
+    work : callable
+    repeats : int
+
+    Returns
+    -------
+    float
+    """
+    timer = timeit.Timer(work)
+    return min(timer.repeat(repeat=repeats, number=1))
+
+
+def run(pattern=None, max_size=None, repeats=5):
+    """Times every matching benchmark
+
+    Parameters
+    ----------
+    pattern : str
+        optional, regular expression benchmark names must match
+    max_size : int
+        optional, skip sizes larger than this
+    repeats : int
+        optional
+
+    Returns
+    -------
+    dict
+        machine-readable results, as written to JSON
+    """
+    results = {}
+    for name, function, sizes in BENCHMARKS:
+        for size in sizes or (None,):
+            label = name if size is None else '{}[{}]'.format(name, size)
+            if pattern and not re.search(pattern, label):
+                continue
+            if size is not None and max_size is not None and size > max_size:
+                continue
+
+            work = function(size)
+            seconds = time_case(work, repeats)
+            results[label] = {'seconds': seconds, 'repeats': repeats}
+            if size is not None:
+                results[label]['size'] = size
+                results[label]['per_item'] = seconds / size
+            # Drop this case's objects before timing the next one
+            del work
+            gc.collect()
+
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+
+
+def compare(current, baseline, threshold):
+    """Benchmarks that got slower than the baseline by more than `threshold`
+
+    Parameters
+    ----------
+    current : dict
+    baseline : dict
+    threshold : float
+        allowed slowdown, as a fraction (0.2 allows 20% slower)
+
+    Returns
+    -------
+    list of (str, float, float)
+        name, baseline seconds and current seconds of each regression
+    """
+    regressions = []
+    for name, result in sorted(current['results'].items()):
+        before = baseline.get('results', {}).get(name)
+        if before is None:
+            continue
+        if result['seconds'] > before['seconds'] * (1 + threshold):
+            regressions.append((name, before['seconds'], result['seconds']))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--filter', help='only run matching benchmarks')
+    parser.add_argument('--max-size', type=int, default=100000,
+                        help='largest ship count to run (default 100000)')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--output', help='write results here, not stdout')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE,
+                        help='results to compare against')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='store these results as the new baseline')
+    parser.add_argument('--no-baseline', action='store_true',
+                        help='only time, without comparing to a baseline')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='allowed slowdown before flagging (default 0.2)')
+    args = parser.parse_args(argv)
+
+    compared = not (args.save_baseline or args.no_baseline)
+    if compared and not os.path.exists(args.baseline):
+        sys.stderr.write('No baseline at {}: record one with --save-baseline, '
+                         'or pass --no-baseline\n'.format(args.baseline))
+        return 2
+
+    current = run(args.filter, args.max_size, args.repeats)
+    encoded = json.dumps(current, indent=2, sort_keys=True)
+
+    if args.output:
+        with open(args.output, 'w') as stream:
+            stream.write(encoded + '\n')
+    else:
+        print encoded
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as stream:
+            stream.write(encoded + '\n')
+    if not compared:
+        return 0
+
+    with open(args.baseline) as stream:
+        baseline = json.load(stream)
+    regressions = compare(current, baseline, args.threshold)
+    for name, before, after in regressions:
+        sys.stderr.write('REGRESSION {}: {:.6f}s -> {:.6f}s ({:+.0%})\n'
+                         .format(name, before, after, after / before - 1))
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
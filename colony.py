@@ -1,9 +1,79 @@
+FARM = 'farm'
+BUILD = 'build'
+RESEARCH = 'research'
+JOBS = (FARM, BUILD, RESEARCH)
+
+FOOD = 'food'
+PRODUCTION = 'production'
+SCIENCE = 'science'
+OUTPUTS = (FOOD, PRODUCTION, SCIENCE)
+
+# What each job produces, and how much one colonist produces per turn
+JOB_OUTPUTS = {FARM: FOOD, BUILD: PRODUCTION, RESEARCH: SCIENCE}
+OUTPUT_PER_COLONIST = 1
+
+
+class Colonist(object):
+    """A member of a colony, working one job
+
+    Colonies only count their colonists per job, so colonists are views
+    handed out by `Colony.colonists`. Changing a colonist's job moves one
+    colonist between the two jobs' headcounts.
+    """
+    __slots__ = ('colony', '_job')
+
+    def __init__(self, colony, job):
+        self.colony = colony
+        self._job = job
+
+    @property
+    def job(self):
+        return self._job
+
+    @job.setter
+    def job(self, job):
+        if job != self._job:
+            self.colony.move_colonists(1, self._job, job)
+            self._job = job
+
+
 class Colony(object):
     """A colony on a planet"""
-    def __init__(self, planet, empire):
+    def __init__(self, planet, empire, name=None):
+        """Found a colony
+
+        Parameters
+        ----------
+        planet : Planet
+            becomes the colony's home, and shows the colony's name
+        empire : Empire
+        name : str
+            optional
+        """
+        self._name = name
         self.planet = planet
-        self.empire = empire
-        self.colonists = []
+        self.empire = None
+
+        if planet is not None:
+            planet.colony = self
+
+        # Colonists are interchangeable, so only the headcount per job is
+        # stored. Outputs are kept up to date as the headcounts change.
+        self._job_counts = dict.fromkeys(JOBS, 0)
+        self._outputs = dict.fromkeys(OUTPUTS, 0)
+
+        if empire is not None:
+            empire.add_colony(self)
+
+    @property
+    def name(self):
+        return self._name
+
+    @name.setter
+    def name(self, name):
+        self._name = name
+        if self.planet is not None:
+            self.planet._label = None
 
     @property
     def food_output(self):
@@ -13,17 +83,17 @@ class Colony(object):
         -------
         int
         """
-        return 0
+        return self._outputs[FOOD]
 
     @property
     def production_output(self):
-        """Total food output of the colony
+        """Total production output of the colony
 
         Returns
         -------
         int
         """
-        return 0
+        return self._outputs[PRODUCTION]
 
     @property
     def science_output(self):
@@ -33,7 +103,74 @@ class Colony(object):
         -------
         int
         """
-        return 0
+        return self._outputs[SCIENCE]
+
+    @property
+    def population(self):
+        """Total number of colonists
+
+        Returns
+        -------
+        int
+        """
+        return sum(self._job_counts.values())
+
+    @property
+    def colonists(self):
+        """Every colonist, grouped by job in `JOBS` order
+
+        Built afresh on every access, in O(population).
+
+        Returns
+        -------
+        list of Colonist
+        """
+        return [Colonist(self, job) for job in JOBS
+                for _ in range(self._job_counts[job])]
+
+    def job_count(self, job):
+        """Number of colonists working a job
+
+        Parameters
+        ----------
+        job : FARM, BUILD, RESEARCH
+
+        Returns
+        -------
+        int
+        """
+        return self._job_counts[job]
+
+    def least_staffed_job(self):
+        """The job with the fewest colonists, earliest in `JOBS` on a tie
+
+        Returns
+        -------
+        FARM, BUILD, or RESEARCH
+        """
+        return min(JOBS, key=self._job_counts.get)
+
+    def _staff(self, job, change):
+        """Adjusts a job's headcount and every output total that depends on it
+
+        Parameters
+        ----------
+        job : FARM, BUILD, RESEARCH
+        change : int
+            colonists added to (or, if negative, removed from) the job
+        """
+        if job not in self._job_counts:
+            raise ValueError('Unknown job: {}'.format(job))
+        if not change:
+            return
+
+        self._job_counts[job] += change
+        output = JOB_OUTPUTS[job]
+        amount = change * OUTPUT_PER_COLONIST
+        self._outputs[output] += amount
+
+        if self.empire is not None:
+            self.empire._output_changed(output, amount)
 
     def add_colonist(self, job=None):
         """Add a colonist to the colony
@@ -42,4 +179,111 @@ class Colony(object):
         ----------
         job : FARM, BUILD, RESEARCH
           defaults to whichever job has the least colonists
+
+        Returns
+        -------
+        FARM, BUILD, or RESEARCH
+            the job the colonist was given
+        """
+        if job is None:
+            job = self.least_staffed_job()
+
+        self._staff(job, 1)
+        return job
+
+    def add_colonists(self, count, job=None):
+        """Add several colonists at once
+
+        Parameters
+        ----------
+        count : int
+        job : FARM, BUILD, RESEARCH
+            defaults to spreading the colonists exactly as `count` calls to
+            `add_colonist` would
+        """
+        if count < 0:
+            raise ValueError('Cannot add a negative number of colonists')
+
+        if job is not None:
+            self._staff(job, count)
+            return
+
+        for job, added in _fill(self._job_counts, count).items():
+            self._staff(job, added)
+
+    def move_colonists(self, count, from_job, to_job):
+        """Reassign colonists from one job to another
+
+        Parameters
+        ----------
+        count : int
+        from_job : FARM, BUILD, RESEARCH
+        to_job : FARM, BUILD, RESEARCH
+
+        Raises
+        ------
+        ValueError
+            for unknown jobs, a negative count, or more colonists than
+            work `from_job`
+        """
+        for job in (from_job, to_job):
+            if job not in self._job_counts:
+                raise ValueError('Unknown job: {}'.format(job))
+        if count < 0:
+            raise ValueError('Cannot move a negative number of colonists')
+        if count > self._job_counts[from_job]:
+            raise ValueError('Only {} colonists work {}, cannot move {}'
+                             .format(self._job_counts[from_job], from_job,
+                                     count))
+
+        self._staff(to_job, count)
+        self._staff(from_job, -count)
+
+    def rebalance(self):
+        """Spread colonists as evenly as possible across jobs
+
+        Any remainder goes to the jobs earliest in `JOBS`.
         """
+        share, extra = divmod(self.population, len(JOBS))
+        for position, job in enumerate(JOBS):
+            target = share + (1 if position < extra else 0)
+            self._staff(job, target - self._job_counts[job])
+
+
+def _fill(counts, count):
+    """How many of `count` new colonists each least-staffed pick would get
+
+    Raises the emptiest jobs level by level instead of placing colonists one
+    at a time, so it runs in O(jobs) steps regardless of `count`.
+
+    Parameters
+    ----------
+    counts : dict of job to int
+    count : int
+
+    Returns
+    -------
+    dict of job to int
+    """
+    ordered = sorted(JOBS, key=lambda job: (counts[job], JOBS.index(job)))
+    levels = dict((job, counts[job]) for job in JOBS)
+
+    for size in range(1, len(ordered) + 1):
+        group = ordered[:size]
+        level = levels[group[0]]
+        if size < len(ordered):
+            cost = (counts[ordered[size]] - level) * size
+            if count >= cost:
+                count -= cost
+                for job in group:
+                    levels[job] = counts[ordered[size]]
+                continue
+
+        # Not enough to reach the next job, so spread what is left evenly,
+        # handing out the remainder in JOBS order as ties are broken
+        share, extra = divmod(count, size)
+        for position, job in enumerate(sorted(group, key=JOBS.index)):
+            levels[job] = level + share + (1 if position < extra else 0)
+        break
+
+    return dict((job, levels[job] - counts[job]) for job in JOBS)
@@ -0,0 +1,206 @@
+class CombatReport(object):
+    """Outcome of resolving one turn's worth of attacks
+
+    Attributes
+    ----------
+    damage : dict of Ship to int or float
+        total damage each target received
+    shield_damage : dict of Ship to int or float
+        damage absorbed by each target's shield
+    hull_damage : dict of Ship to int or float
+        damage that reached each target's hull
+    overkill : dict of Ship to int or float
+        hull damage beyond what it took to destroy the target. Only targets
+        that are destroyed (or already were) appear here.
+    deaths : list of Ship
+        ships destroyed this turn, in the order the killing blows landed,
+        followed by ships lost inside fleets that were hit
+    killed_by : dict of Ship to Ship
+        the attacker that landed each killing blow on a target. Ships lost
+        inside a fleet do not appear here.
+    events : int
+        number of hits resolved
+    retargeted : list of Ship
+        ships whose target changed while attacks were gathered, when the
+        report comes from `attack_phase`
+    """
+    def __init__(self):
+        self.events = 0
+        self.retargeted = []
+        self.damage = {}
+        self.shield_damage = {}
+        self.hull_damage = {}
+        self.overkill = {}
+        self.deaths = []
+        self.killed_by = {}
+
+
+def resolve(events):
+    """Applies a batch of attacks, shield first and then hull, in one pass
+
+    Hits on each target are applied in order to a running shield and hull,
+    with the same arithmetic as `Ship.take_damage`, and each target is only
+    updated once at the end. Ships are left exactly as calling `take_damage`
+    for each event in order would, float damage included.
+
+    Parameters
+    ----------
+    events : iterable of (Ship, Ship, int or float)
+        (attacker, target, damage) triples, in firing order
+
+    Raises
+    ------
+    ValueError
+        for negative damage
+
+    Returns
+    -------
+    CombatReport
+    """
+    report = CombatReport()
+    totals = report.damage
+    hull_damage = report.hull_damage
+    overkill = report.overkill
+    targets = []
+    # Each target's running shield, and hull once damage reaches it
+    shields = {}
+    hulls = {}
+    hits = 0
+
+    for attacker, target, damage in events:
+        if damage < 0:
+            raise ValueError('Cannot resolve negative damage: {}'
+                             .format(damage))
+        hits += 1
+
+        shield = shields.get(target)
+        if shield is None:
+            shield = target.shield
+            totals[target] = damage
+            targets.append(target)
+        else:
+            totals[target] += damage
+        if shield >= damage:
+            shields[target] = shield - damage
+            continue
+
+        # Same steps as Ship.take_damage once the shield gives out
+        shields[target] = 0
+        remaining = -(shield - damage)
+        hull = hulls.get(target)
+        if hull is None:
+            hull = target.hull
+            hull_damage[target] = remaining
+        else:
+            hull_damage[target] += remaining
+        hull -= remaining
+        if hull > 0:
+            hulls[target] = hull
+            continue
+
+        hulls[target] = 0
+        if target in overkill:
+            overkill[target] += remaining
+            continue
+        overkill[target] = -hull
+        if target._active and target.hull > 0:
+            report.deaths.append(target)
+            report.killed_by[target] = attacker
+    report.events = hits
+
+    shield_damage = report.shield_damage
+    for target in targets:
+        target.shield = shields[target]
+        hull = hulls.get(target)
+        if hull is None:
+            shield_damage[target] = totals[target]
+            continue
+
+        shield_damage[target] = totals[target] - hull_damage[target]
+        if hull <= 0:
+            target.hull = 0
+            target._die()
+        else:
+            target.hull = hull
+
+        casualties = getattr(target, '_casualties', None)
+        if casualties is not None:
+            report.deaths.extend(casualties())
+
+    return report
+
+
+def collect_attacks(ships, index=None, instrumentation=None,
+                    retargeted=None):
+    """Gathers this turn's attacks without applying any damage yet
+
+    Parameters
+    ----------
+    ships : iterable of Ship
+    index : spatial.SpatialGrid
+        optional, used by ships without a target to pick one
+    instrumentation : instrumentation.Instrumentation
+        optional, when it is sampling, times targeting for a sample of ships
+    retargeted : list
+        optional, every ship whose target changed is appended to it
+
+    Returns
+    -------
+    list of (Ship, Ship, int or float)
+        (attacker, target, damage) triples, in `ships` order
+    """
+    if retargeted is None:
+        retargeted = []
+    if instrumentation is not None and instrumentation.sampling:
+        return _sampled_attacks(ships, index, instrumentation, retargeted)
+
+    events = []
+    for ship in ships:
+        previous = ship._target
+        target = ship._acquire_target(index)
+        if target is not None:
+            events.append((ship, target, ship.damage))
+        if ship._target is not previous:
+            retargeted.append(ship)
+    return events
+
+
+def _sampled_attacks(ships, index, instrumentation, retargeted):
+    events = []
+    for ship in ships:
+        previous = ship._target
+        if instrumentation.should_sample():
+            with instrumentation.sample(ship):
+                target = ship._acquire_target(index)
+        else:
+            target = ship._acquire_target(index)
+        if target is not None:
+            events.append((ship, target, ship.damage))
+        if ship._target is not previous:
+            retargeted.append(ship)
+    return events
+
+
+def attack_phase(ships, index=None, instrumentation=None):
+    """Runs the attack phase for every ship, with all ships firing at once
+
+    Unlike calling `Ship._process_attack` ship by ship, ships destroyed this
+    turn still get to fire.
+
+    Parameters
+    ----------
+    ships : iterable of Ship
+    index : spatial.SpatialGrid
+        optional, used by ships without a target to pick one
+    instrumentation : instrumentation.Instrumentation
+        optional, see `collect_attacks`
+
+    Returns
+    -------
+    CombatReport
+    """
+    retargeted = []
+    report = resolve(collect_attacks(ships, index, instrumentation,
+                                     retargeted))
+    report.retargeted = retargeted
+    return report
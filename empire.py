@@ -1,3 +1,6 @@
+from colony import FOOD, OUTPUTS, PRODUCTION, SCIENCE
+
+
 class Empire(object):
     """An Empire, top-level object for a player"""
     def __init__(self, name):
@@ -5,3 +8,105 @@ class Empire(object):
 
         self.colonies = []
         self.fleets = []
+
+        # Running totals over every colony, updated as colonies change.
+        # Editing `colonies` directly should be followed by
+        # `invalidate_outputs`, so the totals are recounted on next read.
+        self._outputs = dict.fromkeys(OUTPUTS, 0)
+        self._outputs_dirty = False
+
+    def add_colony(self, colony):
+        """Take ownership of a colony, adding its output to the empire's
+
+        Parameters
+        ----------
+        colony : Colony
+        """
+        if colony.empire is not None:
+            colony.empire.remove_colony(colony)
+
+        colony.empire = self
+        self.colonies.append(colony)
+        for output in OUTPUTS:
+            self._output_changed(output, colony._outputs[output])
+
+    def remove_colony(self, colony):
+        """Give up a colony, removing its output from the empire's
+
+        Parameters
+        ----------
+        colony : Colony
+        """
+        self.colonies.remove(colony)
+        colony.empire = None
+        for output in OUTPUTS:
+            self._output_changed(output, -colony._outputs[output])
+
+    def add_fleet(self, fleet):
+        """Take command of a fleet
+
+        Parameters
+        ----------
+        fleet : Fleet
+        """
+        if fleet.empire is not None:
+            fleet.empire.remove_fleet(fleet)
+
+        fleet.empire = self
+        self.fleets.append(fleet)
+
+    def remove_fleet(self, fleet):
+        """Give up command of a fleet
+
+        Parameters
+        ----------
+        fleet : Fleet
+        """
+        self.fleets.remove(fleet)
+        fleet.empire = None
+
+    def invalidate_outputs(self):
+        """Marks the cached totals stale, so they are recounted on next read"""
+        self._outputs_dirty = True
+
+    def _output_changed(self, output, amount):
+        if not self._outputs_dirty:
+            self._outputs[output] += amount
+
+    def _total(self, output):
+        if self._outputs_dirty:
+            for name in OUTPUTS:
+                self._outputs[name] = sum(colony._outputs[name]
+                                          for colony in self.colonies)
+            self._outputs_dirty = False
+        return self._outputs[output]
+
+    @property
+    def food_output(self):
+        """Total food output of every colony in the empire
+
+        Returns
+        -------
+        int
+        """
+        return self._total(FOOD)
+
+    @property
+    def production_output(self):
+        """Total production output of every colony in the empire
+
+        Returns
+        -------
+        int
+        """
+        return self._total(PRODUCTION)
+
+    @property
+    def science_output(self):
+        """Total science output of every colony in the empire
+
+        Returns
+        -------
+        int
+        """
+        return self._total(SCIENCE)
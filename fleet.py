@@ -0,0 +1,334 @@
+from ship import ORIGIN, Unit
+
+
+class Fleet(Unit):
+    """Ships travelling and fighting together as a single unit
+
+    While grouped, a fleet stands in for its ships: it has one position and
+    course, moves at the speed of its slowest ship, fires the combined damage
+    of its ships and soaks up hits from pooled shields and hull. It looks
+    enough like a `Ship` to go through `movement.move_ships`,
+    `combat.attack_phase` and `spatial.SpatialGrid` in their place, so a
+    formation costs the same per turn whether it has two ships or two
+    hundred. Its ships always belong to the fleet's empire.
+
+    Grouped ships' own positions, courses and shields are not kept up to
+    date; `sync` writes the fleet's state back to them. When the fleet splits
+    or has to fight ship by ship, `expand` does the same and hands the ships
+    back for per-ship simulation.
+    """
+    def __init__(self, name, ships, empire=None):
+        """Form a fleet where its first ship is
+
+        Parameters
+        ----------
+        name : str
+        ships : iterable of Ship
+            the first one leads the fleet, and the front ships take hull
+            damage first
+        empire : Empire
+            optional, the fleet is added to the empire's fleets
+        """
+        self.name = name
+        self.ships = list(ships)
+        self._empire = None
+        self.system = None
+
+        self._position = ORIGIN
+        # See `Ship._placement`
+        self._placement = None
+        self._row = 0
+        self._destination = None
+        self._target = None
+        # Ships destroyed since `_casualties` was last called
+        self._destroyed = []
+        self.regroup()
+
+        if empire is not None:
+            empire.add_fleet(self)
+
+    def regroup(self):
+        """Gathers the ships back into one unit, pooling their state
+
+        Takes the lead ship's position and course, and the ships' current
+        shields and hulls.
+        """
+        live = [ship for ship in self.ships if ship._active]
+        self.grouped = True
+
+        lead = live[0] if live else None
+        self._move_to(lead.position if lead else ORIGIN)
+        self._destination = lead._destination if lead else None
+        if lead is not None and self.system is None:
+            self.system = lead.system
+
+        # Surviving ships come first; those in front of `_front` have since
+        # been destroyed
+        self.ships = live + [ship for ship in self.ships
+                             if not ship._active]
+        self._front = 0
+        self._live = len(live)
+
+        self._shield = sum(ship.shield for ship in live)
+        self._hull = sum(ship.hull for ship in live)
+        self.max_shield = sum(ship.max_shield for ship in live)
+        self.max_hull = sum(ship.max_hull for ship in live)
+        self.damage = sum(ship.damage for ship in live)
+        self._limits = None
+
+    @property
+    def empire(self):
+        """The empire the fleet and all of its ships belong to
+
+        Returns
+        -------
+        Empire
+        """
+        return self._empire
+
+    @empire.setter
+    def empire(self, empire):
+        self._empire = empire
+        for ship in self.ships:
+            ship.empire = empire
+
+    def __iter__(self):
+        """The fleet's surviving ships"""
+        if self.grouped:
+            return iter(self.ships[self._front:self._front + self._live])
+        return (ship for ship in self.ships if ship._active)
+
+    def __len__(self):
+        if self.grouped:
+            return self._live
+        return sum(1 for ship in self.ships if ship._active)
+
+    @property
+    def _active(self):
+        """Whether the fleet is acting as a unit, with ships left to do so"""
+        return self.grouped and self._live > 0
+
+    def _limit(self, index):
+        if self._limits is None:
+            live = list(self)
+            self._limits = (min(ship.speed for ship in live) if live else 0,
+                            min(ship.range for ship in live) if live else 0)
+        return self._limits[index]
+
+    @property
+    def speed(self):
+        """Speed of the slowest surviving ship
+
+        Returns
+        -------
+        int or float
+        """
+        return self._limit(0)
+
+    @property
+    def range(self):
+        """Range of the shortest-ranged surviving ship
+
+        Returns
+        -------
+        int or float
+        """
+        return self._limit(1)
+
+    @property
+    def shield(self):
+        """Pooled shield of the surviving ships
+
+        Returns
+        -------
+        int or float
+        """
+        return self._shield
+
+    @shield.setter
+    def shield(self, shield):
+        self._shield = shield
+
+    @property
+    def hull(self):
+        """Pooled hull of the surviving ships
+
+        Setting a lower hull takes the difference off the front ships, one
+        at a time, destroying each one whose hull runs out. Setting a higher
+        one repairs the surviving ships, front first, each up to its maximum
+        hull; destroyed ships stay destroyed.
+
+        Raises
+        ------
+        ValueError
+            when set higher than the surviving ships' maximum hulls allow
+
+        Returns
+        -------
+        int or float
+        """
+        return self._hull
+
+    @hull.setter
+    def hull(self, hull):
+        if hull < self._hull:
+            self._damage_hull(self._hull - hull)
+        elif hull > self._hull:
+            self._repair_hull(hull - self._hull)
+
+    def _repair_hull(self, repair):
+        """Shares a hull repair out among the surviving ships, front first
+
+        Parameters
+        ----------
+        repair : int or float
+        """
+        live = list(self)
+        room = sum(ship.max_hull - ship.hull for ship in live)
+        if repair > room:
+            raise ValueError('{} can only repair {} more hull, not {}'
+                             .format(self.name, room, repair))
+
+        for ship in live:
+            if not repair:
+                break
+            amount = min(repair, ship.max_hull - ship.hull)
+            ship.hull += amount
+            self._hull += amount
+            repair -= amount
+
+    def _damage_hull(self, damage):
+        """Applies hull damage to the front ships, destroying them in turn
+
+        Parameters
+        ----------
+        damage : int or float
+        """
+        while damage > 0 and self._live:
+            front = self.ships[self._front]
+            if damage < front.hull:
+                front.hull -= damage
+                self._hull -= damage
+                return
+
+            damage -= front.hull
+            self._hull -= front.hull
+            front.hull = 0
+            front._die()
+            self._destroyed.append(front)
+            self.damage -= front.damage
+            self.max_hull -= front.max_hull
+            self.max_shield -= front.max_shield
+            # The pool cannot hold more than the survivors' shields can
+            self._shield = min(self._shield, self.max_shield)
+            self._front += 1
+            self._live -= 1
+            self._limits = None
+
+        if not self._live:
+            self._hull = 0
+
+    def _die(self):
+        """Hook for when the last ship is destroyed"""
+        self._damage_hull(self._hull)
+
+    def _casualties(self):
+        """Ships destroyed since the last call, in the order they fell
+
+        Lets `combat.resolve` report the ships lost inside the fleet.
+
+        Returns
+        -------
+        list of Ship
+        """
+        destroyed, self._destroyed = self._destroyed, []
+        return destroyed
+
+    def take_damage(self, damage):
+        """Applies damage to the pooled shield, then to the front ships' hulls
+
+        Parameters
+        ----------
+        damage : int or float
+        """
+        self._shield -= damage
+
+        if self._shield < 0:
+            overkill = -self._shield
+            self._shield = 0
+            self._damage_hull(overkill)
+
+    def sync(self):
+        """Writes the fleet's position, course and shields back to its ships
+
+        The pooled shield is shared out in proportion to each ship's shield
+        when it joined, or to its maximum shield if those have run out.
+        """
+        ships = list(self)
+        position = self.position
+        for ship in ships:
+            ship._move_to(position)
+            ship._destination = self._destination
+
+        shields = sum(ship.shield for ship in ships)
+        if shields == self._shield:
+            return
+        if shields:
+            shares = [ship.shield for ship in ships]
+        else:
+            shares = [ship.max_shield for ship in ships]
+            shields = sum(shares)
+        for ship, share in zip(ships, shares):
+            ship.shield = min(ship.max_shield,
+                              self._shield * share / float(shields))
+        self._shield = sum(ship.shield for ship in ships)
+
+    def expand(self):
+        """Switches to per-ship simulation, for splitting up or close combat
+
+        Returns
+        -------
+        list of Ship
+            the surviving ships, now carrying the fleet's state
+        """
+        if self.grouped:
+            self.sync()
+            self.grouped = False
+        return list(self)
+
+    def split(self, ships, name):
+        """Detaches some of the ships into a new fleet on the same course
+
+        Parameters
+        ----------
+        ships : iterable of Ship
+            members of this fleet
+        name : str
+            for the new fleet
+
+        Raises
+        ------
+        ValueError
+            if any of the ships are not in this fleet
+
+        Returns
+        -------
+        Fleet
+        """
+        leaving = list(ships)
+        leaving_ids = set(id(ship) for ship in leaving)
+        if not leaving_ids <= set(id(ship) for ship in self.ships):
+            raise ValueError('Only ships in {} can split off'
+                             .format(self.name))
+
+        grouped = self.grouped
+        self.expand()
+
+        self.ships = [ship for ship in self.ships
+                      if id(ship) not in leaving_ids]
+        fleet = Fleet(name, leaving, self.empire)
+        if grouped:
+            self.regroup()
+        else:
+            fleet.expand()
+        return fleet
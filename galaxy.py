@@ -0,0 +1,218 @@
+"""Deterministic procedural galaxy generation
+
+Space is divided into square chunks addressed by integer (column, row)
+coordinates. Everything in a chunk is generated from a random number
+generator seeded only by the galaxy seed and the chunk's coordinates, so any
+chunk can be regenerated on demand, in any order, and always comes out the
+same. Systems are yielded one at a time, so walking a huge galaxy only ever
+holds the system currently being built.
+"""
+import hashlib
+import math
+import random
+import struct
+
+from planet import ORBITS, Planet
+from system import System
+from vector import Vector
+
+SIZES = ('tiny', 'small', 'medium', 'large', 'huge')
+BIOMES = ('barren', 'radiated', 'toxic', 'inferno', 'dead', 'tundra',
+          'desert', 'arid', 'steppe', 'ocean', 'jungle', 'terran', 'gaia')
+MINERALS = ('ultra poor', 'poor', 'abundant', 'rich', 'ultra rich')
+SPECIALS = ('artifacts', 'gems', 'gold', 'fertile', 'hostile')
+# Chance that a generated planet has a special
+SPECIAL_CHANCE = 0.1
+
+SYLLABLES = ('al', 'ar', 'be', 'dra', 'el', 'ga', 'ka', 'lo', 'mi', 'nor',
+             'or', 'ra', 'sol', 'ta', 'ul', 've', 'xa', 'zen')
+
+_SEED_FORMAT = struct.Struct('<qqq')
+
+
+def chunk_seed(seed, column, row):
+    """Seed for one chunk, independent of platform and hash randomization
+
+    Parameters
+    ----------
+    seed : int
+        galaxy seed
+    column : int
+    row : int
+
+    Returns
+    -------
+    int
+    """
+    digest = hashlib.sha1(_SEED_FORMAT.pack(seed, column, row)).digest()
+    return struct.unpack('<Q', digest[:8])[0]
+
+
+class GalaxyGenerator(object):
+    """Streams the systems and planets of a seeded galaxy, chunk by chunk"""
+    def __init__(self, seed, chunk_size=1000.0, min_systems=4,
+                 max_systems=12):
+        """Create a galaxy generator
+
+        Parameters
+        ----------
+        seed : int
+        chunk_size : int or float
+            optional, width and height of each chunk
+        min_systems : int
+            optional, fewest systems in a chunk
+        max_systems : int
+            optional, most systems in a chunk
+        """
+        if chunk_size <= 0:
+            raise ValueError('Chunk size must be positive')
+        if not 0 <= min_systems <= max_systems:
+            raise ValueError('Need 0 <= min_systems <= max_systems')
+
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.min_systems = min_systems
+        self.max_systems = max_systems
+
+    def chunk_of(self, position):
+        """Coordinates of the chunk containing a position
+
+        Parameters
+        ----------
+        position : Vector
+
+        Returns
+        -------
+        tuple of (int, int)
+        """
+        return (int(math.floor(position[0] / self.chunk_size)),
+                int(math.floor(position[1] / self.chunk_size)))
+
+    def iter_chunk(self, column, row):
+        """Yields every system in a chunk, with its planets in orbit
+
+        Parameters
+        ----------
+        column : int
+        row : int
+
+        Returns
+        -------
+        generator of System
+        """
+        rng = random.Random(chunk_seed(self.seed, column, row))
+        # Indexing with random() directly is much cheaper than rng.choice
+        uniform = rng.random
+        size = self.chunk_size
+        left = column * size
+        top = row * size
+
+        for _ in range(rng.randint(self.min_systems, self.max_systems)):
+            name = ''.join([SYLLABLES[int(uniform() * len(SYLLABLES))]
+                            for _ in range(2 + int(uniform() * 2))])
+            system = System(name.capitalize(),
+                            Vector(left + uniform() * size,
+                                   top + uniform() * size))
+
+            # Each orbit is occupied with even odds
+            occupied = rng.getrandbits(ORBITS)
+            planets = []
+            for orbit in range(ORBITS):
+                if not occupied >> orbit & 1:
+                    continue
+                special = None
+                if uniform() < SPECIAL_CHANCE:
+                    special = SPECIALS[int(uniform() * len(SPECIALS))]
+                planets.append(Planet(SIZES[int(uniform() * len(SIZES))],
+                                      BIOMES[int(uniform() * len(BIOMES))],
+                                      MINERALS[int(uniform() * len(MINERALS))],
+                                      special))
+            system.populate(occupied, planets)
+            yield system
+
+    def chunk(self, column, row):
+        """Every system in a chunk
+
+        Parameters
+        ----------
+        column : int
+        row : int
+
+        Returns
+        -------
+        list of System
+        """
+        return list(self.iter_chunk(column, row))
+
+    def stream(self, columns, rows, first_column=0, first_row=0):
+        """Yields the systems of a block of chunks, row by row
+
+        Parameters
+        ----------
+        columns : int
+            number of chunks across
+        rows : int
+            number of chunks down
+        first_column : int
+            optional
+        first_row : int
+            optional
+
+        Returns
+        -------
+        generator of System
+        """
+        for row in range(first_row, first_row + rows):
+            for column in range(first_column, first_column + columns):
+                for system in self.iter_chunk(column, row):
+                    yield system
+
+    def region(self, left, top, right, bottom):
+        """Yields the systems inside a rectangle
+
+        Parameters
+        ----------
+        left : int or float
+        top : int or float
+        right : int or float
+        bottom : int or float
+
+        Returns
+        -------
+        generator of System
+        """
+        first_column, first_row = self.chunk_of((left, top))
+        last_column, last_row = self.chunk_of((right, bottom))
+        for system in self.stream(last_column - first_column + 1,
+                                  last_row - first_row + 1,
+                                  first_column, first_row):
+            x, y = system.position[0], system.position[1]
+            if left <= x <= right and top <= y <= bottom:
+                yield system
+
+    def generate(self, count):
+        """Yields `count` systems from a square block of chunks at the origin
+
+        Parameters
+        ----------
+        count : int
+
+        Returns
+        -------
+        generator of System
+        """
+        if count <= 0:
+            return
+        if not self.max_systems:
+            raise ValueError('Cannot generate systems with max_systems of 0')
+        mean = (self.min_systems + self.max_systems) / 2.0 or 1
+        side = max(1, int(math.ceil(math.sqrt(count / mean))))
+
+        row = 0
+        while True:
+            for system in self.stream(side, 1, 0, row):
+                yield system
+                count -= 1
+                if not count:
+                    return
+            row += 1
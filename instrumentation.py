@@ -0,0 +1,294 @@
+"""Per-turn phase timings, operation counters and sampled attribution
+
+An `Instrumentation` collects, for every turn, how long each phase took and
+how many entity operations happened (vectors allocated, damage events,
+deaths...). Finished turns are added to running totals, which can be
+exported in the Prometheus text format, and can optionally be streamed as a
+JSONL trace, one line per turn.
+
+When disabled, `phase` hands back a shared do-nothing context manager and
+`count` returns straight away, so instrumented code costs next to nothing.
+"""
+import json
+import random
+import time
+
+
+class _NullPhase(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NULL_PHASE = _NullPhase()
+
+
+class _Phase(object):
+    def __init__(self, instrumentation, name):
+        self.instrumentation = instrumentation
+        self.name = name
+
+    def __enter__(self):
+        self.start = self.instrumentation._clock()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.instrumentation.record_phase(
+            self.name, self.instrumentation._clock() - self.start)
+        return False
+
+
+class _Sample(object):
+    def __init__(self, instrumentation, ship):
+        self.instrumentation = instrumentation
+        self.ship = ship
+
+    def __enter__(self):
+        self.start = self.instrumentation._clock()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.instrumentation.attribute(
+            self.ship, self.instrumentation._clock() - self.start)
+        return False
+
+
+def _escape(value):
+    return (str(value).replace('\\', '\\\\').replace('"', '\\"')
+            .replace('\n', '\\n'))
+
+
+def _name(entity):
+    return getattr(entity, 'name', entity)
+
+
+class Instrumentation(object):
+    """Collects per-turn metrics for a simulation"""
+    def __init__(self, enabled=True, trace=None, sample_rate=0.0, seed=0,
+                 clock=time.time):
+        """Create an instrumentation layer
+
+        Parameters
+        ----------
+        enabled : bool
+            optional, whether anything is recorded
+        trace : file-like
+            optional, receives one JSON line per finished turn
+        sample_rate : float
+            optional, fraction of per-entity work to time and attribute to
+            the entity, its system and its empire. 0 turns sampling off.
+        seed : int
+            optional, seeds which entities get sampled
+        clock : callable
+            optional, returns the current time in seconds
+        """
+        self.enabled = enabled
+        self.trace = trace
+        self.sample_rate = sample_rate
+        self._rng = random.Random(seed)
+        self._clock = clock
+
+        self.turns = 0
+        self.phase_totals = {}
+        self.count_totals = {}
+        # Sampled seconds per (kind, entity), kind being 'ship', 'system' or
+        # 'empire'. Entities are told apart by identity, not by name.
+        self.attribution = {}
+        # Per entity, the order it was first sampled in, and per kind and
+        # name how many entities share it; both only used for labels
+        self._serials = {}
+        self._named = {}
+
+        self._turn_phases = {}
+        self._turn_counts = {}
+        self._turn_samples = {}
+
+    @property
+    def sampling(self):
+        return self.enabled and self.sample_rate > 0
+
+    def phase(self, name):
+        """Context manager timing one phase of the current turn
+
+        Parameters
+        ----------
+        name : str
+        """
+        if not self.enabled:
+            return NULL_PHASE
+        return _Phase(self, name)
+
+    def record_phase(self, name, seconds):
+        """Adds time already measured elsewhere to a phase of the current turn
+
+        Parameters
+        ----------
+        name : str
+        seconds : float
+        """
+        if not self.enabled:
+            return
+        self._turn_phases[name] = self._turn_phases.get(name, 0.0) + seconds
+
+    def count(self, name, amount=1):
+        """Adds to an operation counter for the current turn
+
+        Parameters
+        ----------
+        name : str
+        amount : int
+            optional
+        """
+        if not self.enabled:
+            return
+        self._turn_counts[name] = self._turn_counts.get(name, 0) + amount
+
+    def should_sample(self):
+        """Whether the next piece of per-entity work should be timed
+
+        Returns
+        -------
+        bool
+        """
+        return self.sampling and self._rng.random() < self.sample_rate
+
+    def sample(self, ship):
+        """Context manager timing a piece of work done for a ship
+
+        The time is charged with `attribute` when the block ends.
+
+        Parameters
+        ----------
+        ship : Ship
+        """
+        return _Sample(self, ship)
+
+    def attribute(self, ship, seconds):
+        """Charges sampled time to a ship, and to its system and empire
+
+        Parameters
+        ----------
+        ship : Ship
+        seconds : float
+        """
+        keys = [('ship', ship)]
+        if ship.system is not None:
+            keys.append(('system', ship.system))
+        if ship.empire is not None:
+            keys.append(('empire', ship.empire))
+        for key in keys:
+            if key not in self._serials:
+                self._serials[key] = len(self._serials)
+                named = (key[0], _name(key[1]))
+                self._named[named] = self._named.get(named, 0) + 1
+            self._turn_samples[key] = self._turn_samples.get(key, 0.0) + \
+                seconds
+
+    def label(self, key):
+        """A readable name for an attribution key, such as ``ship:Scout``
+
+        Entities of the same kind sharing a name are told apart by the
+        order they were first sampled in, as in ``ship:Scout#3``.
+
+        Parameters
+        ----------
+        key : tuple of (str, object)
+
+        Returns
+        -------
+        str
+        """
+        kind, entity = key
+        name = _name(entity)
+        if self._named.get((kind, name), 0) > 1:
+            return '{}:{}#{}'.format(kind, name, self._serials[key])
+        return '{}:{}'.format(kind, name)
+
+    def end_turn(self, turn):
+        """Folds the current turn into the totals and writes its trace line
+
+        Parameters
+        ----------
+        turn : int
+
+        Returns
+        -------
+        dict
+            the turn's metrics, or None when disabled
+        """
+        if not self.enabled:
+            return None
+
+        record = {'turn': turn,
+                  'phases': self._turn_phases,
+                  'counts': self._turn_counts}
+        if self._turn_samples:
+            record['samples'] = dict(
+                (self.label(key), seconds)
+                for key, seconds in self._turn_samples.items())
+
+        for totals, values in ((self.phase_totals, self._turn_phases),
+                               (self.count_totals, self._turn_counts),
+                               (self.attribution, self._turn_samples)):
+            for name, value in values.items():
+                totals[name] = totals.get(name, 0) + value
+        self.turns += 1
+
+        if self.trace is not None:
+            self.trace.write(json.dumps(record, sort_keys=True) + '\n')
+
+        self._turn_phases, self._turn_counts, self._turn_samples = {}, {}, {}
+        return record
+
+    def hottest(self, limit=10):
+        """Entities with the most sampled time so far
+
+        Parameters
+        ----------
+        limit : int
+            optional
+
+        Returns
+        -------
+        list of (str, float)
+            labels, as given by `label`, and seconds
+        """
+        return sorted(((self.label(key), seconds)
+                       for key, seconds in self.attribution.items()),
+                      key=lambda item: (-item[1], item[0]))[:limit]
+
+    def export_text(self, prefix='moo'):
+        """Totals so far, in the Prometheus text exposition format
+
+        Parameters
+        ----------
+        prefix : str
+            optional, prepended to every metric name
+
+        Returns
+        -------
+        str
+        """
+        lines = [
+            '# TYPE {}_turns_total counter'.format(prefix),
+            '{}_turns_total {}'.format(prefix, self.turns),
+            '# TYPE {}_phase_seconds_total counter'.format(prefix),
+        ]
+        lines.extend('{}_phase_seconds_total{{phase="{}"}} {!r}'
+                     .format(prefix, _escape(name), seconds)
+                     for name, seconds in sorted(self.phase_totals.items()))
+        lines.append('# TYPE {}_operations_total counter'.format(prefix))
+        lines.extend('{}_operations_total{{operation="{}"}} {}'
+                     .format(prefix, _escape(name), count)
+                     for name, count in sorted(self.count_totals.items()))
+        if self.attribution:
+            lines.append('# TYPE {}_sampled_seconds_total counter'
+                         .format(prefix))
+            lines.extend('{}_sampled_seconds_total{{entity="{}"}} {!r}'
+                         .format(prefix, _escape(name), seconds)
+                         for name, seconds in sorted(
+                             (self.label(key), seconds)
+                             for key, seconds in self.attribution.items()))
+        return '\n'.join(lines) + '\n'
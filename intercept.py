@@ -0,0 +1,256 @@
+"""Lead pursuit: steering ships to where their targets are going to be
+
+A target is assumed to keep flying straight at its speed towards its
+destination. Solving
+
+    |target_position + target_velocity * t - position| = speed * t
+
+for the earliest t >= 0 gives the time to intercept, and the lead point to
+set course for, in closed form. A target that will reach its destination
+before it can be caught is met there instead.
+"""
+import math
+
+from vector import Vector, ZERO, direction_vectors
+from vector_batch import VectorBatch, numpy
+
+INFINITY = float('inf')
+
+
+def velocity(ship):
+    """Velocity of a ship flying straight towards its destination
+
+    Parameters
+    ----------
+    ship : Ship or Fleet
+
+    Returns
+    -------
+    Vector
+        the zero vector for ships that are destroyed or have no course
+    """
+    return velocities([ship])[0]
+
+
+def velocities(ships):
+    """Velocities of many ships at once, like `velocity`
+
+    Parameters
+    ----------
+    ships : sequence of Ship or Fleet
+
+    Returns
+    -------
+    list of Vector
+    """
+    moving = [ship for ship in ships
+              if ship._active and ship._destination is not None]
+    directions = iter(direction_vectors(
+        [ship.position for ship in moving],
+        [ship._destination for ship in moving]))
+
+    result = []
+    for ship in ships:
+        if ship._active and ship._destination is not None:
+            result.append(next(directions) * ship.speed)
+        else:
+            result.append(ZERO)
+    return result
+
+
+def _time(rx, ry, vx, vy, speed):
+    """Earliest time a pursuer at the origin meets a target at r moving at v
+
+    The roots of (v.v - s^2) t^2 + 2 (r.v) t + r.r = 0, taken as
+    2c / (sqrt(b^2 - 4ac) - b), which picks out the earliest positive root,
+    stays accurate when a is close to 0, and has no positive root exactly
+    when the denominator is not positive.
+    """
+    c = rx * rx + ry * ry
+    if not c:
+        return 0.0
+    a = vx * vx + vy * vy - speed * speed
+    b = 2 * (rx * vx + ry * vy)
+    discriminant = b * b - 4 * a * c
+    if discriminant < 0:
+        return INFINITY
+    denominator = math.sqrt(discriminant) - b
+    if denominator <= 0:
+        return INFINITY
+    return 2 * c / denominator
+
+
+def solve(position, speed, target_position, target_velocity):
+    """Where and when a pursuer can catch a target flying in a straight line
+
+    Parameters
+    ----------
+    position : Vector
+        of the pursuer
+    speed : int or float
+        of the pursuer
+    target_position : Vector
+    target_velocity : Vector
+
+    Returns
+    -------
+    tuple of (Vector, float)
+        the lead point and the time to reach it, or None if the target is
+        too fast to be caught
+    """
+    rx = target_position[0] - position[0]
+    ry = target_position[1] - position[1]
+    vx, vy = target_velocity[0], target_velocity[1]
+    time = _time(rx, ry, vx, vy, speed)
+    if time == INFINITY:
+        return None
+    return (Vector(target_position[0] + vx * time,
+                   target_position[1] + vy * time), time)
+
+
+def solve_many(positions, speeds, target_positions, target_velocities):
+    """Solves intercepts for many pursuers at once, like `solve`
+
+    Parameters
+    ----------
+    positions : VectorBatch
+        of the pursuers
+    speeds : sequence of int or float
+        of the pursuers
+    target_positions : VectorBatch
+    target_velocities : VectorBatch
+
+    Returns
+    -------
+    tuple of (VectorBatch, list of float)
+        the lead points and the times to reach them. Targets that cannot be
+        caught get an infinite time, and their current position as the lead
+        point.
+    """
+    rs = target_positions - positions
+
+    if rs._vectorized:
+        speeds = numpy.asarray(speeds, dtype=float)
+        vxs, vys = target_velocities.xs, target_velocities.ys
+        c = rs.xs * rs.xs + rs.ys * rs.ys
+        a = vxs * vxs + vys * vys - speeds * speeds
+        b = 2 * (rs.xs * vxs + rs.ys * vys)
+        discriminant = b * b - 4 * a * c
+        denominator = numpy.sqrt(numpy.maximum(discriminant, 0)) - b
+        caught = (discriminant >= 0) & (denominator > 0)
+        times = numpy.full(len(c), INFINITY)
+        times[caught] = 2 * c[caught] / denominator[caught]
+        times[c == 0] = 0.0
+
+        steps = numpy.where(numpy.isinf(times), 0.0, times)
+        leads = VectorBatch(target_positions.xs + vxs * steps,
+                            target_positions.ys + vys * steps)
+        return leads, times.tolist()
+
+    times = [_time(rx, ry, vx, vy, speed)
+             for rx, ry, vx, vy, speed in zip(rs.xs, rs.ys,
+                                              target_velocities.xs,
+                                              target_velocities.ys, speeds)]
+    steps = [0.0 if time == INFINITY else time for time in times]
+    return (VectorBatch([x + vx * t for x, vx, t in
+                         zip(target_positions.xs, target_velocities.xs,
+                             steps)],
+                        [y + vy * t for y, vy, t in
+                         zip(target_positions.ys, target_velocities.ys,
+                             steps)]),
+            times)
+
+
+class InterceptPlanner(object):
+    """Sets every pursuing ship's course to intercept its target
+
+    A pursuer is any active ship or fleet with an active `_target`. Courses
+    are cached: a pursuer keeps its lead point until its target's velocity
+    changes by more than `threshold`, its own speed changes, or its course is
+    cleared or changed by anything else, such as arriving at the lead point.
+    Within the threshold the cached lead point drifts slightly from the exact
+    intercept, in exchange for not solving every pursuit every turn.
+    """
+    def __init__(self, threshold=0.5):
+        """Create a planner
+
+        Parameters
+        ----------
+        threshold : int or float
+            optional, how far a target's velocity may move from the one a
+            course was planned against before the course is planned again
+        """
+        if threshold < 0:
+            raise ValueError('Threshold cannot be negative')
+        self.threshold = threshold
+        self._courses = {}
+
+    def plan(self, ships):
+        """Plans intercept courses for the pursuers among `ships`
+
+        Parameters
+        ----------
+        ships : iterable of Ship or Fleet
+
+        Returns
+        -------
+        list of Ship or Fleet
+            the pursuers whose course was planned afresh
+        """
+        pursuers = [ship for ship in ships
+                    if ship._active and ship._target is not None and
+                    ship._target._active]
+        targets = [ship._target for ship in pursuers]
+        target_velocities = velocities(targets)
+
+        limit = self.threshold * self.threshold
+        previous = self._courses
+        # Rebuilt every time, so ships that stop pursuing are forgotten
+        courses = self._courses = {}
+        stale = []
+        for ship, target, target_velocity in zip(pursuers, targets,
+                                                 target_velocities):
+            course = previous.get(ship)
+            if course is not None:
+                planned_target, planned_velocity, speed, lead = course
+                dx = target_velocity.values[0] - planned_velocity.values[0]
+                dy = target_velocity.values[1] - planned_velocity.values[1]
+                if (planned_target is target and speed == ship.speed and
+                        ship._destination is lead and
+                        dx * dx + dy * dy <= limit):
+                    courses[ship] = course
+                    continue
+            stale.append((ship, target, target_velocity))
+
+        if not stale:
+            return []
+
+        leads, times = solve_many(
+            VectorBatch.from_vectors([ship.position for ship, _, _ in stale]),
+            [ship.speed for ship, _, _ in stale],
+            VectorBatch.from_vectors([target.position
+                                      for _, target, _ in stale]),
+            VectorBatch.from_vectors([vector for _, _, vector in stale]))
+        xs, ys = leads.components()
+
+        planned = []
+        for index, (ship, target, target_velocity) in enumerate(stale):
+            lead = self._arrival_lead(ship, target, target_velocity,
+                                      times[index])
+            if lead is None:
+                lead = Vector(xs[index], ys[index])
+            ship.set_course(lead)
+            courses[ship] = (target, target_velocity, ship.speed, lead)
+            planned.append(ship)
+        return planned
+
+    @staticmethod
+    def _arrival_lead(ship, target, target_velocity, time):
+        """The target's destination, if it gets there before it is caught"""
+        destination = target._destination
+        if destination is None or not target.speed:
+            return None
+        arrival = (destination - target.position).norm() / target.speed
+        if time > arrival:
+            return destination
+        return None
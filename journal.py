@@ -0,0 +1,576 @@
+"""Append-only turn journal with periodic full snapshots
+
+Each turn appends one frame to the log, holding a fixed-width record for every
+entity that changed that turn: ship moves, damage, deaths, targets and
+systems, and colony headcounts. Records hold the entity's new values rather
+than differences, so replaying them is idempotent and only the last change
+per entity in a turn needs to be kept. Values are stored as float64, with a
+bitmask of which were ints so that they replay as the same type. Ships and
+colonies that are new since the last snapshot get records of their own,
+written ahead of the rest of their frame, and their names go in the frame's
+text. Every `snapshot_interval` turns a full `snapshot` is written as well.
+Restoring to turn N loads the nearest snapshot at or before N and replays the
+frames after it.
+
+Every time a journal is opened it starts a new log segment, so a frame cut
+short by a crash is never followed by more. Segments are replayed in order.
+
+Log layout, little-endian::
+
+    frame    turn (uint32), record count (uint32), text size (uint32),
+             then the records and the text
+    record   kind (uint8), ints (uint8), padding, entity row (uint32),
+             four float64 values
+    text     UTF-8 names of the frame's new ships and colonies, back to back
+"""
+import math
+import os
+import re
+import struct
+
+import snapshot
+from colony import BUILD, Colony, FARM, RESEARCH
+from fleet import Fleet
+from ship import Ship
+from vector import Vector
+
+MOVE = 1
+DAMAGE = 2
+DEATH = 3
+COLONISTS = 4
+LINKS = 5
+# New since the last snapshot: name, empire row and speed, then the rest of
+# the ship's fixed stats
+SHIP = 6
+STATS = 7
+# New since the last snapshot: name, planet row and empire row
+COLONY = 8
+# Kinds that add a row, written first so the rest of a frame can use it
+ADDS = (SHIP, COLONY)
+
+FRAME = struct.Struct('<III')
+RECORD = struct.Struct('<BBxxIdddd')
+LOG_NAME = 'journal-{:04d}.log'
+LOG_PATTERN = re.compile(r'^journal-(\d{4})\.log$')
+SNAPSHOT_NAME = 'turn-{:08d}.snap'
+SNAPSHOT_PATTERN = re.compile(r'^turn-(\d{8})\.snap$')
+NAN = float('nan')
+
+
+def _colonies(empires):
+    """Colonies in the same row order `snapshot` saves them in"""
+    return [colony for empire in empires for colony in empire.colonies]
+
+
+def _planets(systems):
+    """Planets in the same row order `snapshot` saves them in"""
+    return [planet for system in systems for planet in system.planets]
+
+
+def _check_ship(ship):
+    if isinstance(ship, Fleet):
+        raise ValueError('Journals record ships, not fleets such as {}'
+                         .format(ship.name))
+
+
+def _rows(entities):
+    return dict((id(entity), row) for row, entity in enumerate(entities))
+
+
+class Journal(object):
+    """Records per-turn changes to ships, colonies and a fixed set of systems
+
+    Ships are identified by their position in `ships`, systems by theirs in
+    `systems` and colonies by their row in the latest snapshot, matching
+    `snapshot` rows so frames can be replayed on top of a restored snapshot.
+    Ships and colonies the journal has not seen before are given the next
+    row the first time they are recorded. Snapshots have no fleets, so
+    neither do journals.
+    """
+    def __init__(self, directory, empires, systems, ships,
+                 snapshot_interval=10):
+        """Start a journal, or carry on with one
+
+        A new journal writes a snapshot of the starting state. To carry on
+        with a journal, open its directory with the state as of its last
+        turn, such as from `restore`.
+
+        Parameters
+        ----------
+        directory : str
+            where the log and snapshots are kept; created if missing
+        empires : sequence of Empire
+        systems : sequence of System
+        ships : sequence of Ship
+            copied; ships added later are appended to the journal's `ships`
+        snapshot_interval : int
+            optional, turns between full snapshots
+
+        Raises
+        ------
+        ValueError
+            for a snapshot interval below 1, for fleets among the ships, or
+            when carrying on with fewer colonies than the journal holds
+        """
+        if snapshot_interval < 1:
+            raise ValueError('Snapshot interval must be at least 1')
+
+        self.directory = directory
+        self.empires = empires
+        self.systems = systems
+        self.ships = list(ships)
+        for ship in self.ships:
+            _check_ship(ship)
+        self.snapshot_interval = snapshot_interval
+
+        self._ship_rows = _rows(self.ships)
+        self._system_rows = _rows(systems)
+        self._planet_rows = {}
+        self._empire_rows = _rows(empires)
+        self._colony_rows = {}
+        self._colony_count = 0
+        # Per ship, the (target row, system row) replay would give it
+        self._links = {}
+        # Ships added this turn whose links are still to be recorded
+        self._unlinked = []
+        self._pending = {}
+        self._text = []
+        self._text_size = 0
+        self._snapshot_due = False
+
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        turns = self.snapshot_turns()
+        if turns:
+            self._carry_on(turns[-1])
+        else:
+            self._snapshot(0)
+
+        segments = log_segments(directory)
+        number = segments[-1] + 1 if segments else 0
+        self._log = open(os.path.join(directory, LOG_NAME.format(number)),
+                         'wb')
+
+    def close(self):
+        self._log.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _carry_on(self, turn):
+        """Picks up the colony rows of the latest snapshot and the log since
+
+        Restoring leaves each empire with its colonies from the snapshot,
+        then those the log added, in order; so row by row, the next colony
+        of the row's empire is the one.
+        """
+        with snapshot.load(os.path.join(
+                self.directory, SNAPSHOT_NAME.format(turn))) as loaded:
+            owners = [int(empire)
+                      for empire in loaded.column('colonies', 'empire')]
+        for number in log_segments(self.directory):
+            path = os.path.join(self.directory, LOG_NAME.format(number))
+            for frame_turn, records, _ in _frames(path):
+                if frame_turn > turn:
+                    owners.extend(int(record[6]) for record in records
+                                  if record[0] == COLONY)
+
+        remaining = [iter(empire.colonies) for empire in self.empires]
+        self._colony_rows = {}
+        self._colony_count = len(owners)
+        for row, owner in enumerate(owners):
+            # Restoring drops colonies without an empire along with it
+            if owner == snapshot.NONE:
+                continue
+            colony = next(remaining[owner], None)
+            if colony is None:
+                raise ValueError('The journal has more colonies of {} than '
+                                 'were given'
+                                 .format(self.empires[owner].name))
+            self._colony_rows[id(colony)] = row
+        self._planet_rows = _rows(_planets(self.systems))
+        self._remember_links()
+
+    def _remember_links(self):
+        # As the snapshot saved them, with no row for targets it left out
+        self._links = dict((id(ship), self._links_of(ship, adding=False))
+                           for ship in self.ships)
+
+    def _links_of(self, ship, adding=True):
+        target = ship._target
+        if target is None:
+            target_row = snapshot.NONE
+        elif adding:
+            target_row = self.add_ship(target)
+        else:
+            target_row = self._ship_rows.get(id(target), snapshot.NONE)
+        return (target_row,
+                snapshot.NONE if ship.system is None
+                else self._system_rows.get(id(ship.system), snapshot.NONE))
+
+    def _name(self, name):
+        """Adds a name to the frame's text, returning where it is in it"""
+        if name is None:
+            return snapshot.NONE, snapshot.NONE
+        encoded = name.encode('utf-8')
+        start = self._text_size
+        self._text.append(encoded)
+        self._text_size += len(encoded)
+        return start, self._text_size
+
+    def add_ship(self, ship):
+        """Starts journaling a ship built since the journal began
+
+        Recording a ship the journal has not seen adds it as well, so this
+        is only needed to journal a new ship before anything happens to it.
+
+        Parameters
+        ----------
+        ship : Ship
+
+        Raises
+        ------
+        ValueError
+            for a fleet
+
+        Returns
+        -------
+        int
+            the ship's row
+        """
+        row = self._ship_rows.get(id(ship))
+        if row is not None:
+            return row
+        _check_ship(ship)
+
+        row = self._ship_rows[id(ship)] = len(self.ships)
+        self.ships.append(ship)
+        start, end = self._name(ship.name)
+        empire = (snapshot.NONE if ship.empire is None
+                  else self._empire_rows.get(id(ship.empire), snapshot.NONE))
+        self._record(SHIP, row, start, end, empire, ship.speed)
+        self._record(STATS, row, ship.max_hull, ship.max_shield, ship.range,
+                     ship.damage)
+        self.record_move(ship)
+        self.record_damage(ship)
+        # Replay leaves a new ship without links, so only changes need
+        # recording; its target may be new too, so wait for the turn's end
+        self._links[id(ship)] = (snapshot.NONE, snapshot.NONE)
+        self._unlinked.append(ship)
+        return row
+
+    def _record(self, kind, row, *values):
+        ints = 0
+        for bit, value in enumerate(values):
+            if not isinstance(value, float):
+                ints |= 1 << bit
+        self._pending[(kind, row)] = (ints,) + values + (0.0,) * (
+            4 - len(values))
+
+    def record_move(self, ship):
+        """Notes a ship's new position and course
+
+        Parameters
+        ----------
+        ship : Ship
+        """
+        destination = ship._destination
+        if destination is None:
+            dest_x = dest_y = NAN
+        else:
+            dest_x, dest_y = destination[0], destination[1]
+        position = ship.position
+        self._record(MOVE, self.add_ship(ship), position[0], position[1],
+                     dest_x, dest_y)
+
+    def record_moves(self, ships):
+        """Notes every ship returned by a move phase
+
+        Parameters
+        ----------
+        ships : iterable of Ship
+        """
+        for ship in ships:
+            self.record_move(ship)
+
+    def record_damage(self, ship):
+        """Notes a ship's new shield and hull
+
+        Parameters
+        ----------
+        ship : Ship
+        """
+        row = self.add_ship(ship)
+        self._record(DAMAGE, row, ship.shield, ship.hull)
+        if not ship._active:
+            self._record(DEATH, row)
+
+    def record_link(self, ship):
+        """Notes a ship's target and system, if either changed
+
+        Parameters
+        ----------
+        ship : Ship
+        """
+        current = self._links_of(ship)
+        if self._links.get(id(ship)) != current:
+            self._links[id(ship)] = current
+            self._record(LINKS, self.add_ship(ship), *current)
+
+    def record_links(self, ships):
+        """Notes the targets and systems of ships whose ones changed
+
+        Only the ships given are checked, such as those a combat phase
+        retargeted.
+
+        Parameters
+        ----------
+        ships : iterable of Ship
+        """
+        for ship in ships:
+            self.record_link(ship)
+
+    def record_combat(self, report):
+        """Notes every ship damaged or destroyed in a combat phase
+
+        Parameters
+        ----------
+        report : combat.CombatReport
+        """
+        for ship in report.damage:
+            self.record_damage(ship)
+        # Ships lost inside a fleet were never targeted themselves
+        for ship in report.deaths:
+            if ship not in report.damage and id(ship) in self._ship_rows:
+                self.record_damage(ship)
+
+    def record_colonists(self, colony):
+        """Notes a colony's new headcount per job
+
+        A colony founded since the last snapshot is added first. One on a
+        planet outside the journal's systems, or of an empire it does not
+        know, has nothing to replay it against, so a snapshot is written at
+        the end of the turn instead.
+
+        Parameters
+        ----------
+        colony : Colony
+        """
+        row = self._colony_rows.get(id(colony))
+        if row is None:
+            row = self._add_colony(colony)
+            if row is None:
+                self._snapshot_due = True
+                return
+        self._record(COLONISTS, row, colony.job_count(FARM),
+                     colony.job_count(BUILD), colony.job_count(RESEARCH))
+
+    def _add_colony(self, colony):
+        """Gives a new colony the next row, or None if replay couldn't"""
+        planet = empire = snapshot.NONE
+        if colony.planet is not None:
+            planet = self._planet_rows.get(id(colony.planet))
+        if colony.empire is not None:
+            empire = self._empire_rows.get(id(colony.empire))
+        if planet is None or empire is None:
+            return None
+
+        row = self._colony_rows[id(colony)] = self._colony_count
+        self._colony_count += 1
+        start, end = self._name(colony.name)
+        self._record(COLONY, row, start, end, planet, empire)
+        return row
+
+    def end_turn(self, turn):
+        """Appends the turn's frame, and a snapshot when one is due
+
+        Parameters
+        ----------
+        turn : int
+            the turn that just finished
+        """
+        # Linking a new ship can add its target, which then needs linking
+        unlinked = self._unlinked
+        while unlinked:
+            self.record_link(unlinked.pop())
+
+        records = sorted(self._pending.items(),
+                         key=lambda item: (item[0][0] not in ADDS, item[0]))
+        frame = [FRAME.pack(turn, len(records), self._text_size)]
+        frame.extend(RECORD.pack(kind, values[0], row, *values[1:])
+                     for (kind, row), values in records)
+        frame.extend(self._text)
+        self._log.write(b''.join(frame))
+        self._log.flush()
+        self._pending = {}
+        self._text = []
+        self._text_size = 0
+
+        if self._snapshot_due or turn % self.snapshot_interval == 0:
+            self._snapshot(turn)
+
+    def _snapshot(self, turn):
+        snapshot.save(os.path.join(self.directory, SNAPSHOT_NAME.format(turn)),
+                      self.empires, self.systems, self.ships)
+        colonies = _colonies(self.empires)
+        self._colony_rows = _rows(colonies)
+        self._colony_count = len(colonies)
+        self._planet_rows = _rows(_planets(self.systems))
+        self._snapshot_due = False
+        self._remember_links()
+
+    def snapshot_turns(self):
+        """Turns with a full snapshot on disk, in order
+
+        Returns
+        -------
+        list of int
+        """
+        return snapshot_turns(self.directory)
+
+
+def snapshot_turns(directory):
+    """Turns with a full snapshot in a journal directory, in order
+
+    Parameters
+    ----------
+    directory : str
+
+    Returns
+    -------
+    list of int
+    """
+    if not os.path.isdir(directory):
+        return []
+    matches = (SNAPSHOT_PATTERN.match(name) for name in os.listdir(directory))
+    return sorted(int(match.group(1)) for match in matches if match)
+
+
+def log_segments(directory):
+    """Numbers of the log segments in a journal directory, in order
+
+    Parameters
+    ----------
+    directory : str
+
+    Returns
+    -------
+    list of int
+    """
+    if not os.path.isdir(directory):
+        return []
+    matches = (LOG_PATTERN.match(name) for name in os.listdir(directory))
+    return sorted(int(match.group(1)) for match in matches if match)
+
+
+def _frames(path):
+    """Yields (turn, records, text) for each whole frame in a log, in order"""
+    with open(path, 'rb') as stream:
+        while True:
+            header = stream.read(FRAME.size)
+            if len(header) < FRAME.size:
+                return
+            turn, count, text_size = FRAME.unpack(header)
+            size = RECORD.size * count
+            data = stream.read(size + text_size)
+            if len(data) < size + text_size:
+                # Cut short, such as by a crash while it was written
+                return
+            records = [RECORD.unpack_from(data, offset)
+                       for offset in range(0, size, RECORD.size)]
+            yield turn, records, data[size:]
+
+
+class _Replay(object):
+    """The state frames are replayed on, with row lookups for each table"""
+    def __init__(self, empires, systems, ships):
+        self.empires = empires
+        self.systems = systems
+        self.planets = _planets(systems)
+        self.colonies = _colonies(empires)
+        self.ships = ships
+
+    def name(self, text, start, end):
+        if start == snapshot.NONE:
+            return None
+        return text[start:end].decode('utf-8')
+
+    def add(self, rows, row, entity):
+        """Appends a new row, checking it is the one that comes next"""
+        if row != len(rows):
+            raise ValueError('Journal adds row {} to a table of {}'
+                             .format(row, len(rows)))
+        rows.append(entity)
+
+
+def _apply(record, text, replay):
+    kind, ints, row = record[:3]
+    a, b, c, d = [int(value) if ints >> bit & 1 else value
+                  for bit, value in enumerate(record[3:])]
+    ships, systems, colonies = replay.ships, replay.systems, replay.colonies
+    if kind == MOVE:
+        ship = ships[row]
+        ship._move_to(a, b)
+        ship._destination = None if math.isnan(c) else Vector(c, d)
+    elif kind == DAMAGE:
+        ships[row].shield, ships[row].hull = a, b
+    elif kind == DEATH:
+        ships[row]._active = False
+    elif kind == LINKS:
+        ship = ships[row]
+        ship._target = None if a == snapshot.NONE else ships[a]
+        ship.system = None if b == snapshot.NONE else systems[b]
+    elif kind == COLONISTS:
+        colony = colonies[row]
+        for job, count in ((FARM, a), (BUILD, b), (RESEARCH, c)):
+            colony._staff(job, int(count) - colony.job_count(job))
+    elif kind == SHIP:
+        ship = Ship(replay.name(text, a, b), 0, 0, d, 0, 0)
+        ship.empire = None if c == snapshot.NONE else replay.empires[c]
+        replay.add(ships, row, ship)
+    elif kind == STATS:
+        ship = ships[row]
+        ship.max_hull, ship.max_shield, ship.range, ship.damage = a, b, c, d
+    elif kind == COLONY:
+        colony = Colony(None if c == snapshot.NONE else replay.planets[c],
+                        None if d == snapshot.NONE else replay.empires[d],
+                        replay.name(text, a, b))
+        replay.add(colonies, row, colony)
+    else:
+        raise ValueError('Unknown journal record kind {}'.format(kind))
+
+
+def restore(directory, turn):
+    """Rebuilds the game state as it was at the end of `turn`
+
+    Parameters
+    ----------
+    directory : str
+        a journal directory
+    turn : int
+
+    Returns
+    -------
+    tuple of (list of Empire, list of System, list of Ship)
+    """
+    bases = [base for base in snapshot_turns(directory) if base <= turn]
+    if not bases:
+        raise ValueError('No snapshot at or before turn {}'.format(turn))
+
+    base = bases[-1]
+    with snapshot.load(os.path.join(directory,
+                                    SNAPSHOT_NAME.format(base))) as loaded:
+        empires, systems, ships = loaded.restore()
+    replay = _Replay(empires, systems, ships)
+
+    for number in log_segments(directory):
+        path = os.path.join(directory, LOG_NAME.format(number))
+        for frame_turn, records, text in _frames(path):
+            if base < frame_turn <= turn:
+                for record in records:
+                    _apply(record, text, replay)
+
+    return empires, systems, ships
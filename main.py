@@ -1,16 +1,30 @@
-from ship import Ship
+import sys
 
-from time import sleep
+from instrumentation import Instrumentation
+from ship import Ship
+from simulation import Simulation
 
 
-def main():
+def main(headless=False, profile=False):
     ship = Ship('Enterprise', 100, 150, 30, 75, 25)
+    instrumentation = Instrumentation(enabled=profile)
+    simulation = Simulation([ship], instrumentation=instrumentation)
 
-    while ship._active:
+    def bombard(simulation):
         ship.take_damage(32)
-        print ship.status_report()
-        sleep(1)
+        if not headless:
+            print ship.status_report()
+
+    simulation.add_phase('bombard', bombard)
+    stats = simulation.run(tick_rate=None if headless else 1,
+                           until=lambda simulation: not ship._active)
+
+    if headless:
+        print stats.report()
+    if profile:
+        print instrumentation.export_text(),
 
 
 if __name__ == '__main__':
-    main()
+    main(headless='--headless' in sys.argv[1:],
+         profile='--profile' in sys.argv[1:])
@@ -0,0 +1,185 @@
+from vector import Vector
+from vector_batch import VectorBatch, numpy
+
+
+def _step_factors(distances, speeds):
+    """Fraction of each offset a ship covers this turn, capped at 1
+
+    Parameters
+    ----------
+    distances : numpy.ndarray or list of float
+    speeds : sequence of int or float
+
+    Returns
+    -------
+    numpy.ndarray or list of float
+    """
+    if numpy is not None and isinstance(distances, numpy.ndarray):
+        speeds = numpy.asarray(speeds, dtype=float)
+        arrived = distances <= speeds
+        # Arrived ships are snapped to their destination afterwards, so only
+        # keep their divisor away from zero
+        safe = numpy.where(arrived, 1.0, distances)
+        return numpy.where(arrived, 1.0, speeds / safe)
+
+    return [1.0 if distance <= speed else speed / distance
+            for distance, speed in zip(distances, speeds)]
+
+
+def advance(positions, destinations, speeds):
+    """Step a batch of positions towards their destinations
+
+    This is the array kernel behind `move_ships`, and works directly on
+    contiguous component arrays.
+
+    Parameters
+    ----------
+    positions : VectorBatch
+    destinations : VectorBatch
+    speeds : sequence of int or float
+
+    Returns
+    -------
+    tuple of (VectorBatch, list of bool)
+        the new positions, and whether each ship reached its destination.
+        Ships that reach their destination are placed exactly on it.
+    """
+    offsets = destinations - positions
+    distances = offsets.norm()
+    factors = _step_factors(distances, speeds)
+    new_positions = positions + offsets.scale(factors)
+
+    if numpy is not None and isinstance(distances, numpy.ndarray):
+        arrived = distances <= numpy.asarray(speeds, dtype=float)
+        new_positions.xs[arrived] = destinations.xs[arrived]
+        new_positions.ys[arrived] = destinations.ys[arrived]
+        return new_positions, arrived.tolist()
+
+    arrived = [distance <= speed
+               for distance, speed in zip(distances, speeds)]
+    for index, done in enumerate(arrived):
+        if done:
+            new_positions.xs[index] = destinations.xs[index]
+            new_positions.ys[index] = destinations.ys[index]
+    return new_positions, arrived
+
+
+class _Placement(object):
+    """Where one call to `move_ships` put the ships it moved
+
+    Each of those ships keeps this and its row in it until something else
+    moves it, and only builds its `Vector` position when it is first read.
+    The next call reads their positions straight from here.
+    """
+    __slots__ = ('batch', 'xs', 'ys')
+
+    def __init__(self, batch):
+        self.batch = batch
+        self.xs, self.ys = batch.components()
+
+    def vector(self, row):
+        return Vector(self.xs[row], self.ys[row])
+
+
+def _positions(movers):
+    """The movers' positions, from where the last move put them if it can"""
+    placement = movers[0]._placement
+    if placement is None:
+        return VectorBatch.from_vectors([ship.position for ship in movers])
+
+    rows = [ship._row if ship._placement is placement else -1
+            for ship in movers]
+    positions = placement.batch.take(rows)
+    if -1 in rows:
+        for index, row in enumerate(rows):
+            if row < 0:
+                position = movers[index].position
+                positions.xs[index] = position[0]
+                positions.ys[index] = position[1]
+    return positions
+
+
+def move_ships(ships):
+    """Advance every active ship with a destination by one turn, in one pass
+
+    Equivalent to calling `Ship._process_move` on each ship, but the direction,
+    scaling and overshoot checks run over contiguous component arrays. Ships
+    keep their new positions in those arrays, only building a `Vector` when
+    their position is read, and the next call starts from them.
+
+    Parameters
+    ----------
+    ships : iterable of Ship
+
+    Returns
+    -------
+    list of Ship
+        the ships that moved
+    """
+    movers = [ship for ship in ships
+              if ship._active and ship._destination is not None]
+    if not movers:
+        return movers
+
+    destinations = VectorBatch.from_vectors(
+        [ship._destination for ship in movers])
+    speeds = [ship.speed for ship in movers]
+
+    new_positions, arrived = advance(_positions(movers), destinations,
+                                     speeds)
+
+    placement = _Placement(new_positions)
+    for index, ship in enumerate(movers):
+        if arrived[index]:
+            ship._move_to(ship._destination)
+            ship._destination = None
+        else:
+            ship._position = None
+            ship._placement = placement
+            ship._row = index
+
+    return movers
+
+
+def _fleet_movers(fleets):
+    for fleet in fleets:
+        if fleet.grouped:
+            yield fleet
+        else:
+            for ship in fleet:
+                yield ship
+
+
+def move_fleets(empire):
+    """Advance an empire's fleets by one turn
+
+    Grouped fleets move as one unit, at the speed of their slowest ship.
+    The ships of expanded fleets move individually.
+
+    Parameters
+    ----------
+    empire : Empire
+
+    Returns
+    -------
+    list of Fleet and Ship
+        the fleets and ships that moved
+    """
+    return move_ships(_fleet_movers(empire.fleets))
+
+
+def move_empires(empires):
+    """Advance every fleet in the galaxy by one turn, in a single batch
+
+    Parameters
+    ----------
+    empires : iterable of Empire
+
+    Returns
+    -------
+    list of Fleet and Ship
+        the fleets and ships that moved
+    """
+    return move_ships(_fleet_movers(fleet
+                                    for empire in empires
+                                    for fleet in empire.fleets))
@@ -0,0 +1,644 @@
+import bisect
+import math
+import multiprocessing
+import random
+
+from combat import collect_attacks, resolve
+from movement import move_ships
+from ship import Ship
+from spatial import SpatialGrid
+from vector import Vector
+
+NO_TARGET = -1
+
+
+def shard_seed(seed, turn, shard):
+    """Deterministic RNG seed for one shard on one turn
+
+    Parameters
+    ----------
+    seed : int
+    turn : int
+    shard : int
+
+    Returns
+    -------
+    int
+    """
+    return (seed * 2654435761 + turn * 40503 + shard) & 0xFFFFFFFFFFFF
+
+
+def _ship_static(ship, empire_keys):
+    """Fields of a ship that do not change during a turn"""
+    return (ship.name, ship.max_hull, ship.max_shield, ship.speed,
+            ship.range, ship.damage, empire_keys[id(ship.empire)])
+
+
+def _ship_state(ship, indices):
+    """Fields of a ship that a turn can change, with the target as an index"""
+    destination = ship._destination
+    target = ship._target
+    position = ship.position
+    return (position[0], position[1],
+            None if destination is None else tuple(destination),
+            ship.hull, ship.shield, ship._active,
+            NO_TARGET if target is None else indices.get(id(target),
+                                                         NO_TARGET))
+
+
+def _cell_size(ships):
+    """A grid cell size suited to the longest weapon range"""
+    return max([ship.range for ship in ships] + [1])
+
+
+class _Zone(object):
+    """Stands in for a system when locating ships in a worker"""
+    __slots__ = ('number', 'position')
+
+    def __init__(self, number, position):
+        self.number = number
+        self.position = position
+
+
+class _Shard(object):
+    """The ships of one shard, kept from turn to turn in a worker
+
+    Ships that live elsewhere but are targeted from here are kept as ghosts,
+    refreshed before every attack phase. A ship that migrates keeps its
+    object: it turns into a ghost in the shard it left, and a ghost turns
+    back into a resident in the shard it joins, so targets stay linked.
+    """
+    def __init__(self, number, worker, cell_size):
+        self.number = number
+        self.worker = worker
+        self.residents = {}
+        self.order = []
+        self.ghosts = {}
+        # Ship ids to indices, for residents and ghosts alike
+        self.indices = {}
+        self.grid = SpatialGrid(cell_size)
+
+    def _ship(self, index):
+        """The resident or ghost for an index, made when first needed"""
+        ship = self.residents.get(index)
+        if ship is None:
+            ship = self.ghosts.get(index)
+        if ship is None:
+            ship = self.ghosts[index] = self.worker.make_ship(index)
+            self.indices[id(ship)] = index
+        return ship
+
+    def join(self, index, state):
+        """Takes a ship in, leaving its target to be linked afterwards"""
+        ship = self._ship(index)
+        self.ghosts.pop(index, None)
+        _set_state(ship, state)
+        self.residents[index] = ship
+        bisect.insort(self.order, index)
+        self.grid.insert(ship)
+
+    def _leave(self, index):
+        ship = self.residents.pop(index)
+        del self.order[bisect.bisect_left(self.order, index)]
+        self.grid.remove(ship)
+        self.ghosts[index] = ship
+        return ship
+
+    def link(self, index, target):
+        self.residents[index]._target = (None if target == NO_TARGET
+                                         else self._ship(target))
+
+    def move(self, landed):
+        """Moves the shard's ships after applying last turn's remote hits
+
+        Parameters
+        ----------
+        landed : list of (int, int, int or float)
+            (attacker, target, damage) indices aimed at this shard's ships
+
+        Returns
+        -------
+        tuple of (list, list, list)
+            (index, x, y, arrived) for every ship that moved, (index, shard,
+            state) for those that left for another shard, and the indices of
+            targets that live in other shards
+        """
+        residents = self.residents
+        if landed:
+            resolve([(None, residents[target], damage)
+                     for _, target, damage in landed])
+
+        moved = move_ships([residents[index] for index in self.order])
+        self.grid.update_many(moved)
+
+        indices = self.indices
+        locate = self.worker.locate
+        positions, departures = [], []
+        for ship in moved:
+            index = indices[id(ship)]
+            position = ship.position
+            positions.append((index, position[0], position[1],
+                              ship._destination is None))
+            shard = locate(position, self.number)
+            if shard != self.number:
+                departures.append((index, shard, None))
+        for number, (index, shard, _) in enumerate(departures):
+            departures[number] = (index, shard,
+                                  _ship_state(self._leave(index), indices))
+
+        wanted = set()
+        for ship in residents.values():
+            target = ship._target
+            if target is not None:
+                index = indices[id(target)]
+                if index not in residents:
+                    wanted.add(index)
+        return positions, departures, sorted(wanted)
+
+    def attack(self, turn, arrivals, ghosts):
+        """Takes in arriving ships and refreshes ghosts, then fights
+
+        Parameters
+        ----------
+        turn : int
+        arrivals : list of (int, tuple)
+            (index, state) for ships that joined this shard
+        ghosts : list of (int, tuple)
+            (index, state) for targets in other shards
+
+        Returns
+        -------
+        tuple of (list, list, list)
+            (index, hull, shield, active, target index) for every ship that
+            was hit or changed target, (index, state) for every ship the
+            shard phase changed, and (attacker index, target index, damage)
+            events aimed at other shards
+        """
+        for index, state in arrivals:
+            self.join(index, state)
+        for index, state in ghosts:
+            _set_state(self._ship(index), state)
+        for index, state in arrivals:
+            self.link(index, state[-1])
+
+        residents = self.residents
+        indices = self.indices
+        local = [residents[index] for index in self.order]
+        retargeted = []
+        local_events, remote_events = [], []
+        for attacker, target, damage in collect_attacks(local, self.grid,
+                                                        retargeted=retargeted):
+            if indices[id(target)] in residents:
+                local_events.append((attacker, target, damage))
+            else:
+                remote_events.append((indices[id(attacker)],
+                                      indices[id(target)], damage))
+        changed = set(resolve(local_events).damage)
+        changed.update(retargeted)
+        hits = []
+        for ship in changed:
+            target = ship._target
+            hits.append((indices[id(ship)], ship.hull, ship.shield,
+                         ship._active,
+                         NO_TARGET if target is None
+                         else indices[id(target)]))
+        hits.sort()
+
+        states = []
+        shard_phase = self.worker.shard_phase
+        if shard_phase is not None:
+            # The shard phase may change anything, so compare every ship
+            before = [_ship_state(ship, indices) for ship in local]
+            shard_phase(local, random.Random(
+                shard_seed(self.worker.seed, turn, self.number)))
+            for ship, state in zip(local, before):
+                after = _ship_state(ship, indices)
+                if after != state:
+                    states.append((indices[id(ship)], after))
+        return hits, states, remote_events
+
+
+def _set_state(ship, state):
+    """Applies a state to a worker-side ship, apart from its target"""
+    x, y, destination, hull, shield, active, _ = state
+    ship._move_to(x, y)
+    ship._destination = (None if destination is None
+                         else Vector(*destination))
+    ship.hull, ship.shield, ship._active = hull, shield, active
+
+
+class _Worker(object):
+    """The shards one process looks after, and what they share"""
+    def __init__(self, statics, zones, zone_radius, cell_size, seed,
+                 shard_phase, entries):
+        """Create a worker
+
+        Parameters
+        ----------
+        statics : list of tuple
+            every ship's unchanging fields, by index
+        zones : list of (float, float)
+            every system's position, in shard order
+        zone_radius : int or float
+        cell_size : int or float
+            for each shard's targeting grid
+        seed : int
+        shard_phase : callable
+        entries : dict of int to list of (int, tuple)
+            the (index, state) of every ship, by the shard it starts in
+        """
+        self.statics = statics
+        self.zone_radius = zone_radius
+        self.seed = seed
+        self.shard_phase = shard_phase
+        self.deep_space = len(zones)
+        self._zones = SpatialGrid(zone_radius, [
+            _Zone(number, Vector(x, y))
+            for number, (x, y) in enumerate(zones)])
+        self._limit = zone_radius * zone_radius
+        # Each zone's centre, then those of the zones that could claim the
+        # same positions. Twice the radius would do; three times leaves
+        # rounding no say.
+        self._centres = []
+        for number, (x, y) in enumerate(zones):
+            rivals = self._zones.query_radius((x, y), 3 * zone_radius)
+            self._centres.append(((x, y), [
+                (zone.position[0], zone.position[1]) for zone in rivals
+                if zone.number != number]))
+        # Every cell within two of a system's. A system within the radius of
+        # a position is at most one cell away, give or take rounding.
+        self._near = set()
+        for x, y in zones:
+            cx, cy = self._cell_of(x, y)
+            self._near.update((cx + dx, cy + dy) for dx in range(-2, 3)
+                              for dy in range(-2, 3))
+        # Empires are compared by identity, so share one marker per key
+        self._empires = {}
+
+        self.shards = {}
+        for number, shard_entries in entries.items():
+            shard = self.shards[number] = _Shard(number, self, cell_size)
+            for index, state in shard_entries:
+                shard.join(index, state)
+            for index, state in shard_entries:
+                shard.link(index, state[-1])
+
+    def make_ship(self, index):
+        name, max_hull, max_shield, speed, range, damage, empire = \
+            self.statics[index]
+        ship = Ship(name, max_hull, max_shield, speed, range, damage)
+        ship.empire = self._empires.setdefault(empire, object())
+        return ship
+
+    def _cell_of(self, x, y):
+        size = self._zones.cell_size
+        return int(math.floor(x / size)), int(math.floor(y / size))
+
+    def locate(self, position, shard):
+        """The number of the shard whose zone contains `position`
+
+        Agrees with `ParallelTurnExecutor.locate`, but skips the search for
+        the nearest system when a ship is still clearly closest to its own,
+        or is nowhere near any.
+
+        Parameters
+        ----------
+        position : Vector
+        shard : int
+            the shard the ship was in
+        """
+        x, y = position[0], position[1]
+        if shard != self.deep_space:
+            (cx, cy), rivals = self._centres[shard]
+            # Same arithmetic as SpatialGrid.nearest
+            dx = cx - x
+            dy = cy - y
+            distance = dx * dx + dy * dy
+            if distance <= self._limit:
+                for rx, ry in rivals:
+                    dx = rx - x
+                    dy = ry - y
+                    if dx * dx + dy * dy <= distance:
+                        break
+                else:
+                    return shard
+        if self._cell_of(x, y) not in self._near:
+            return self.deep_space
+        zone = self._zones.nearest(position, self.zone_radius)
+        return self.deep_space if zone is None else zone.number
+
+    def move(self, landed):
+        """Runs `_Shard.move` for every shard, given hits by shard"""
+        return dict((number, shard.move(landed.get(number)))
+                    for number, shard in self.shards.items())
+
+    def attack(self, payload):
+        """Runs `_Shard.attack` for every shard with ships
+
+        Parameters
+        ----------
+        payload : tuple of (int, dict)
+            the turn, and (arrivals, ghosts) by shard
+        """
+        turn, incoming = payload
+        results = {}
+        for number, shard in self.shards.items():
+            arrivals, ghosts = incoming.get(number, ((), ()))
+            if shard.residents or arrivals:
+                results[number] = shard.attack(turn, arrivals, ghosts)
+        return results
+
+
+def _serve(connection, arguments):
+    """Answers calls on a worker in its own process, until told to stop"""
+    worker = _Worker(*arguments)
+    while True:
+        call = connection.recv()
+        if call is None:
+            break
+        name, payload = call
+        try:
+            connection.send((True, getattr(worker, name)(payload)))
+        except Exception as error:
+            connection.send((False, error))
+    connection.close()
+
+
+class ParallelTurnExecutor(object):
+    """Runs turns with the galaxy sharded by `System` across worker processes
+
+    Every ship in the same system lands in the same shard, along with a final
+    shard for ships in deep space. Each worker process keeps its shards'
+    ships from turn to turn. Shards move, then attack, in parallel, and only
+    what crosses shards goes through the parent: ships that flew into another
+    system's zone, copies of targets in other shards, and attacks on them.
+    Attacks aimed across shards are applied after local combat, in shard
+    order.
+
+    The parent's ships are kept up to date with what changed in the shards,
+    so they can be read between turns. Changes made to them are only seen by
+    the shards before the first turn, or after `close`.
+
+    Merging always happens in the same order, so a run with worker processes
+    gives bit-identical results to a serial run of the executor
+    (`processes=0`) with the same seed.
+
+    A turn is not the same as `Simulation.tick`, except when every ship is
+    in one shard:
+
+    - Ships without a target only look for enemies in their own shard, so
+      ships in different systems never pick each other, however close.
+    - Attacks within a shard land before attacks from other shards. Ships
+      end up with the same shields and hulls, but the returned report only
+      covers the attacks that crossed shards.
+    - Only moving, attacking and `shard_phase` run. There is no pursuit,
+      visibility, journal or instrumentation.
+    """
+    def __init__(self, systems, ships, zone_radius, processes=None, seed=0,
+                 shard_phase=None):
+        """Create an executor
+
+        Parameters
+        ----------
+        systems : sequence of System
+        ships : sequence of Ship
+        zone_radius : int or float
+            ships within this distance of a system belong to it
+        processes : int
+            optional, number of worker processes. Defaults to one per CPU;
+            0 runs every shard serially in this process.
+        seed : int
+            optional, seeds the RNG handed to `shard_phase`
+        shard_phase : callable
+            optional, module-level function run in each shard after combat,
+            called with the shard's ships and a `random.Random`
+        """
+        self.systems = list(systems)
+        self.ships = list(ships)
+        self.zone_radius = zone_radius
+        self.processes = processes
+        self.seed = seed
+        self.shard_phase = shard_phase
+        self.turn = 0
+
+        self._zones = SpatialGrid(zone_radius, self.systems)
+        self._numbers = dict((id(system), number)
+                             for number, system in enumerate(self.systems))
+        self._indices = dict((id(ship), index)
+                             for index, ship in enumerate(self.ships))
+        # Set up on the first turn, along with the workers
+        self._shard_of = None
+        self._worker_count = 0
+        self._workers = []
+        self._connections = []
+        self._processes = []
+        # Attacks from other shards, by target shard, for the next turn
+        self._landed = {}
+
+        for ship in self.ships:
+            ship.system = self.locate(ship)
+
+    def close(self):
+        """Shuts down the worker processes, if any were started"""
+        for connection in self._connections:
+            connection.send(None)
+            connection.close()
+        for process in self._processes:
+            process.join()
+        # Another turn starts over from the parent's ships
+        self._shard_of = None
+        self._workers = []
+        self._connections = []
+        self._processes = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def locate(self, ship):
+        """The system whose zone contains `ship`, or None in deep space
+
+        Parameters
+        ----------
+        ship : Ship
+
+        Returns
+        -------
+        System or None
+        """
+        return self._zones.nearest(ship.position, self.zone_radius)
+
+    def _shard_number(self, ship):
+        if ship.system is None:
+            return len(self.systems)
+        return self._numbers[id(ship.system)]
+
+    def shards(self):
+        """Ship indices grouped by system, in system order, deep space last
+
+        Returns
+        -------
+        list of (int, list of int)
+            shard number (the system's position in `systems`) and the indices
+            of its ships, skipping empty shards
+        """
+        shards = [[] for _ in range(len(self.systems) + 1)]
+        for index, ship in enumerate(self.ships):
+            shards[self._shard_number(ship)].append(index)
+        return [(number, shard) for number, shard in enumerate(shards)
+                if shard]
+
+    def _start(self):
+        """Hands every ship to the worker that looks after its shard"""
+        # The parent's ships already took every hit still to land
+        self._landed = {}
+        empire_keys = {}
+        for ship in self.ships:
+            empire_keys.setdefault(id(ship.empire), len(empire_keys))
+        statics = [_ship_static(ship, empire_keys) for ship in self.ships]
+        zones = [(system.position[0], system.position[1])
+                 for system in self.systems]
+        shard_count = len(self.systems) + 1
+        if self.processes == 0:
+            count = 1
+        else:
+            count = min(self.processes or multiprocessing.cpu_count(),
+                        shard_count)
+        self._worker_count = count
+
+        self._shard_of = [self._shard_number(ship) for ship in self.ships]
+        entries = [dict((number, []) for number in range(worker, shard_count,
+                                                         count))
+                   for worker in range(count)]
+        for index, ship in enumerate(self.ships):
+            shard = self._shard_of[index]
+            entries[shard % count][shard].append(
+                (index, _ship_state(ship, self._indices)))
+
+        shared = (statics, zones, self.zone_radius, _cell_size(self.ships),
+                  self.seed, self.shard_phase)
+        if self.processes == 0:
+            self._workers = [_Worker(*(shared + (entries[0],)))]
+            return
+
+        for worker_entries in entries:
+            connection, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_serve, args=(child, shared + (worker_entries,)))
+            process.daemon = True
+            process.start()
+            child.close()
+            self._connections.append(connection)
+            self._processes.append(process)
+
+    def _call(self, name, payloads):
+        """Calls a `_Worker` method on every worker, merging their results
+
+        Returns
+        -------
+        list of (int, object)
+            each shard's result, in shard order
+        """
+        results = {}
+        if not self._connections:
+            for worker, payload in zip(self._workers, payloads):
+                results.update(getattr(worker, name)(payload))
+            return sorted(results.items())
+
+        for connection, payload in zip(self._connections, payloads):
+            connection.send((name, payload))
+        for connection in self._connections:
+            succeeded, result = connection.recv()
+            if not succeeded:
+                raise result
+            results.update(result)
+        return sorted(results.items())
+
+    def _by_worker(self, by_shard):
+        """Splits a dict keyed by shard into one for each worker"""
+        count = self._worker_count
+        payloads = [{} for _ in range(count)]
+        for shard, value in by_shard.items():
+            payloads[shard % count][shard] = value
+        return payloads
+
+    def _apply(self, ship, state):
+        x, y, destination = state[:3]
+        if destination is None and ship._destination is not None and \
+                (x, y) == tuple(ship._destination):
+            # Arrived: keep the exact destination vector, like move_ships
+            ship._move_to(ship._destination)
+        elif (x, y) != tuple(ship.position):
+            ship._move_to(x, y)
+        if destination is None:
+            ship._destination = None
+        elif tuple(ship._destination) != destination:
+            ship._destination = Vector(*destination)
+        self._apply_hit(ship, *state[3:])
+
+    def _apply_hit(self, ship, hull, shield, active, target):
+        ship.hull, ship.shield, ship._active = hull, shield, active
+        ship._target = None if target == NO_TARGET else self.ships[target]
+
+    def run_turn(self):
+        """Processes one turn for every shard and merges the results
+
+        Returns
+        -------
+        combat.CombatReport
+            for attacks that crossed shard boundaries
+        """
+        if self._shard_of is None:
+            self._start()
+        ships = self.ships
+        shard_of = self._shard_of
+
+        arrivals = {}
+        wanted = {}
+        moves = self._call('move', self._by_worker(self._landed))
+        for number, (positions, departures, targets) in moves:
+            for index, x, y, arrived in positions:
+                ship = ships[index]
+                if arrived:
+                    # Keep the exact destination vector, like move_ships
+                    ship._move_to(ship._destination)
+                    ship._destination = None
+                else:
+                    ship._move_to(x, y)
+            for index, shard, state in departures:
+                shard_of[index] = shard
+                ships[index].system = (None if shard == len(self.systems)
+                                       else self.systems[shard])
+                arrivals.setdefault(shard, []).append((index, state))
+            wanted[number] = targets
+        for shard, states in arrivals.items():
+            wanted[shard] = sorted(set(wanted.get(shard, ())).union(
+                state[-1] for _, state in states))
+
+        incoming = {}
+        for shard, targets in wanted.items():
+            ghosts = [(index, _ship_state(ships[index], self._indices))
+                      for index in targets
+                      if index != NO_TARGET and shard_of[index] != shard]
+            incoming[shard] = (arrivals.get(shard, ()), ghosts)
+        attacks = self._call('attack', [
+            (self.turn, payload) for payload in self._by_worker(incoming)])
+
+        remote_events = []
+        for _, (hits, states, events) in attacks:
+            for hit in hits:
+                self._apply_hit(ships[hit[0]], *hit[1:])
+            for index, state in states:
+                self._apply(ships[index], state)
+            remote_events.extend(events)
+        report = resolve([(ships[attacker], ships[target], damage)
+                          for attacker, target, damage in remote_events])
+
+        self._landed = {}
+        for event in remote_events:
+            self._landed.setdefault(shard_of[event[1]], []).append(event)
+
+        self.turn += 1
+        return report
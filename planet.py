@@ -5,10 +5,25 @@ orbit_labels = [
     'IV',
     'V'
 ]
+ORBITS = len(orbit_labels)
+
+
+def _label_field(name):
+    """A property that drops the planet's cached label whenever it is set"""
+    def get(self):
+        return getattr(self, name)
+
+    def set(self, value):
+        setattr(self, name, value)
+        self._label = None
+    return property(get, set)
 
 
 class Planet(object):
     def __init__(self, size, biome, minerals, special=None):
+        # Rendered by __str__ on first use, cleared when what it shows changes
+        self._label = None
+
         self.system = None
         self.orbit = None
 
@@ -19,10 +34,20 @@ class Planet(object):
 
         self.colony = None
 
+    system = _label_field('_system')
+    orbit = _label_field('_orbit')
+    colony = _label_field('_colony')
+
     def __str__(self):
-        if self.colony:
-            return self.colony.name
-        if self.system and self.orbit:
-            return "{system} {number}".format(str(self.system),
-                                              number=orbit_labels[self.orbit])
+        label = self._label
+        if label is None:
+            label = self._label = self._render()
+        return label
+
+    def _render(self):
+        if self._colony is not None and self._colony.name:
+            return self._colony.name
+        if self._system is not None and self._orbit is not None:
+            return "{system} {number}".format(system=str(self._system),
+                                              number=orbit_labels[self._orbit])
         return 'Rogue Planet'
@@ -0,0 +1,467 @@
+"""Multiplayer front end: players submit orders over a socket, turn by turn
+
+Clients connect over TCP or a Unix socket and exchange newline-delimited
+JSON. A client first joins as one of the empires, then sends orders for its
+own ships and colonies::
+
+    {"order": "join", "empire": "Federation"}
+    {"order": "set_course", "ship": "Enterprise", "x": 120, "y": -40}
+    {"order": "set_target", "ship": "Enterprise", "target": "Bird of Prey"}
+    {"order": "add_colonist", "colony": 0, "job": "farm"}
+
+Malformed orders are answered straight away with ``{"error": ...}``; the
+rest are queued until the turn ends. The whole batch is then applied in
+arrival order and the turn resolved on a worker thread, leaving the event
+loop free to keep serving clients. The worker is the only thread that
+touches the game, so checks against it, such as whether the sender
+commands a ship, are made as the batch is applied, and any orders they
+turn down are answered when the turn is done. Every joined client is then
+sent the ships and colonies that changed::
+
+    {"turn": 1, "ships": [...], "colonies": [...]}
+
+A turn that fails to resolve is reported to every joined client as
+``{"turn": ..., "error": ...}``, and the next one can still be started.
+
+Python 2 has no asyncio, so the event loop is asyncore's, polling with
+``poll`` rather than ``select`` so thousands of connections fit.
+"""
+import asynchat
+import asyncore
+import errno
+import json
+import os
+import socket
+import time
+from multiprocessing.pool import ThreadPool
+from Queue import Empty, Queue
+
+from colony import JOBS
+from vector import Vector
+
+ORDERS = ('join', 'set_course', 'set_target', 'add_colonist')
+BACKLOG = 1024
+TERMINATOR = b'\n'
+
+
+class OrderError(ValueError):
+    """Raised for orders that are malformed, or not the sender's to give"""
+
+
+def _encode(message):
+    return json.dumps(message, sort_keys=True).encode('utf-8') + TERMINATOR
+
+
+def _ship_state(ship):
+    position = ship.position
+    return (position[0], position[1], ship.shield, ship.hull,
+            ship._active)
+
+
+def _colony_state(colony):
+    return tuple(colony.job_count(job) for job in JOBS)
+
+
+class _Connection(asynchat.async_chat):
+    """One client's connection, reading newline-delimited orders"""
+    def __init__(self, sock, server):
+        asynchat.async_chat.__init__(self, sock, map=server._map)
+        self.set_terminator(TERMINATOR)
+        self.server = server
+        self.empire = None
+        self._buffer = []
+
+    def collect_incoming_data(self, data):
+        self._buffer.append(data)
+
+    def found_terminator(self):
+        line = b''.join(self._buffer)
+        self._buffer = []
+        if line.strip():
+            self.server.receive(self, line)
+
+    def send_message(self, message):
+        self.push(_encode(message))
+
+    def handle_close(self):
+        self.server._disconnected(self)
+        self.close()
+
+
+class GameServer(asyncore.dispatcher):
+    """Accepts orders from many clients and resolves turns off the loop"""
+    def __init__(self, simulation, empires, address=('127.0.0.1', 0),
+                 turn_interval=None, workers=1, clock=time.time):
+        """Start listening for clients
+
+        Parameters
+        ----------
+        simulation : simulation.Simulation
+            its ships are the ones players can order about, by name
+        empires : sequence of Empire
+            the empires players can join as
+        address : tuple of (str, int) or str
+            optional, a TCP (host, port), or a path for a Unix socket
+        turn_interval : int or float
+            optional, seconds between turns. Without one, turns only end
+            when `end_turn` is called.
+        workers : int
+            optional, threads available for resolving turns
+        clock : callable
+            optional, returns the current time in seconds
+
+        Raises
+        ------
+        ValueError
+            if two of the simulation's ships share a name
+        """
+        self._map = {}
+        asyncore.dispatcher.__init__(self, map=self._map)
+
+        family = socket.AF_UNIX if isinstance(address, str) else \
+            socket.AF_INET
+        self.create_socket(family, socket.SOCK_STREAM)
+        if family == socket.AF_INET:
+            self.set_reuse_addr()
+        self.bind(address)
+        self.listen(BACKLOG)
+        self.address = self.socket.getsockname()
+
+        self.simulation = simulation
+        self.empires = dict((empire.name, empire) for empire in empires)
+        self.turn_interval = turn_interval
+        self.turn = simulation.turn
+        self.connections = []
+
+        self._clock = clock
+        self._pool = ThreadPool(workers)
+        self._pending = []
+        self._finished = Queue()
+        self._resolving = False
+        self._next_turn = (clock() + turn_interval
+                           if turn_interval is not None else None)
+
+        # Game state below is only touched on the worker once turns start
+        self._ships = self._index_ships()
+        self._ship_states = dict((ship, _ship_state(ship))
+                                 for ship in simulation.ships)
+        self._colony_states = dict((colony, _colony_state(colony))
+                                   for _, colony in self._colonies())
+
+    def handle_accept(self):
+        # Take every waiting connection, not just one per pass of the loop
+        while True:
+            pair = self.accept()
+            if pair is None:
+                return
+            sock, _ = pair
+            self.connections.append(_Connection(sock, self))
+
+    def _disconnected(self, connection):
+        if connection in self.connections:
+            self.connections.remove(connection)
+
+    def receive(self, connection, line):
+        """Handles one line from a client
+
+        Parameters
+        ----------
+        connection : _Connection
+        line : bytes
+        """
+        try:
+            order = json.loads(line.decode('utf-8'))
+            if not isinstance(order, dict):
+                raise OrderError('Orders must be JSON objects')
+            self.submit(connection, order)
+        except ValueError as error:
+            connection.send_message({'error': str(error)})
+
+    def submit(self, connection, order):
+        """Checks an order's form and queues it for the end of the turn
+
+        Whether the sender may give it is only checked when the batch is
+        applied, on the worker.
+
+        Parameters
+        ----------
+        connection : _Connection
+        order : dict
+
+        Raises
+        ------
+        OrderError
+        """
+        kind = order.get('order')
+        if kind not in ORDERS:
+            raise OrderError('Unknown order: {}'.format(kind))
+
+        if kind == 'join':
+            empire = self.empires.get(order.get('empire'))
+            if empire is None:
+                raise OrderError('No such empire: {}'
+                                 .format(order.get('empire')))
+            connection.empire = empire
+            connection.send_message({'joined': empire.name,
+                                     'turn': self.turn})
+            return
+
+        empire = connection.empire
+        if empire is None:
+            raise OrderError('Join an empire before giving orders')
+
+        if kind == 'add_colonist':
+            colony = order.get('colony')
+            if not isinstance(colony, int) or isinstance(colony, bool):
+                raise OrderError('No such colony: {}'.format(colony))
+            job = order.get('job')
+            if job is not None and job not in JOBS:
+                raise OrderError('Unknown job: {}'.format(job))
+            argument = job
+        elif kind == 'set_course':
+            try:
+                argument = Vector(float(order['x']), float(order['y']))
+            except (KeyError, TypeError, ValueError):
+                raise OrderError('A course needs numeric x and y')
+        else:
+            argument = order.get('target')
+
+        subject = colony if kind == 'add_colonist' else order.get('ship')
+        self._pending.append((connection, empire, kind, subject, argument))
+
+    def _own_ship(self, empire, name):
+        ship = self._ship(name)
+        if ship.empire is not empire:
+            raise OrderError('{} does not command {}'.format(empire.name,
+                                                             name))
+        return ship
+
+    def _ship(self, name):
+        ship = self._ships.get(name)
+        if ship is None:
+            raise OrderError('No such ship: {}'.format(name))
+        return ship
+
+    def _index_ships(self):
+        """The simulation's ships by name
+
+        Raises
+        ------
+        ValueError
+            if two ships share a name, as orders could not tell them apart
+        """
+        ships = {}
+        for ship in self.simulation.ships:
+            if ships.setdefault(ship.name, ship) is not ship:
+                raise ValueError('Ship names must be unique: {}'
+                                 .format(ship.name))
+        return ships
+
+    def _colonies(self):
+        """Every colony, with its empire's name and its index there"""
+        for name, empire in self.empires.items():
+            for row, colony in enumerate(empire.colonies):
+                yield (name, row), colony
+
+    def end_turn(self):
+        """Hands the queued orders and the turn to a worker
+
+        Returns
+        -------
+        bool
+            False if the previous turn is still being resolved
+        """
+        if self._resolving:
+            return False
+        orders, self._pending = self._pending, []
+        self._resolving = True
+        self._pool.apply_async(self._resolve, (orders,))
+        return True
+
+    def _resolve(self, orders):
+        """Resolves a turn on a worker thread, always reporting back"""
+        rejected = []
+        try:
+            result = self._run_turn(orders, rejected)
+        except Exception as error:
+            result = {'turn': self.simulation.turn,
+                      'error': 'Turn could not be resolved: {}: {}'
+                               .format(type(error).__name__, error)}
+        self._finished.put((result, rejected))
+
+    def _run_turn(self, orders, rejected):
+        """Applies a batch of orders and runs the turn
+
+        Parameters
+        ----------
+        orders : list of tuple
+            as queued by `submit`
+        rejected : list
+            (connection, message) pairs are added for orders turned down
+        """
+        self._ships = self._index_ships()
+        for connection, empire, kind, subject, argument in orders:
+            try:
+                self._apply(empire, kind, subject, argument)
+            except OrderError as error:
+                rejected.append((connection, {'error': str(error)}))
+
+        self.simulation.tick()
+        return self._delta()
+
+    def _apply(self, empire, kind, subject, argument):
+        if kind == 'add_colonist':
+            if not 0 <= subject < len(empire.colonies):
+                raise OrderError('No such colony: {}'.format(subject))
+            empire.colonies[subject].add_colonist(argument)
+            return
+
+        ship = self._own_ship(empire, subject)
+        if kind == 'set_course':
+            ship.set_course(argument)
+        else:
+            ship.set_target(self._ship(argument))
+
+    def _delta(self):
+        """Ships and colonies that changed since the last turn
+
+        Ships and colonies new to the simulation are sent in full, and those
+        that have left it are forgotten.
+        """
+        ships = []
+        states = {}
+        for ship in self.simulation.ships:
+            before = self._ship_states.get(ship)
+            after = states[ship] = _ship_state(ship)
+            if after != before:
+                x, y, shield, hull, active = after
+                ships.append({'name': ship.name, 'x': x, 'y': y,
+                              'shield': shield, 'hull': hull,
+                              'active': active})
+        self._ship_states = states
+
+        colonies = []
+        states = {}
+        for (empire, row), colony in self._colonies():
+            before = self._colony_states.get(colony)
+            after = states[colony] = _colony_state(colony)
+            if after != before:
+                colonies.append({'empire': empire, 'colony': row,
+                                 'jobs': dict(zip(JOBS, after))})
+        self._colony_states = states
+
+        ships.sort(key=lambda ship: ship['name'])
+        colonies.sort(key=lambda colony: (colony['empire'], colony['colony']))
+        return {'turn': self.simulation.turn, 'ships': ships,
+                'colonies': colonies}
+
+    def _broadcast(self, message):
+        encoded = _encode(message)
+        for connection in self.connections:
+            if connection.empire is not None:
+                connection.push(encoded)
+
+    def poll(self, timeout=0.0):
+        """Runs one pass of the event loop
+
+        Serves any ready connections, sends out finished turns, and starts
+        the next turn when the interval is up.
+
+        Parameters
+        ----------
+        timeout : float
+            optional, seconds to wait for socket activity
+        """
+        asyncore.loop(timeout=timeout, use_poll=True, map=self._map, count=1)
+
+        while True:
+            try:
+                result, rejected = self._finished.get_nowait()
+            except Empty:
+                break
+            self._resolving = False
+            self.turn = result['turn']
+            for connection, message in rejected:
+                if connection in self.connections:
+                    connection.send_message(message)
+            self._broadcast(result)
+
+        if self._next_turn is not None and self._clock() >= self._next_turn:
+            if self.end_turn():
+                self._next_turn += self.turn_interval
+
+    def serve_forever(self, timeout=0.05):
+        """Polls until the server is closed
+
+        Parameters
+        ----------
+        timeout : float
+            optional, longest wait for socket activity per pass
+        """
+        while self._map:
+            self.poll(timeout)
+
+    def close(self):
+        for connection in list(self.connections):
+            connection.close()
+        self.connections = []
+        asyncore.dispatcher.close(self)
+        self._pool.close()
+        self._pool.join()
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.remove(self.address)
+
+
+class GameClient(object):
+    """A minimal blocking client, for tests and scripted players"""
+    def __init__(self, address):
+        """Connect to a server
+
+        Parameters
+        ----------
+        address : tuple of (str, int) or str
+        """
+        family = socket.AF_UNIX if isinstance(address, str) else \
+            socket.AF_INET
+        self.socket = socket.socket(family, socket.SOCK_STREAM)
+        self.socket.connect(address)
+        self.socket.setblocking(False)
+        self._buffer = b''
+
+    def send(self, order):
+        """Sends one order
+
+        Parameters
+        ----------
+        order : dict
+        """
+        self.socket.setblocking(True)
+        try:
+            self.socket.sendall(_encode(order))
+        finally:
+            self.socket.setblocking(False)
+
+    def messages(self):
+        """Every complete message received so far, without waiting
+
+        Returns
+        -------
+        list of dict
+        """
+        while True:
+            try:
+                data = self.socket.recv(65536)
+            except socket.error as error:
+                if error.args[0] in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    break
+                raise
+            if not data:
+                break
+            self._buffer += data
+
+        lines = self._buffer.split(TERMINATOR)
+        self._buffer = lines.pop()
+        return [json.loads(line.decode('utf-8')) for line in lines if line]
+
+    def close(self):
+        self.socket.close()
@@ -1,24 +1,27 @@
 from vector import Vector
 
 
-class Ship(object):
-    def __init__(self, name, max_hull, max_shield, speed, range, damage):
-        self.name = name
-        self.max_hull = max_hull
-        self.hull = max_hull
-        self.max_shield = max_shield
-        self.shield = max_shield
-        self.speed = speed
-        self.range = range
-        self.damage = damage
+# Vectors are immutable, so every ship can start out sharing the origin
+ORIGIN = Vector(0, 0)
 
-        self._position = Vector(0, 0)
-        self._destination = None
-        self._target = None
-        self._active = True
+
+class Unit(object):
+    """What ships and fleets have in common: a position, course and target
+
+    Subclasses provide `_position`, `_placement`, `_row`, `_destination`,
+    `_target`, `_active`, `empire`, `speed` and `range`.
+    """
+    __slots__ = ()
+
+    @property
+    def position(self):
+        position = self._position
+        if position is None:
+            position = self._position = self._placement.vector(self._row)
+        return position
 
     def _move_to(self, x, y=None):
-        """Move the ship to a new position
+        """Move to a new position
 
         Parameters
         ----------
@@ -31,9 +34,10 @@ class Ship(object):
             self._position = x
         else:
             self._position = Vector(x, y)
+        self._placement = None
 
     def set_course(self, x, y=None):
-        """Set a new destination for the ship
+        """Set a new destination
 
         Parameters
         ----------
@@ -42,11 +46,109 @@ class Ship(object):
         y : int or float
             optional, default `None`. Second component of new vector
         """
-        if y is None and (x.x and x.y):
+        if y is None and isinstance(x, Vector):
             self._destination = x
         else:
             self._destination = Vector(x, y)
 
+    def set_target(self, target):
+        self._target = target
+
+    def is_enemy(self, other):
+        """Whether `other` is an active ship or fleet of a different empire
+
+        Parameters
+        ----------
+        other : Ship or Fleet
+
+        Returns
+        -------
+        bool
+        """
+        return (other is not self and other._active and
+                other.empire is not self.empire)
+
+    def _acquire_target(self, index=None):
+        """Returns the target to fire on this turn, if one is within range
+
+        Parameters
+        ----------
+        index : spatial.SpatialGrid
+            optional. When given, without a live target the nearest enemy
+            in range is picked from the index.
+
+        Returns
+        -------
+        Ship, Fleet or None
+        """
+        if not self._active:
+            return None
+
+        if self._target is not None and not self._target._active:
+            self._target = None
+
+        if self._target is None:
+            if index is None:
+                return None
+            self._target = index.nearest_enemy(self)
+            if self._target is None:
+                return None
+
+        if (self._target.position - self.position).norm() <= self.range:
+            return self._target
+        return None
+
+
+class Ship(Unit):
+    # Fixed attribute slots instead of a per-instance __dict__ keep large
+    # fleets compact
+    __slots__ = (
+        'name',
+        'max_hull',
+        'hull',
+        'max_shield',
+        'shield',
+        'speed',
+        'range',
+        'damage',
+        '_position',
+        '_placement',
+        '_row',
+        '_destination',
+        '_target',
+        '_active',
+        'empire',
+        'system',
+        '_status',
+        '_status_fields',
+    )
+
+    def __init__(self, name, max_hull, max_shield, speed, range, damage):
+        self.name = name
+        self.max_hull = max_hull
+        self.hull = max_hull
+        self.max_shield = max_shield
+        self.shield = max_shield
+        self.speed = speed
+        self.range = range
+        self.damage = damage
+
+        self._position = ORIGIN
+        # Set by `movement.move_ships` while the ship stands where it was
+        # put, which then leaves `_position` to be built when first read
+        self._placement = None
+        self._row = 0
+        self._destination = None
+        self._target = None
+        self._active = True
+
+        self.empire = None
+        self.system = None
+
+        # Last status report, and the field values it was rendered from
+        self._status = None
+        self._status_fields = None
+
     def _damage_shield(self, damage):
         """Applies damage to the ships' shield, returning any damage left
 
@@ -98,31 +200,86 @@ class Ship(object):
             self._damage_hull(hull_damage)
 
     def status_report(self):
-        return ("{name}: shield:{shield}/{max_shield}, hull:{hull}/{max_hull}"
-                .format(name=self.name,
-                        shield=self.shield,
-                        max_shield=self.max_shield,
-                        hull=self.hull,
-                        max_hull=self.max_hull))
+        """The ship's name, shield and hull as one line of text
 
-    def set_target(self, target):
-        self.target = target
+        The text is cached and only rendered again once one of those fields
+        has been set to a different object.
+
+        Returns
+        -------
+        str
+        """
+        fields = self._status_fields
+        if (fields is not None and fields[0] is self.shield and
+                fields[1] is self.hull and fields[2] is self.name and
+                fields[3] is self.max_shield and fields[4] is self.max_hull):
+            return self._status
+
+        self._status_fields = (self.shield, self.hull, self.name,
+                               self.max_shield, self.max_hull)
+        self._status = ("{name}: shield:{shield}/{max_shield}, "
+                        "hull:{hull}/{max_hull}"
+                        .format(name=self.name,
+                                shield=self.shield,
+                                max_shield=self.max_shield,
+                                hull=self.hull,
+                                max_hull=self.max_hull))
+        return self._status
 
     def _process_move(self):
-        pass
-        # calculate direction vector
-        # multiply by speed
-        # add to position
+        """Moves the ship `speed` units towards its destination
+
+        Ships that would overshoot their destination stop on it instead, and
+        their course is cleared.
+        """
+        if not self._active or self._destination is None:
+            return
+
+        position = self.position
+        offset = self._destination - position
+        distance = offset.norm()
+
+        if distance <= self.speed:
+            self._move_to(self._destination)
+            self._destination = None
+        else:
+            self._move_to(position + offset * (self.speed / distance))
+
+    def _process_attack(self, index=None):
+        """Fires on the current target if it is within range
+
+        Parameters
+        ----------
+        index : spatial.SpatialGrid
+            optional, used to pick a target when the ship has none
+        """
+        target = self._acquire_target(index)
+        if target is not None:
+            target.take_damage(self.damage)
 
-    def _process_attack(self):
-        pass
-        # check range to target
-        # if < range, call damage on target
+    def process_turn(self, index=None):
+        """Moves the ship, then attacks
 
-    def process_turn(self):
+        Parameters
+        ----------
+        index : spatial.SpatialGrid
+            optional, used for targeting and kept up to date with the move
+        """
         self._process_move()
-        self._process_attack()
+        if index is not None and self in index:
+            index.update(self)
+        self._process_attack(index)
 
-    @property
-    def position(self):
-        return self._position
+
+def status_reports(ships):
+    """Every ship's status report in one block of text, a line per ship
+
+    Parameters
+    ----------
+    ships : iterable of Ship
+
+    Returns
+    -------
+    str
+    """
+    return '\n'.join([ship.status_report() for ship in ships])
@@ -0,0 +1,332 @@
+import time
+
+from combat import attack_phase
+from fleet import Fleet
+from movement import move_ships
+
+
+class RunStats(object):
+    """Throughput and per-phase timings for a simulation run
+
+    Attributes
+    ----------
+    turns : int
+        number of turns processed
+    elapsed : float
+        wall-clock seconds spent, including any pacing sleeps
+    phase_times : dict of str to float
+        seconds spent in each phase, summed over every turn
+    """
+    def __init__(self, turns, elapsed, phase_times):
+        self.turns = turns
+        self.elapsed = elapsed
+        self.phase_times = phase_times
+
+    @property
+    def ticks_per_second(self):
+        if not self.elapsed:
+            return float('inf') if self.turns else 0.0
+        return self.turns / self.elapsed
+
+    def phase_mean(self, name):
+        """Average seconds per turn spent in a phase
+
+        Parameters
+        ----------
+        name : str
+
+        Returns
+        -------
+        float
+        """
+        if not self.turns:
+            return 0.0
+        return self.phase_times.get(name, 0.0) / self.turns
+
+    def report(self):
+        lines = ['{turns} turns in {elapsed:.3f}s ({rate:.1f} ticks/sec)'
+                 .format(turns=self.turns,
+                         elapsed=self.elapsed,
+                         rate=self.ticks_per_second)]
+        for name in sorted(self.phase_times):
+            lines.append('  {name}: {mean:.6f}s/turn'
+                         .format(name=name, mean=self.phase_mean(name)))
+        return '\n'.join(lines)
+
+
+class Simulation(object):
+    """Headless fixed-step turn scheduler
+
+    Each turn runs a list of named phases in order. The default phases do the
+    work of `Ship.process_turn` for every ship at once: a batched move, then a
+    simultaneous attack, preceded by a pursuit phase when there is a pursuit
+    planner and followed by a visibility phase when there is a visibility
+    layer. Colony and empire phases can be added with `add_phase`.
+
+    Fleets move and fight as one unit while grouped. A grouped fleet with an
+    enemy in range expands before the attack, and an expanded fleet's ships
+    are simulated one by one until it regroups.
+    """
+    def __init__(self, ships=(), index=None, journal=None,
+                 instrumentation=None, pursuit=None, visibility=None,
+                 clock=time.time, sleep=time.sleep):
+        """Create a simulation
+
+        Parameters
+        ----------
+        ships : iterable of Ship or Fleet
+        index : spatial.SpatialGrid
+            optional, used for targeting and kept up to date as ships move
+        journal : journal.Journal
+            optional, records every turn's moves and combat. Journals only
+            record ships, so can't be used with fleets.
+        instrumentation : instrumentation.Instrumentation
+            optional, collects per-turn phase timings and operation counts
+        pursuit : intercept.InterceptPlanner
+            optional, steers ships towards their targets before they move
+        visibility : visibility.Visibility
+            optional, kept up to date with what every empire can see
+        clock : callable
+            optional, returns the current time in seconds
+        sleep : callable
+            optional, used to pace runs with a tick rate
+
+        Raises
+        ------
+        ValueError
+            for a journal together with fleets
+        """
+        self.ships = list(ships)
+        self._fleets = [fleet for fleet in self.ships
+                        if isinstance(fleet, Fleet)]
+        if journal is not None and self._fleets:
+            raise ValueError('Journals record ships, not fleets')
+        # Fleets whose ships are simulated, and filed, one by one
+        self._expanded = set()
+        self.index = index
+        self.journal = journal
+        self.instrumentation = instrumentation
+        self.pursuit = pursuit
+        self.visibility = visibility
+        self.turn = 0
+        self.phases = [('move', self._move_phase),
+                       ('attack', self._attack_phase)]
+        if pursuit is not None:
+            self.phases.insert(0, ('pursue', self._pursue_phase))
+        if visibility is not None:
+            self.phases.append(('visibility', self._visibility_phase))
+        self.phase_times = dict((name, 0.0) for name, _ in self.phases)
+        self.last_moved = []
+        self.last_combat = None
+        self.last_visibility = {}
+
+        self._clock = clock
+        self._sleep = sleep
+
+    def add_phase(self, name, callback):
+        """Append a phase that runs after the existing ones every turn
+
+        Parameters
+        ----------
+        name : str
+        callback : callable
+            called with the simulation as its only argument
+        """
+        if name in self.phase_times:
+            raise ValueError('A phase named {} already exists'.format(name))
+        self.phases.append((name, callback))
+        self.phase_times[name] = 0.0
+
+    def add_ship(self, ship):
+        """Bring a new ship or fleet into the simulation, from the next turn
+
+        It is filed in the index, tracked by the visibility layer and
+        journaled, when the simulation has them.
+
+        Parameters
+        ----------
+        ship : Ship or Fleet
+
+        Raises
+        ------
+        ValueError
+            for a fleet when there is a journal
+        """
+        if isinstance(ship, Fleet):
+            if self.journal is not None:
+                raise ValueError('Journals record ships, not fleets')
+            self._fleets.append(ship)
+        self.ships.append(ship)
+        if self.index is not None:
+            self.index.insert(ship)
+        if self.visibility is not None:
+            self.visibility.add(ship)
+        if self.journal is not None:
+            self.journal.add_ship(ship)
+
+    def _instrumented(self):
+        instrumentation = self.instrumentation
+        if instrumentation is not None and instrumentation.enabled:
+            return instrumentation
+        return None
+
+    def _units(self):
+        """What moves and fights this turn
+
+        Ships and grouped fleets stand for themselves, and expanded fleets
+        for their ships. Fleets that expanded or regrouped since the last
+        call have their ships swapped for them in the index and visibility
+        layer, or the other way around.
+
+        Returns
+        -------
+        list of Ship and Fleet
+        """
+        if not self._fleets:
+            return self.ships
+
+        expanded = self._expanded
+        for fleet in self._fleets:
+            if fleet.grouped == (fleet in expanded):
+                if fleet.grouped:
+                    expanded.discard(fleet)
+                    self._refile(fleet.ships, [fleet])
+                else:
+                    expanded.add(fleet)
+                    self._refile([fleet], list(fleet))
+
+        units = []
+        for entity in self.ships:
+            if entity in expanded:
+                units.extend(entity)
+            else:
+                units.append(entity)
+        return units
+
+    def _refile(self, old, new):
+        """Swaps entities for others in the index and visibility layer"""
+        index, visibility = self.index, self.visibility
+        for entity in old:
+            if index is not None and entity in index:
+                index.remove(entity)
+            if visibility is not None and entity in visibility:
+                visibility.remove(entity)
+        for entity in new:
+            if index is not None and entity not in index:
+                index.insert(entity)
+            if visibility is not None and entity not in visibility:
+                visibility.add(entity)
+
+    def _engage(self):
+        """Expands every grouped fleet with an enemy in range"""
+        for fleet in self._fleets:
+            if (fleet.grouped and
+                    fleet._acquire_target(self.index) is not None):
+                fleet.expand()
+
+    def _pursue_phase(self, simulation):
+        planned = self.pursuit.plan(self._units())
+
+        instrumentation = self._instrumented()
+        if instrumentation is not None:
+            instrumentation.count('courses_planned', len(planned))
+
+    def _move_phase(self, simulation):
+        moved = self.last_moved = move_ships(self._units())
+        if self.index is not None:
+            self.index.update_many(moved)
+        if self.journal is not None:
+            self.journal.record_moves(moved)
+
+        instrumentation = self._instrumented()
+        if instrumentation is not None:
+            # Moved positions stay in arrays until read, so the phase itself
+            # allocates no Vectors to count
+            instrumentation.count('ships_moved', len(moved))
+
+    def _attack_phase(self, simulation):
+        instrumentation = self._instrumented()
+        self._engage()
+        self.last_combat = attack_phase(self._units(), self.index,
+                                        instrumentation)
+        if self.journal is not None:
+            self.journal.record_combat(self.last_combat)
+            self.journal.record_links(self.last_combat.retargeted)
+
+        if instrumentation is not None:
+            instrumentation.count('damage_events', self.last_combat.events)
+            instrumentation.count('ships_damaged',
+                                  len(self.last_combat.damage))
+            instrumentation.count('deaths', len(self.last_combat.deaths))
+
+    def _visibility_phase(self, simulation):
+        deaths = self.last_combat.deaths if self.last_combat else ()
+        self.last_visibility = self.visibility.update(self.last_moved, deaths)
+
+        instrumentation = self._instrumented()
+        if instrumentation is not None:
+            instrumentation.count('visibility_changes', sum(
+                len(appeared) + len(vanished)
+                for appeared, vanished in self.last_visibility.values()))
+
+    def tick(self):
+        """Runs every phase once, advancing the simulation a single turn"""
+        clock = self._clock
+        instrumentation = self._instrumented()
+        for name, callback in self.phases:
+            start = clock()
+            callback(self)
+            elapsed = clock() - start
+            self.phase_times[name] += elapsed
+            if instrumentation is not None:
+                instrumentation.record_phase(name, elapsed)
+        self.turn += 1
+
+        if self.journal is not None:
+            self.journal.end_turn(self.turn)
+        if instrumentation is not None:
+            instrumentation.end_turn(self.turn)
+
+    def run(self, turns=None, tick_rate=None, until=None):
+        """Runs turns back to back, or paced to a tick rate
+
+        Parameters
+        ----------
+        turns : int
+            optional, stop after this many turns
+        tick_rate : int or float
+            optional, turns per second. Runs as fast as possible when omitted.
+        until : callable
+            optional, called with the simulation before each turn; the run
+            stops once it returns true
+
+        Returns
+        -------
+        RunStats
+            for this run only
+        """
+        if turns is None and until is None:
+            raise ValueError('A run needs a turn count or a stop condition')
+
+        period = 1.0 / tick_rate if tick_rate else None
+        before = dict(self.phase_times)
+        start = self._clock()
+        count = 0
+
+        while turns is None or count < turns:
+            if until is not None and until(self):
+                break
+
+            tick_start = self._clock()
+            self.tick()
+            count += 1
+
+            if period is not None:
+                remaining = period - (self._clock() - tick_start)
+                if remaining > 0:
+                    self._sleep(remaining)
+
+        elapsed = self._clock() - start
+        phase_times = dict((name, total - before.get(name, 0.0))
+                           for name, total in self.phase_times.items())
+        return RunStats(count, elapsed, phase_times)
@@ -0,0 +1,477 @@
+"""Versioned binary snapshots of the whole game state
+
+A snapshot stores each entity type (empires, systems, planets, colonies and
+ships) as a table of fixed-width columns. Cross-references between entities
+are saved as row numbers, with -1 for none, and text is kept in a shared
+string table. Columns are written in chunks as they are produced, so saving
+never builds the whole file in memory. Loading memory-maps the file and only
+decodes a column when it is read, so opening even a very large snapshot and
+reading its columns takes next to no time. Restoring the objects themselves
+is linear in their number.
+
+Numbers are kept in float64 columns. Each table with any also has an
+`ints` column, a bitmask per row of which of them were ints, so that every
+value comes back with the type it was saved with.
+
+Layout, all little-endian::
+
+    header   MAGIC, version (uint16)
+    section  name (24 bytes, NUL padded), typecode (1 byte), count (uint64),
+             followed by `count` items of that typecode
+    ...
+"""
+import array
+import gc
+import mmap
+import os
+import struct
+import sys
+from operator import attrgetter
+
+from colony import BUILD, Colony, FARM, RESEARCH
+from empire import Empire
+from planet import Planet
+from ship import Ship
+from system import System
+from vector import Vector
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+MAGIC = b'MOOSNAP\x00'
+VERSION = 4
+HEADER = struct.Struct('<8sH')
+SECTION = struct.Struct('<24scQ')
+CHUNK = 65536
+NONE = -1
+NUMPY_TYPES = {'i': '<i4', 'd': '<f8', 'B': 'u1', 'I': '<u4'}
+INTS = 'ints'
+
+# Column layouts per table, as (column name, typecode)
+TABLES = (
+    ('empires', (('name', 'i'),)),
+    ('systems', (('name', 'i'), ('x', 'd'), ('y', 'd'))),
+    ('planets', (('system', 'i'), ('orbit', 'i'), ('size', 'i'),
+                 ('biome', 'i'), ('minerals', 'i'), ('special', 'i'))),
+    ('colonies', (('name', 'i'), ('planet', 'i'), ('empire', 'i'),
+                  ('farm', 'i'), ('build', 'i'), ('research', 'i'))),
+    ('ships', (('name', 'i'), ('empire', 'i'), ('system', 'i'),
+               ('max_hull', 'd'), ('hull', 'd'), ('max_shield', 'd'),
+               ('shield', 'd'), ('speed', 'd'), ('range', 'd'),
+               ('damage', 'd'), ('x', 'd'), ('y', 'd'), ('dest_x', 'd'),
+               ('dest_y', 'd'), ('target', 'i'), ('active', 'i'))),
+)
+
+
+def _float_columns(table):
+    """Names of a table's float64 columns, in the order of their `ints` bits"""
+    return [column for column, typecode in dict(TABLES)[table]
+            if typecode == 'd']
+
+
+class SnapshotError(ValueError):
+    """Raised for files that are not snapshots, or are from another version"""
+
+
+class _Strings(object):
+    """Interns strings into a table, handing out their row numbers"""
+    def __init__(self):
+        self.ids = {}
+        self.values = []
+
+    def __call__(self, value):
+        if value is None:
+            return NONE
+        if value not in self.ids:
+            self.ids[value] = len(self.values)
+            self.values.append(value)
+        return self.ids[value]
+
+
+class _Writer(object):
+    def __init__(self, stream):
+        self.stream = stream
+        stream.write(HEADER.pack(MAGIC, VERSION))
+
+    def column(self, name, typecode, rows, getter, ints=None, bit=0):
+        """Writes a section, encoding `getter(row)` a chunk of rows at a time
+
+        For float columns, `ints` is an array of per-row `ints` bitmasks, and
+        `bit` is set in it for every row whose value is not a float.
+        """
+        self.stream.write(
+            SECTION.pack(name.encode('ascii'), typecode, len(rows)))
+        for start in range(0, len(rows), CHUNK):
+            values = map(getter, rows[start:start + CHUNK])
+            if ints is not None:
+                _flag_ints(ints, start, values, 1 << bit)
+            chunk = array.array(typecode, values)
+            if sys.byteorder == 'big':
+                chunk.byteswap()
+            self.stream.write(chunk.tostring())
+
+
+def _flag_ints(ints, start, values, bit):
+    """Sets `bit` in `ints[start:]` for each of `values` that is not a float"""
+    types = set(map(type, values))
+    if types == set([float]):
+        return
+    end = start + len(values)
+    if float not in types:
+        ints[start:end] = array.array(
+            'I', [mask | bit for mask in ints[start:end]])
+        return
+    for row, value in enumerate(values, start):
+        if not isinstance(value, float):
+            ints[row] |= bit
+
+
+def _rows(entities):
+    return dict((id(entity), row) for row, entity in enumerate(entities))
+
+
+def save(path, empires, systems, ships):
+    """Writes a snapshot of the game state to `path`
+
+    Planets are taken from `systems` and colonies from `empires`.
+
+    Parameters
+    ----------
+    path : str
+    empires : sequence of Empire
+    systems : sequence of System
+    ships : sequence of Ship
+    """
+    planets = [planet for system in systems for planet in system.planets]
+    colonies = [colony for empire in empires for colony in empire.colonies]
+    strings = _Strings()
+    empire_rows, system_rows = _rows(empires), _rows(systems)
+    planet_rows, ship_rows = _rows(planets), _rows(ships)
+
+    def row(rows, entity):
+        return NONE if entity is None else rows.get(id(entity), NONE)
+
+    def destination(ship, axis):
+        if ship._destination is None:
+            return float('nan')
+        return ship._destination[axis]
+
+    getters = {
+        'empires': {'name': lambda empire: strings(empire.name)},
+        'systems': {
+            'name': lambda system: strings(system.name),
+            'x': lambda system: system.position[0],
+            'y': lambda system: system.position[1],
+        },
+        'planets': {
+            'system': lambda planet: row(system_rows, planet.system),
+            'orbit': lambda planet: (NONE if planet.orbit is None
+                                     else planet.orbit),
+            'size': lambda planet: strings(planet.size),
+            'biome': lambda planet: strings(planet.biome),
+            'minerals': lambda planet: strings(planet.minerals),
+            'special': lambda planet: strings(planet.special),
+        },
+        'colonies': {
+            'name': lambda colony: strings(colony.name),
+            'planet': lambda colony: row(planet_rows, colony.planet),
+            'empire': lambda colony: row(empire_rows, colony.empire),
+            'farm': lambda colony: colony.job_count(FARM),
+            'build': lambda colony: colony.job_count(BUILD),
+            'research': lambda colony: colony.job_count(RESEARCH),
+        },
+        'ships': {
+            'name': lambda ship: strings(ship.name),
+            'empire': lambda ship: row(empire_rows, ship.empire),
+            'system': lambda ship: row(system_rows, ship.system),
+            'x': lambda ship: ship.position[0],
+            'y': lambda ship: ship.position[1],
+            'dest_x': lambda ship: destination(ship, 0),
+            'dest_y': lambda ship: destination(ship, 1),
+            'target': lambda ship: row(ship_rows, ship._target),
+            'active': lambda ship: int(ship._active),
+        },
+    }
+    entities = {'empires': empires, 'systems': systems, 'planets': planets,
+                'colonies': colonies, 'ships': ships}
+
+    with open(path, 'wb') as stream:
+        writer = _Writer(stream)
+        for table, columns in TABLES:
+            rows = entities[table]
+            floats = _float_columns(table)
+            ints = array.array('I', [0]) * len(rows) if floats else None
+            for column, typecode in columns:
+                getter = getters[table].get(column, attrgetter(column))
+                if typecode == 'd':
+                    writer.column('{}.{}'.format(table, column), typecode,
+                                  rows, getter, ints, floats.index(column))
+                else:
+                    writer.column('{}.{}'.format(table, column), typecode,
+                                  rows, getter)
+            if floats:
+                writer.column('{}.{}'.format(table, INTS), 'I', ints, int)
+
+        encoded = [value.encode('utf-8') for value in strings.values]
+        offsets = [0]
+        for value in encoded:
+            offsets.append(offsets[-1] + len(value))
+        writer.column('strings.offsets', 'i', offsets, int)
+        stream.write(SECTION.pack(b'strings.data', 'B', offsets[-1]))
+        for value in encoded:
+            stream.write(value)
+
+
+class Snapshot(object):
+    """A memory-mapped snapshot, decoding columns only when they are read"""
+    def __init__(self, path):
+        """Open a snapshot
+
+        Parameters
+        ----------
+        path : str
+
+        Raises
+        ------
+        SnapshotError
+            if the file is not a whole snapshot, or is from another version
+        """
+        self._map = None
+        self._sections = {}
+        self._columns = {}
+        self._file = open(path, 'rb')
+        try:
+            # mmap refuses empty files, so check there is a header first
+            if os.fstat(self._file.fileno()).st_size < HEADER.size:
+                raise SnapshotError('{} is not a snapshot'.format(path))
+            self._map = mmap.mmap(self._file.fileno(), 0,
+                                  access=mmap.ACCESS_READ)
+            self._read_sections(path)
+        except:
+            self.close()
+            raise
+
+    def _read_sections(self, path):
+        magic, self.version = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise SnapshotError('{} is not a snapshot'.format(path))
+        if self.version != VERSION:
+            raise SnapshotError('Unsupported snapshot version {}'
+                                .format(self.version))
+
+        offset = HEADER.size
+        end = len(self._map)
+        while offset < end:
+            if offset + SECTION.size > end:
+                raise SnapshotError('{} is truncated'.format(path))
+            name, typecode, count = SECTION.unpack_from(self._map, offset)
+            offset += SECTION.size
+            if typecode not in NUMPY_TYPES:
+                raise SnapshotError('{} is corrupt'.format(path))
+            size = array.array(typecode).itemsize * count
+            if offset + size > end:
+                raise SnapshotError('{} is truncated'.format(path))
+            self._sections[name.rstrip(b'\x00').decode('ascii')] = (
+                typecode, offset, count)
+            offset += size
+
+    def close(self):
+        """Closes the file
+
+        Columns already read stay usable. NumPy columns view the mapping
+        and keep it alive, so it is only unmapped here if none were read;
+        otherwise it goes once the last of them does.
+        """
+        if self._map is not None and not (numpy is not None and
+                                          self._columns):
+            self._map.close()
+        self._map = None
+        self._columns.clear()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def count(self, table):
+        """Number of rows in a table
+
+        Parameters
+        ----------
+        table : str
+
+        Returns
+        -------
+        int
+        """
+        name = '{}.{}'.format(table, dict(TABLES)[table][0][0])
+        return self._sections[name][2]
+
+    def column(self, table, name):
+        """One column of a table. With NumPy, a zero-copy view of the file.
+
+        Parameters
+        ----------
+        table : str
+        name : str
+
+        Returns
+        -------
+        numpy.ndarray or array.array
+
+        Raises
+        ------
+        ValueError
+            if the snapshot is closed
+        """
+        key = '{}.{}'.format(table, name)
+        if self._map is None:
+            raise ValueError('I/O operation on closed snapshot')
+        if key not in self._columns:
+            typecode, offset, count = self._sections[key]
+            if numpy is not None:
+                values = numpy.frombuffer(self._map, NUMPY_TYPES[typecode],
+                                          count, offset)
+            else:
+                values = array.array(typecode)
+                size = values.itemsize * count
+                values.fromstring(self._map[offset:offset + size])
+                if sys.byteorder == 'big':
+                    values.byteswap()
+            self._columns[key] = values
+        return self._columns[key]
+
+    def _list(self, table, name):
+        """A column as a list, with numbers saved as ints given as ints"""
+        values = self.column(table, name)
+        if self._sections['{}.{}'.format(table, name)][0] != 'd':
+            return values.tolist() if numpy is not None else list(values)
+
+        bit = _float_columns(table).index(name)
+        flags = self.column(table, INTS)
+        if numpy is None:
+            return [int(value) if mask >> bit & 1 else value
+                    for value, mask in zip(values, flags)]
+
+        ints = (flags >> bit) & 1
+        if ints.all():
+            return values.astype(int).tolist()
+        values = values.tolist()
+        for row in numpy.flatnonzero(ints).tolist():
+            values[row] = int(values[row])
+        return values
+
+    def strings(self):
+        """The string table, indexed by the string ids in other columns
+
+        Returns
+        -------
+        list of unicode
+        """
+        offsets = self._list('strings', 'offsets')
+        _, start, count = self._sections['strings.data']
+        data = self._map[start:start + count]
+        text = data.decode('utf-8')
+        if len(text) != len(data):
+            # Multi-byte characters: offsets are in bytes, so slice the bytes
+            return [data[begin:end].decode('utf-8')
+                    for begin, end in zip(offsets, offsets[1:])]
+        return [text[begin:end] for begin, end in zip(offsets, offsets[1:])]
+
+    def restore(self):
+        """Rebuilds every entity from the snapshot
+
+        Returns
+        -------
+        tuple of (list of Empire, list of System, list of Ship)
+        """
+        # None of the new objects are garbage, so don't let the collector
+        # rescan them over and over while millions are being created
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return self._restore()
+        finally:
+            if enabled:
+                gc.enable()
+
+    def _restore(self):
+        strings = self.strings()
+
+        def text(string_id):
+            return None if string_id == NONE else strings[string_id]
+
+        def table(name):
+            columns = [column for column, _ in dict(TABLES)[name]]
+            return zip(*[self._list(name, column) for column in columns])
+
+        empires = [Empire(text(name)) for name, in table('empires')]
+
+        systems = [System(text(name), Vector(x, y))
+                   for name, x, y in table('systems')]
+
+        planets = []
+        for system, orbit, size, biome, minerals, special in \
+                table('planets'):
+            planet = Planet(text(size), text(biome), text(minerals),
+                            text(special))
+            if system != NONE:
+                systems[system].add_planet(planet,
+                                           None if orbit == NONE else orbit)
+            planets.append(planet)
+
+        for name, planet, empire, farm, build, research in \
+                table('colonies'):
+            colony = Colony(None if planet == NONE else planets[planet],
+                            None if empire == NONE else empires[empire],
+                            text(name))
+            for job, count in ((FARM, farm), (BUILD, build),
+                               (RESEARCH, research)):
+                colony.add_colonists(count, job)
+
+        # Row lookups with None at the end, which a NONE (-1) row lands on
+        empire_rows = empires + [None]
+        system_rows = systems + [None]
+        names = strings + [None]
+        ships, targets = [], []
+        append = ships.append
+        for (name, empire, system, max_hull, hull, max_shield, shield, speed,
+             range, damage, x, y, dest_x, dest_y, target, active) in \
+                table('ships'):
+            ship = Ship(names[name], max_hull, max_shield, speed, range,
+                        damage)
+            ship.hull, ship.shield = hull, shield
+            ship.empire = empire_rows[empire]
+            ship.system = system_rows[system]
+            ship._move_to(x, y)
+            # NaN, for no destination, is the one value unequal to itself
+            if dest_x == dest_x:
+                ship._destination = Vector(dest_x, dest_y)
+            if not active:
+                ship._active = False
+            append(ship)
+            targets.append(target)
+
+        for ship, target in zip(ships, targets):
+            if target != NONE:
+                ship._target = ships[target]
+
+        return empires, systems, ships
+
+
+def load(path):
+    """Opens a snapshot for reading
+
+    Parameters
+    ----------
+    path : str
+
+    Returns
+    -------
+    Snapshot
+    """
+    return Snapshot(path)
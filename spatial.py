@@ -0,0 +1,306 @@
+import math
+
+
+class SpatialGrid(object):
+    """A uniform grid that buckets ships by position for range queries
+
+    Ships are filed into square cells `cell_size` wide, so a range query only
+    has to look at the cells the range overlaps instead of every ship. Choosing
+    a cell size close to typical weapon ranges keeps queries to a handful of
+    cells.
+    """
+    def __init__(self, cell_size, ships=()):
+        """Create a grid, optionally filled with ships
+
+        Parameters
+        ----------
+        cell_size : int or float
+            width of each square cell
+        ships : iterable of Ship
+            optional, ships to insert straight away
+        """
+        if cell_size <= 0:
+            raise ValueError('Cell size must be positive, not {}'
+                             .format(cell_size))
+
+        self.cell_size = float(cell_size)
+        self._cells = {}
+        self._ship_cells = {}
+        # Conservative extent of every cell ever occupied, bounding searches
+        self._bounds = None
+
+        for ship in ships:
+            self.insert(ship)
+
+    def _cell_of(self, position):
+        return (int(math.floor(position[0] / self.cell_size)),
+                int(math.floor(position[1] / self.cell_size)))
+
+    def insert(self, ship):
+        """Add a ship to the grid at its current position
+
+        Parameters
+        ----------
+        ship : Ship
+        """
+        if ship in self._ship_cells:
+            raise ValueError('{} is already in the grid'.format(ship.name))
+
+        self._file(ship, self._cell_of(ship.position))
+
+    def _file(self, ship, cell):
+        self._cells.setdefault(cell, []).append(ship)
+        self._ship_cells[ship] = cell
+
+        if self._bounds is None:
+            self._bounds = cell + cell
+        else:
+            min_x, min_y, max_x, max_y = self._bounds
+            self._bounds = (min(min_x, cell[0]), min(min_y, cell[1]),
+                            max(max_x, cell[0]), max(max_y, cell[1]))
+
+    def remove(self, ship):
+        """Take a ship out of the grid
+
+        Parameters
+        ----------
+        ship : Ship
+        """
+        cell = self._ship_cells.pop(ship)
+        bucket = self._cells[cell]
+        bucket.remove(ship)
+        if not bucket:
+            del self._cells[cell]
+
+    def update(self, ship):
+        """Re-file a ship after it moved, touching only its old and new cells
+
+        Parameters
+        ----------
+        ship : Ship
+        """
+        cell = self._cell_of(ship.position)
+        if self._ship_cells.get(ship) == cell:
+            return
+
+        if ship in self._ship_cells:
+            self.remove(ship)
+        self._file(ship, cell)
+
+    def update_many(self, ships):
+        """Re-file every ship in `ships`, such as those returned by a move
+
+        Parameters
+        ----------
+        ships : iterable of Ship
+        """
+        for ship in ships:
+            self.update(ship)
+
+    def __len__(self):
+        return len(self._ship_cells)
+
+    def __contains__(self, ship):
+        return ship in self._ship_cells
+
+    def query_radius(self, position, radius, predicate=None):
+        """All ships within `radius` of `position`
+
+        Parameters
+        ----------
+        position : Vector
+        radius : int or float
+        predicate : callable
+            optional, only ships for which `predicate(ship)` is true are
+            returned
+
+        Returns
+        -------
+        list of Ship
+        """
+        px, py = position[0], position[1]
+        limit = radius * radius
+        min_x, min_y = self._cell_of((px - radius, py - radius))
+        max_x, max_y = self._cell_of((px + radius, py + radius))
+
+        found = []
+        for cx in range(min_x, max_x + 1):
+            for cy in range(min_y, max_y + 1):
+                for ship in self._cells.get((cx, cy), ()):
+                    dx = ship.position[0] - px
+                    dy = ship.position[1] - py
+                    if dx * dx + dy * dy > limit:
+                        continue
+                    if predicate is None or predicate(ship):
+                        found.append(ship)
+        return found
+
+    def neighbourhoods(self, ships, radius):
+        """Groups ships by cell, each with every ship that could be in range
+
+        For answering range queries around many ships at once: the cells
+        around each group are only gathered once, however many ships share
+        the cell.
+
+        Parameters
+        ----------
+        ships : iterable of Ship
+            ships in the grid
+        radius : int or float
+
+        Returns
+        -------
+        generator of tuple of (list of Ship, list of Ship)
+            ships sharing a cell, and every ship in the cells within
+            `radius` of it. Candidates still need their distance checked.
+        """
+        groups = {}
+        order = []
+        for ship in ships:
+            cell = self._ship_cells[ship]
+            group = groups.get(cell)
+            if group is None:
+                group = groups[cell] = []
+                order.append(cell)
+            group.append(ship)
+
+        for cell in order:
+            yield groups[cell], self.around(cell, radius)
+
+    def cell(self, ship):
+        """The cell a ship is filed in
+
+        Parameters
+        ----------
+        ship : Ship
+            a ship in the grid
+
+        Returns
+        -------
+        tuple of (int, int)
+        """
+        return self._ship_cells[ship]
+
+    def in_cell(self, cell):
+        """Every ship filed in a cell
+
+        Parameters
+        ----------
+        cell : tuple of (int, int)
+
+        Returns
+        -------
+        list of Ship
+        """
+        return list(self._cells.get(cell, ()))
+
+    def around(self, cell, radius):
+        """Every ship in the cells within `radius` of anywhere in a cell
+
+        Parameters
+        ----------
+        cell : tuple of (int, int)
+        radius : int or float
+
+        Returns
+        -------
+        list of Ship
+            candidates still need their distance checked
+        """
+        reach = int(math.ceil(radius / self.cell_size))
+        cells = self._cells
+        cx, cy = cell
+        candidates = []
+        for x in range(cx - reach, cx + reach + 1):
+            for y in range(cy - reach, cy + reach + 1):
+                bucket = cells.get((x, y))
+                if bucket:
+                    candidates.extend(bucket)
+        return candidates
+
+    def _ring(self, center, radius):
+        """Cells at Chebyshev distance `radius` from `center`"""
+        cx, cy = center
+        if radius == 0:
+            yield center
+            return
+        for dx in range(-radius, radius + 1):
+            yield (cx + dx, cy - radius)
+            yield (cx + dx, cy + radius)
+        for dy in range(-radius + 1, radius):
+            yield (cx - radius, cy + dy)
+            yield (cx + radius, cy + dy)
+
+    def nearest(self, position, max_radius=None, predicate=None):
+        """The closest ship to `position`, searching outwards ring by ring
+
+        Parameters
+        ----------
+        position : Vector
+        max_radius : int or float
+            optional, ignore ships further away than this
+        predicate : callable
+            optional, only consider ships for which `predicate(ship)` is true
+
+        Returns
+        -------
+        Ship or None
+        """
+        if not self._cells:
+            return None
+
+        px, py = position[0], position[1]
+        center = self._cell_of(position)
+        min_x, min_y, max_x, max_y = self._bounds
+        span = max(center[0] - min_x, max_x - center[0],
+                   center[1] - min_y, max_y - center[1], 0)
+        if max_radius is not None:
+            span = min(span, int(math.ceil(max_radius / self.cell_size)) + 1)
+            limit = max_radius * max_radius
+        else:
+            limit = float('inf')
+
+        best, best_distance = None, limit
+        for ring in range(span + 1):
+            for cell in self._ring(center, ring):
+                for ship in self._cells.get(cell, ()):
+                    dx = ship.position[0] - px
+                    dy = ship.position[1] - py
+                    distance = dx * dx + dy * dy
+                    if distance > best_distance or (
+                            best is not None and distance == best_distance):
+                        continue
+                    if predicate is None or predicate(ship):
+                        best, best_distance = ship, distance
+            # Anything in an unvisited ring is at least this far away
+            reach = ring * self.cell_size
+            if best is not None and best_distance <= reach * reach:
+                break
+
+        return best
+
+    def enemies_in_range(self, ship):
+        """All active enemy ships within `ship.range`
+
+        Parameters
+        ----------
+        ship : Ship
+
+        Returns
+        -------
+        list of Ship
+        """
+        return self.query_radius(ship.position, ship.range, ship.is_enemy)
+
+    def nearest_enemy(self, ship):
+        """The closest active enemy ship within `ship.range`
+
+        Parameters
+        ----------
+        ship : Ship
+
+        Returns
+        -------
+        Ship or None
+        """
+        return self.nearest(ship.position, ship.range, ship.is_enemy)
@@ -1,18 +1,174 @@
+from planet import ORBITS
+
+# Free-orbit bitmap with every orbit free; bit n is set while orbit n is free
+ALL_FREE = (1 << ORBITS) - 1
+# Lowest free orbit for every possible bitmap, None when all are taken
+FIRST_FREE = tuple(
+    next((orbit for orbit in range(ORBITS) if free >> orbit & 1), None)
+    for free in range(ALL_FREE + 1))
+# Number of orbits set in every possible bitmap
+ORBIT_COUNT = tuple(bin(orbits).count('1') for orbits in range(ALL_FREE + 1))
+
+
 class System(object):
     def __init__(self, name, position):
+        # One slot per orbit, None where there is no planet
+        self.orbits = [None] * ORBITS
+        self._free = ALL_FREE
+
         self.name = name
         self.position = position
 
-        self.planets = []
+    @property
+    def name(self):
+        return self._name
+
+    @name.setter
+    def name(self, name):
+        self._name = name
+        # Planets show the system's name, so their cached labels are stale
+        for planet in self.orbits:
+            if planet is not None:
+                planet._label = None
+
+    def __str__(self):
+        return self._name
+
+    @property
+    def planets(self):
+        """Planets in the system, innermost first
+
+        Returns
+        -------
+        list of Planet
+        """
+        return [planet for planet in self.orbits if planet is not None]
+
+    def first_free_orbit(self):
+        """The innermost orbit without a planet
+
+        Returns
+        -------
+        int
+            or None if every orbit is taken
+        """
+        return FIRST_FREE[self._free]
+
+    def is_free(self, orbit):
+        """Whether an orbit has no planet
+
+        Parameters
+        ----------
+        orbit : int
+
+        Returns
+        -------
+        bool
+        """
+        return bool(self._free >> orbit & 1)
+
+    def add_planet(self, planet, orbit=None):
+        """Put a planet in orbit, taking it out of any system it was in
 
-    def add_planet(self, planet, orbit=None)
-        orbit = orbit or len(self.planets)
+        Parameters
+        ----------
+        planet : Planet
+        orbit : int
+            optional, the innermost free orbit is used when omitted
+
+        Raises
+        ------
+        ValueError
+            if the orbit is out of range or taken, or no orbit is free
+
+        Returns
+        -------
+        int
+            the orbit the planet was put in
+        """
+        if orbit is None:
+            orbit = FIRST_FREE[self._free]
+            if orbit is None:
+                raise ValueError('There are no free orbits in {}'
+                                 .format(self.name))
 
         if orbit < 0:
             raise ValueError('Cannot add a planet to a negative orbit')
-        if orbit > 4:
-            raise ValueError('Cannot add a planet to an orbit > 4')
+        if orbit >= ORBITS:
+            raise ValueError('Cannot add a planet to an orbit > {}'
+                             .format(ORBITS - 1))
 
-        if self.planets[orbit]:
+        if not self._free >> orbit & 1:
             raise ValueError('A planet already exists at orbital {} in {}'
-                             .format(orbit, self))
+                             .format(orbit, self.name))
+
+        if planet.system is not None:
+            planet.system.remove_planet(planet)
+
+        self.orbits[orbit] = planet
+        self._free &= ~(1 << orbit)
+        planet.system = self
+        planet.orbit = orbit
+        return orbit
+
+    def remove_planet(self, planet):
+        """Take a planet out of orbit
+
+        Parameters
+        ----------
+        planet : Planet
+
+        Raises
+        ------
+        ValueError
+            if the planet is not in this system
+        """
+        orbit = planet.orbit
+        if planet.system is not self or orbit is None or \
+                self.orbits[orbit] is not planet:
+            raise ValueError('{} has no such planet'.format(self.name))
+
+        self.orbits[orbit] = None
+        self._free |= 1 << orbit
+        planet.system = None
+        planet.orbit = None
+
+    def populate(self, occupied, planets):
+        """Fills several empty orbits at once, as a generator would
+
+        Unlike `add_planet` this does no per-planet checking: the whole
+        batch is checked against the free-orbit bitmap once.
+
+        Parameters
+        ----------
+        occupied : int
+            bitmap of the orbits to fill, bit n standing for orbit n
+        planets : iterable of Planet
+            new planets without a system, one per set bit, innermost first
+
+        Raises
+        ------
+        ValueError
+            if any of the orbits is out of range or already taken, or there
+            is not exactly one planet per orbit. Nothing is changed then.
+        """
+        if not 0 <= occupied <= ALL_FREE:
+            raise ValueError('Cannot add planets to orbits > {}'
+                             .format(ORBITS - 1))
+        if occupied & ~self._free:
+            raise ValueError('Some of those orbits are already taken in {}'
+                             .format(self.name))
+        planets = list(planets)
+        if len(planets) != ORBIT_COUNT[occupied]:
+            raise ValueError('{} planets cannot fill {} orbits'
+                             .format(len(planets), ORBIT_COUNT[occupied]))
+
+        orbits = self.orbits
+        planets = iter(planets)
+        for orbit in range(ORBITS):
+            if occupied >> orbit & 1:
+                planet = next(planets)
+                orbits[orbit] = planet
+                planet.system = self
+                planet.orbit = orbit
+        self._free &= ~occupied
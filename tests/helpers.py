@@ -0,0 +1,32 @@
+"""Fixtures shared between test modules"""
+from ship import Ship
+
+
+def make_ship(name='Ship', position=None, destination=None, empire=None,
+              hull=100, shield=50, speed=5, range=10, damage=25):
+    """A ship with test stats, optionally placed, under way and owned
+
+    Parameters
+    ----------
+    name : str
+        optional
+    position : Vector
+        optional, the origin when omitted
+    destination : Vector
+        optional, the ship is left idle when omitted
+    empire : Empire
+        optional
+    hull, shield, speed, range, damage : int or float
+        optional
+
+    Returns
+    -------
+    Ship
+    """
+    ship = Ship(name, hull, shield, speed, range, damage)
+    if position is not None:
+        ship._move_to(position)
+    if destination is not None:
+        ship.set_course(destination)
+    ship.empire = empire
+    return ship
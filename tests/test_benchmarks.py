@@ -0,0 +1,62 @@
+import os
+from unittest import TestCase
+from mock import patch
+
+from benchmarks import memory, run
+from ship import Ship
+
+
+def results(**seconds):
+    return {'results': dict((name, {'seconds': value})
+                            for name, value in seconds.items())}
+
+
+class TestCompare(TestCase):
+    def test_compare__regression(self):
+        """Should flag benchmarks slower than the threshold allows"""
+        regressions = run.compare(results(norm=1.3, add=1.1),
+                                  results(norm=1.0, add=1.0), 0.2)
+
+        self.assertEqual(regressions, [('norm', 1.0, 1.3)])
+
+    def test_compare__new_benchmark(self):
+        """Should ignore benchmarks missing from the baseline"""
+        self.assertEqual(run.compare(results(norm=5.0), results(), 0.2), [])
+
+
+class TestRun(TestCase):
+    def test_run__filter(self):
+        """Should only time matching benchmarks, within the size limit"""
+        current = run.run(pattern=r'^(vector\.norm$|ship\.take_damage)',
+                          max_size=1000, repeats=1)
+
+        self.assertEqual(sorted(current['results']),
+                         ['ship.take_damage[1000]', 'vector.norm'])
+        self.assertEqual(current['results']['ship.take_damage[1000]']['size'],
+                         1000)
+
+
+class TestMain(TestCase):
+    def test_main__no_baseline(self):
+        """Should fail before timing anything when there is no baseline"""
+        with patch('benchmarks.run.run') as run_cases:
+            status = run.main(['--baseline', '/nonexistent/baseline.json'])
+
+        self.assertEqual(status, 2)
+        self.assertFalse(run_cases.called)
+
+    def test_main__no_baseline_wanted(self):
+        """Should only time when told not to compare"""
+        with patch('benchmarks.run.run', return_value=results(norm=1.0)):
+            status = run.main(['--baseline', '/nonexistent/baseline.json',
+                               '--no-baseline',
+                               '--output', os.devnull])
+
+        self.assertEqual(status, 0)
+
+
+class TestMemory(TestCase):
+    def test_measure(self):
+        """Should find slotted ships smaller than dict-backed ones"""
+        self.assertLess(memory.measure(Ship, 100),
+                        memory.measure(memory.DictShip, 100))
@@ -0,0 +1,156 @@
+from unittest import TestCase
+
+from colony import BUILD, Colony, FARM, RESEARCH
+from empire import Empire
+
+
+class TestColony(TestCase):
+    def setUp(self):
+        self.empire = Empire('Federation')
+        self.colony = Colony(None, self.empire)
+
+    def test_construct__registers(self):
+        """Should join the empire's colonies"""
+        self.assertEqual(self.empire.colonies, [self.colony])
+        self.assertIs(self.colony.empire, self.empire)
+
+    def test_add_colonist__job(self):
+        """Should add the colonist's output to the matching total"""
+        self.colony.add_colonist(FARM)
+        self.colony.add_colonist(FARM)
+        self.colony.add_colonist(RESEARCH)
+
+        self.assertEqual(self.colony.food_output, 2)
+        self.assertEqual(self.colony.production_output, 0)
+        self.assertEqual(self.colony.science_output, 1)
+
+    def test_add_colonist__least_staffed(self):
+        """Should default to whichever job has the least colonists"""
+        self.colony.add_colonist(FARM)
+        self.colony.add_colonist(RESEARCH)
+
+        self.assertEqual(self.colony.add_colonist(), BUILD)
+
+    def test_add_colonist__unknown_job(self):
+        """Should reject jobs that do not exist"""
+        with self.assertRaises(ValueError):
+            self.colony.add_colonist('juggling')
+
+    def test_add_colonists__job(self):
+        """Should add every colonist to the given job"""
+        self.colony.add_colonists(5, RESEARCH)
+
+        self.assertEqual(self.colony.science_output, 5)
+        self.assertEqual(self.colony.population, 5)
+
+    def test_add_colonists__matches_sequential(self):
+        """Should spread colonists as repeated add_colonist calls would"""
+        for start in ((0, 0, 0), (4, 0, 1), (2, 7, 2), (9, 9, 3)):
+            for count in range(12):
+                bulk = Colony(None, None)
+                serial = Colony(None, None)
+                for colony in (bulk, serial):
+                    for job, size in zip((FARM, BUILD, RESEARCH), start):
+                        colony.add_colonists(size, job)
+
+                bulk.add_colonists(count)
+                for _ in range(count):
+                    serial.add_colonist()
+
+                self.assertEqual(bulk._job_counts, serial._job_counts)
+
+    def test_move_colonists(self):
+        """Should move output from the old job to the new one"""
+        self.colony.add_colonists(3, FARM)
+        self.colony.move_colonists(2, FARM, BUILD)
+
+        self.assertEqual(self.colony.food_output, 1)
+        self.assertEqual(self.colony.production_output, 2)
+        self.assertEqual(self.colony.job_count(BUILD), 2)
+        self.assertEqual(self.empire.production_output, 2)
+
+    def test_move_colonists__too_many(self):
+        """Should refuse to move more colonists than work the job"""
+        self.colony.add_colonists(1, FARM)
+
+        with self.assertRaises(ValueError):
+            self.colony.move_colonists(2, FARM, BUILD)
+
+    def test_move_colonists__unknown_job(self):
+        """Should reject jobs that do not exist"""
+        self.colony.add_colonists(1, FARM)
+
+        with self.assertRaises(ValueError):
+            self.colony.move_colonists(1, 'juggling', BUILD)
+        with self.assertRaises(ValueError):
+            self.colony.move_colonists(1, FARM, 'juggling')
+        self.assertEqual(self.colony.job_count(FARM), 1)
+
+    def test_colonists(self):
+        """Should list a colonist per head, grouped by job"""
+        self.colony.add_colonists(2, RESEARCH)
+        self.colony.add_colonist(FARM)
+
+        self.assertEqual([colonist.job for colonist in self.colony.colonists],
+                         [FARM, RESEARCH, RESEARCH])
+
+    def test_job_change(self):
+        """Should move output from the old job to the new one"""
+        self.colony.add_colonist(FARM)
+        colonist = self.colony.colonists[0]
+        colonist.job = BUILD
+
+        self.assertEqual(colonist.job, BUILD)
+        self.assertEqual(self.colony.food_output, 0)
+        self.assertEqual(self.colony.production_output, 1)
+        self.assertEqual(self.colony.job_count(BUILD), 1)
+        self.assertEqual(self.empire.production_output, 1)
+
+    def test_rebalance(self):
+        """Should spread colonists evenly, remainder to the earliest jobs"""
+        self.colony.add_colonists(8, RESEARCH)
+        self.colony.rebalance()
+
+        self.assertEqual([self.colony.job_count(job)
+                          for job in (FARM, BUILD, RESEARCH)], [3, 3, 2])
+        self.assertEqual(self.empire.food_output, 3)
+        self.assertEqual(self.empire.science_output, 2)
+
+
+class TestEmpireOutputs(TestCase):
+    def setUp(self):
+        self.empire = Empire('Federation')
+        self.colonies = [Colony(None, self.empire) for _ in range(3)]
+        for colony in self.colonies:
+            colony.add_colonist(FARM)
+            colony.add_colonist(RESEARCH)
+
+    def test_totals(self):
+        """Should sum output across colonies"""
+        self.assertEqual(self.empire.food_output, 3)
+        self.assertEqual(self.empire.production_output, 0)
+        self.assertEqual(self.empire.science_output, 3)
+
+    def test_remove_colony(self):
+        """Should drop a lost colony's output"""
+        self.empire.remove_colony(self.colonies[0])
+
+        self.assertEqual(self.empire.food_output, 2)
+        self.assertIsNone(self.colonies[0].empire)
+
+    def test_add_colony__transfer(self):
+        """Should move a captured colony's output between empires"""
+        rival = Empire('Klingon')
+        rival.add_colony(self.colonies[0])
+
+        self.assertEqual(rival.food_output, 1)
+        self.assertEqual(self.empire.food_output, 2)
+
+    def test_invalidate_outputs(self):
+        """Should recount totals after the colonies list is edited directly"""
+        self.empire.colonies.pop()
+        self.empire.invalidate_outputs()
+
+        self.assertEqual(self.empire.science_output, 2)
+        self.colonies[0].add_colonist(RESEARCH)
+        self.assertEqual(self.empire.science_output, 3)
@@ -0,0 +1,132 @@
+import random
+from unittest import TestCase
+
+from combat import attack_phase, collect_attacks, resolve
+from helpers import make_ship
+from spatial import SpatialGrid
+
+
+class TestResolve(TestCase):
+    def setUp(self):
+        self.attacker = make_ship('Attacker')
+        self.target = make_ship('Target')
+
+    def test_resolve__shield_absorb(self):
+        """Should only damage shields when they hold"""
+        report = resolve([(self.attacker, self.target, 20),
+                          (self.attacker, self.target, 20)])
+
+        self.assertEqual(self.target.shield, 10)
+        self.assertEqual(self.target.hull, 100)
+        self.assertEqual(report.damage[self.target], 40)
+        self.assertEqual(report.shield_damage[self.target], 40)
+        self.assertNotIn(self.target, report.hull_damage)
+
+    def test_resolve__hull_damage(self):
+        """Should carry damage past the shield into the hull"""
+        report = resolve([(self.attacker, self.target, 40),
+                          (self.attacker, self.target, 40)])
+
+        self.assertEqual(self.target.shield, 0)
+        self.assertEqual(self.target.hull, 70)
+        self.assertEqual(report.hull_damage[self.target], 30)
+        self.assertEqual(report.deaths, [])
+
+    def test_resolve__death(self):
+        """Should kill the target and report overkill and the killer"""
+        finisher = make_ship('Finisher')
+        report = resolve([(self.attacker, self.target, 100),
+                          (finisher, self.target, 70)])
+
+        self.assertFalse(self.target._active)
+        self.assertEqual(self.target.hull, 0)
+        self.assertEqual(report.overkill[self.target], 20)
+        self.assertEqual(report.deaths, [self.target])
+        self.assertIs(report.killed_by[self.target], finisher)
+
+    def test_resolve__death_order(self):
+        """Should list deaths in the order the killing blows landed"""
+        other = make_ship('Other')
+        report = resolve([(self.attacker, self.target, 100),
+                          (self.attacker, other, 150),
+                          (self.attacker, self.target, 50)])
+
+        self.assertEqual(report.deaths, [other, self.target])
+
+    def test_resolve__already_dead(self):
+        """Should not report a ship that was already destroyed as a death"""
+        self.target.take_damage(150)
+        report = resolve([(self.attacker, self.target, 10)])
+
+        self.assertEqual(report.deaths, [])
+        self.assertEqual(report.overkill[self.target], 10)
+
+    def test_resolve__negative(self):
+        """Should refuse negative damage"""
+        with self.assertRaises(ValueError):
+            resolve([(self.attacker, self.target, -5)])
+
+    def test_resolve__matches_sequential(self):
+        """Should leave ships exactly as sequential take_damage calls do"""
+        rng = random.Random(42)
+        batched = [make_ship(str(i), hull=rng.randint(1, 80),
+                             shield=rng.randint(0, 60))
+                   for i in range(20)]
+        serial = [make_ship(s.name, hull=s.max_hull, shield=s.max_shield)
+                  for s in batched]
+        hits = [(rng.randrange(20), rng.randint(0, 40)) for _ in range(200)]
+
+        resolve([(self.attacker, batched[i], damage) for i, damage in hits])
+        for i, damage in hits:
+            serial[i].take_damage(damage)
+
+        for a, b in zip(batched, serial):
+            self.assertEqual((a.shield, a.hull, a._active),
+                             (b.shield, b.hull, b._active))
+
+
+    def test_resolve__matches_sequential_floats(self):
+        """Should match sequential take_damage calls to the bit for floats"""
+        rng = random.Random(7)
+        for _ in range(300):
+            hull, shield = rng.uniform(1, 80), rng.uniform(0, 60)
+            batched = make_ship('Batched', hull=hull, shield=shield)
+            serial = make_ship('Serial', hull=hull, shield=shield)
+            hits = [rng.uniform(0, 30) for _ in range(rng.randint(1, 8))]
+
+            resolve([(self.attacker, batched, damage) for damage in hits])
+            for damage in hits:
+                serial.take_damage(damage)
+
+            self.assertEqual((batched.shield, batched.hull, batched._active),
+                             (serial.shield, serial.hull, serial._active))
+
+
+class TestAttackPhase(TestCase):
+    def setUp(self):
+        self.first = make_ship('First', hull=10, shield=0, damage=30)
+        self.second = make_ship('Second', hull=10, shield=0, damage=30)
+        self.first.empire, self.second.empire = 'Federation', 'Klingon'
+        self.second._move_to(3, 4)
+        self.index = SpatialGrid(10, [self.first, self.second])
+
+    def test_collect_attacks(self):
+        """Should pair each ship with its target without applying damage"""
+        events = collect_attacks([self.first, self.second], self.index)
+
+        self.assertEqual(events, [(self.first, self.second, 30),
+                                  (self.second, self.first, 30)])
+        self.assertTrue(self.first._active)
+
+    def test_attack_phase__simultaneous(self):
+        """Should let ships destroyed this turn fire back"""
+        report = attack_phase([self.first, self.second], self.index)
+
+        self.assertEqual(report.deaths, [self.second, self.first])
+
+    def test_attack_phase__retargeted(self):
+        """Should report the ships whose target changed"""
+        self.second.set_target(self.first)
+        report = attack_phase([self.first, self.second], self.index)
+
+        self.assertEqual(report.retargeted, [self.first])
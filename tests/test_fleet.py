@@ -0,0 +1,185 @@
+from unittest import TestCase
+
+from combat import attack_phase
+from empire import Empire
+from fleet import Fleet
+from helpers import make_ship
+from spatial import SpatialGrid
+from vector import Vector
+
+
+class TestFleet(TestCase):
+    def setUp(self):
+        self.empire = Empire('Federation')
+        home = Vector(10, 10)
+        self.ships = [make_ship('Lead', home, Vector(100, 10), speed=8,
+                                range=30, damage=10),
+                      make_ship('Slow', home, speed=3, range=25, damage=20),
+                      make_ship('Short', home, speed=6, range=12, damage=5)]
+        self.sut = Fleet('Alpha', self.ships, self.empire)
+
+    def test_init(self):
+        """Should join the empire and pool the ships' stats"""
+        self.assertEqual(self.empire.fleets, [self.sut])
+        self.assertIs(self.sut.empire, self.empire)
+        self.assertEqual(self.sut.speed, 3)
+        self.assertEqual(self.sut.range, 12)
+        self.assertEqual(self.sut.damage, 35)
+        self.assertEqual((self.sut.shield, self.sut.hull), (150, 300))
+        self.assertEqual(tuple(self.sut.position), (10, 10))
+        self.assertEqual(tuple(self.sut._destination), (100, 10))
+        self.assertEqual(len(self.sut), 3)
+        self.assertTrue(all(ship.empire is self.empire
+                            for ship in self.ships))
+
+    def test_take_damage__shield(self):
+        """Should soak damage with the pooled shield first"""
+        self.sut.take_damage(120)
+
+        self.assertEqual((self.sut.shield, self.sut.hull), (30, 300))
+        self.assertEqual([ship.hull for ship in self.ships], [100] * 3)
+
+    def test_take_damage__hull(self):
+        """Should wear down the front ships' hulls one at a time"""
+        self.sut.take_damage(150 + 130)
+
+        self.assertFalse(self.ships[0]._active)
+        self.assertEqual(self.ships[1].hull, 70)
+        self.assertEqual(self.sut.hull, 170)
+        self.assertEqual(list(self.sut), self.ships[1:])
+        self.assertEqual(self.sut.damage, 25)
+        self.assertEqual(self.sut.range, 12)
+        self.assertEqual(self.sut.shield, 0)
+
+    def test_take_damage__destroyed(self):
+        """Should stop acting once every ship is destroyed"""
+        self.sut.take_damage(1000)
+
+        self.assertFalse(self.sut._active)
+        self.assertEqual(len(self.sut), 0)
+        self.assertTrue(all(not ship._active for ship in self.ships))
+
+    def test_resolve(self):
+        """Should take combined fire from a combat phase as a group"""
+        enemy = make_ship('Enemy', Vector(10, 10), damage=200)
+        enemy.empire = Empire('Klingon')
+        enemy.set_target(self.sut)
+        self.sut.set_target(enemy)
+
+        report = attack_phase([self.sut, enemy])
+
+        self.assertEqual(report.damage, {self.sut: 200, enemy: 35})
+        self.assertEqual(self.sut.hull, 250)
+        self.assertEqual(self.ships[0].hull, 50)
+        self.assertEqual(enemy.shield, 15)
+
+    def test_resolve__losses(self):
+        """Should report the ships lost inside the fleet as deaths"""
+        enemy = make_ship('Enemy', Vector(10, 10), damage=260)
+        enemy.empire = Empire('Klingon')
+        enemy.set_target(self.sut)
+
+        report = attack_phase([self.sut, enemy])
+
+        self.assertEqual(report.deaths, [self.ships[0]])
+        self.assertEqual(self.sut._casualties(), [])
+
+        enemy.damage = 1000
+        report = attack_phase([self.sut, enemy])
+
+        self.assertEqual(report.deaths,
+                         [self.sut, self.ships[1], self.ships[2]])
+
+    def test_hull__repair(self):
+        """Should repair surviving ships front first, up to their maximum"""
+        self.sut.take_damage(150 + 130)
+        self.sut.hull += 20
+
+        self.assertEqual(self.sut.hull, 190)
+        self.assertEqual([ship.hull for ship in self.ships], [0, 90, 100])
+        self.assertFalse(self.ships[0]._active)
+
+        with self.assertRaises(ValueError):
+            self.sut.hull += 20
+        self.assertEqual(self.sut.hull, 190)
+
+    def test_set_course(self):
+        """Should take a vector or a pair of components"""
+        self.sut.set_course(40, 60)
+        self.assertEqual(tuple(self.sut._destination), (40, 60))
+
+        self.sut.set_course(Vector(5, 6))
+        self.assertEqual(tuple(self.sut._destination), (5, 6))
+
+    def test_acquire_target(self):
+        """Should target enemies through a spatial index"""
+        enemy = make_ship('Enemy', Vector(15, 10), empire=Empire('Klingon'))
+        index = SpatialGrid(10, [self.sut, enemy])
+
+        self.assertIs(self.sut._acquire_target(index), enemy)
+        self.assertIs(enemy._acquire_target(index), self.sut)
+
+    def test_expand(self):
+        """Should hand the fleet's position, course and shields to its ships"""
+        self.sut._position = Vector(40, 10)
+        self.sut.take_damage(75)
+        ships = self.sut.expand()
+
+        self.assertEqual(ships, self.ships)
+        self.assertFalse(self.sut.grouped)
+        self.assertFalse(self.sut._active)
+        for ship in ships:
+            self.assertEqual(tuple(ship.position), (40, 10))
+            self.assertEqual(tuple(ship._destination), (100, 10))
+            self.assertEqual(ship.shield, 25)
+
+    def test_expand__allies(self):
+        """Should leave the expanded ships on the same side"""
+        ships = self.sut.expand()
+
+        self.assertFalse(ships[0].is_enemy(ships[1]))
+        self.assertFalse(ships[1].is_enemy(self.sut))
+
+    def test_regroup(self):
+        """Should pool the ships again after fighting individually"""
+        self.sut.expand()
+        self.ships[0]._die()
+        self.ships[1].take_damage(60)
+        self.sut.regroup()
+
+        self.assertTrue(self.sut._active)
+        self.assertEqual(list(self.sut), self.ships[1:])
+        self.assertEqual((self.sut.shield, self.sut.hull), (50, 190))
+        self.assertEqual(self.sut.speed, 3)
+
+    def test_split(self):
+        """Should detach ships into a new grouped fleet on the same course"""
+        self.sut._position = Vector(20, 10)
+        other = self.sut.split([self.ships[1]], 'Beta')
+
+        self.assertEqual(self.empire.fleets, [self.sut, other])
+        self.assertEqual(list(other), [self.ships[1]])
+        self.assertEqual(list(self.sut), [self.ships[0], self.ships[2]])
+        self.assertTrue(self.sut.grouped and other.grouped)
+        self.assertEqual(self.sut.speed, 6)
+        self.assertEqual(tuple(other.position), (20, 10))
+        self.assertEqual(tuple(other._destination), (100, 10))
+
+    def test_split__stranger(self):
+        """Should refuse to split off a ship from another fleet"""
+        with self.assertRaises(ValueError):
+            self.sut.split([make_ship('Stranger')], 'Beta')
+        self.assertTrue(self.sut.grouped)
+
+
+class TestEmpireFleets(TestCase):
+    def test_add_fleet__transfer(self):
+        """Should take a fleet away from its previous empire"""
+        first, second = Empire('Federation'), Empire('Klingon')
+        fleet = Fleet('Alpha', [make_ship('Lead')], first)
+        second.add_fleet(fleet)
+
+        self.assertEqual(first.fleets, [])
+        self.assertEqual(second.fleets, [fleet])
+        self.assertIs(fleet.empire, second)
+        self.assertIs(fleet.ships[0].empire, second)
@@ -0,0 +1,113 @@
+import os
+import shutil
+import tempfile
+import types
+from unittest import TestCase
+
+import snapshot
+from galaxy import GalaxyGenerator, chunk_seed
+from planet import ORBITS
+from vector import Vector
+
+
+def describe(systems):
+    """Everything generated about some systems, as plain values"""
+    return [(system.name, tuple(system.position),
+             [(planet.orbit, planet.size, planet.biome, planet.minerals,
+               planet.special) for planet in system.planets])
+            for system in systems]
+
+
+class TestGalaxyGenerator(TestCase):
+    def setUp(self):
+        self.sut = GalaxyGenerator(seed=42, chunk_size=100)
+
+    def test_chunk_seed(self):
+        """Should depend on the seed and both chunk coordinates"""
+        seeds = set([chunk_seed(1, 0, 0), chunk_seed(2, 0, 0),
+                     chunk_seed(1, 1, 0), chunk_seed(1, 0, 1)])
+
+        self.assertEqual(len(seeds), 4)
+        self.assertEqual(chunk_seed(1, -3, 7), chunk_seed(1, -3, 7))
+
+    def test_chunk__reproducible(self):
+        """Should regenerate a chunk identically, in any order"""
+        first = describe(self.sut.chunk(3, -2))
+        self.sut.chunk(0, 0)
+        again = describe(GalaxyGenerator(seed=42, chunk_size=100)
+                         .chunk(3, -2))
+
+        self.assertEqual(first, again)
+        self.assertNotEqual(first, describe(self.sut.chunk(2, -2)))
+
+    def test_chunk__seed(self):
+        """Should generate a different galaxy from a different seed"""
+        other = GalaxyGenerator(seed=43, chunk_size=100)
+
+        self.assertNotEqual(describe(self.sut.chunk(0, 0)),
+                            describe(other.chunk(0, 0)))
+
+    def test_chunk__contents(self):
+        """Should place systems inside the chunk with planets in orbit"""
+        systems = self.sut.chunk(1, 2)
+
+        self.assertTrue(4 <= len(systems) <= 12)
+        for system in systems:
+            self.assertEqual(self.sut.chunk_of(system.position), (1, 2))
+            orbits = [planet.orbit for planet in system.planets]
+            self.assertEqual(orbits, sorted(set(orbits)))
+            for planet in system.planets:
+                self.assertIs(planet.system, system)
+                self.assertTrue(0 <= planet.orbit < ORBITS)
+
+    def test_stream(self):
+        """Should lazily walk a block of chunks row by row"""
+        stream = self.sut.stream(2, 2)
+
+        self.assertIsInstance(stream, types.GeneratorType)
+        expected = (self.sut.chunk(0, 0) + self.sut.chunk(1, 0) +
+                    self.sut.chunk(0, 1) + self.sut.chunk(1, 1))
+        self.assertEqual(describe(stream), describe(expected))
+
+    def test_region(self):
+        """Should yield only the systems inside the rectangle"""
+        systems = list(self.sut.region(50, 50, 250, 150))
+        everything = list(self.sut.stream(3, 2))
+
+        inside = [system for system in everything
+                  if 50 <= system.position[0] <= 250 and
+                  50 <= system.position[1] <= 150]
+        self.assertEqual(describe(systems), describe(inside))
+
+    def test_generate(self):
+        """Should yield exactly the requested number of systems"""
+        systems = list(self.sut.generate(500))
+
+        self.assertEqual(len(systems), 500)
+        self.assertEqual(describe(systems),
+                         describe(self.sut.generate(500)))
+
+    def test_generate__no_systems(self):
+        """Should refuse to look for systems that can never appear"""
+        sut = GalaxyGenerator(seed=1, min_systems=0, max_systems=0)
+
+        with self.assertRaises(ValueError):
+            list(sut.generate(1))
+
+    def test_chunk_of(self):
+        """Should floor negative coordinates into the right chunk"""
+        self.assertEqual(self.sut.chunk_of(Vector(-1, 250)), (-1, 2))
+
+    def test_snapshot(self):
+        """Should generate systems that round-trip through a snapshot"""
+        systems = self.sut.chunk(0, 0)
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'galaxy.snap')
+            snapshot.save(path, [], systems, [])
+            with snapshot.load(path) as loaded:
+                _, restored, _ = loaded.restore()
+        finally:
+            shutil.rmtree(directory)
+
+        self.assertEqual(describe(restored), describe(systems))
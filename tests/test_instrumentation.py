@@ -0,0 +1,147 @@
+import json
+from StringIO import StringIO
+from unittest import TestCase
+
+from combat import attack_phase
+from instrumentation import Instrumentation, NULL_PHASE
+from ship import Ship
+from system import System
+from vector import Vector
+
+
+class FakeClock(object):
+    """A clock that advances a fixed step every time it is read"""
+    def __init__(self, step=0.25):
+        self.now = 0.0
+        self.step = step
+
+    def __call__(self):
+        self.now += self.step
+        return self.now
+
+
+class TestInstrumentation(TestCase):
+    def setUp(self):
+        self.trace = StringIO()
+        self.sut = Instrumentation(trace=self.trace, clock=FakeClock())
+
+    def test_phase(self):
+        """Should time phases and fold them into the totals"""
+        with self.sut.phase('move'):
+            pass
+        with self.sut.phase('move'):
+            pass
+        record = self.sut.end_turn(1)
+
+        self.assertEqual(record['phases'], {'move': 0.5})
+        self.assertEqual(self.sut.phase_totals, {'move': 0.5})
+        self.assertEqual(self.sut.turns, 1)
+
+    def test_phase__disabled(self):
+        """Should hand back the shared no-op phase when disabled"""
+        self.sut.enabled = False
+
+        self.assertIs(self.sut.phase('move'), NULL_PHASE)
+        with self.sut.phase('move'):
+            pass
+        self.assertIsNone(self.sut.end_turn(1))
+        self.assertEqual(self.sut.phase_totals, {})
+
+    def test_count(self):
+        """Should keep per-turn counts separate from the totals"""
+        self.sut.count('deaths')
+        self.sut.count('deaths', 2)
+        first = self.sut.end_turn(1)
+        self.sut.count('deaths')
+        second = self.sut.end_turn(2)
+
+        self.assertEqual(first['counts'], {'deaths': 3})
+        self.assertEqual(second['counts'], {'deaths': 1})
+        self.assertEqual(self.sut.count_totals, {'deaths': 4})
+
+    def test_end_turn__trace(self):
+        """Should write one JSON line per turn"""
+        self.sut.count('damage_events', 5)
+        self.sut.end_turn(1)
+        self.sut.end_turn(2)
+
+        lines = self.trace.getvalue().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(json.loads(lines[0]),
+                         {'turn': 1, 'phases': {},
+                          'counts': {'damage_events': 5}})
+        self.assertEqual(json.loads(lines[1])['turn'], 2)
+
+    def test_export_text(self):
+        """Should export totals in the Prometheus text format"""
+        self.sut.record_phase('attack', 1.5)
+        self.sut.count('deaths', 2)
+        self.sut.end_turn(1)
+        text = self.sut.export_text()
+
+        self.assertIn('moo_turns_total 1\n', text)
+        self.assertIn('moo_phase_seconds_total{phase="attack"} 1.5\n', text)
+        self.assertIn('moo_operations_total{operation="deaths"} 2\n', text)
+        self.assertNotIn('sampled', text)
+
+    def test_attribute(self):
+        """Should charge sampled time to the ship, its system and empire"""
+        ship = Ship('Scout', 10, 10, 1, 1, 1)
+        ship.system = System('Sol', Vector(0, 0))
+        ship.empire = 'Terrans'
+        self.sut.attribute(ship, 0.5)
+        self.sut.end_turn(1)
+
+        self.assertEqual(self.sut.attribution, {('ship', ship): 0.5,
+                                                ('system', ship.system): 0.5,
+                                                ('empire', 'Terrans'): 0.5})
+        self.assertEqual(self.sut.hottest(1), [('empire:Terrans', 0.5)])
+
+    def test_attribute__same_name(self):
+        """Should keep ships that share a name apart"""
+        first, second = Ship('Scout', 10, 10, 1, 1, 1), Ship('Scout', 10, 10,
+                                                             1, 1, 1)
+        self.sut.attribute(first, 0.5)
+        self.sut.attribute(second, 0.25)
+        self.sut.attribute(first, 0.5)
+        self.sut.end_turn(1)
+
+        self.assertEqual(self.sut.hottest(),
+                         [('ship:Scout#0', 1.0), ('ship:Scout#1', 0.25)])
+        self.assertIn('moo_sampled_seconds_total{entity="ship:Scout#1"} 0.25',
+                      self.sut.export_text())
+        self.assertEqual(json.loads(self.trace.getvalue())['samples'],
+                         {'ship:Scout#0': 1.0, 'ship:Scout#1': 0.25})
+
+    def test_sample(self):
+        """Should time a block and charge it to the ship"""
+        ship = Ship('Scout', 10, 10, 1, 1, 1)
+        with self.sut.sample(ship):
+            pass
+        self.sut.end_turn(1)
+
+        self.assertEqual(self.sut.attribution, {('ship', ship): 0.25})
+
+    def test_should_sample(self):
+        """Should only sample when a sample rate is set"""
+        self.assertFalse(self.sut.should_sample())
+
+        self.sut.sample_rate = 1.0
+        self.assertTrue(self.sut.should_sample())
+
+    def test_attack_phase__sampling(self):
+        """Should attribute targeting time without changing the outcome"""
+        self.sut.sample_rate = 1.0
+        attacker = Ship('Attacker', 10, 10, 1, 5, 4)
+        attacker.empire = 1
+        target = Ship('Target', 10, 10, 1, 5, 4)
+        target.empire = 2
+        attacker.set_target(target)
+        report = attack_phase([attacker, target], None, self.sut)
+        self.sut.end_turn(1)
+
+        self.assertEqual(report.events, 1)
+        self.assertEqual(target.shield, 6)
+        self.assertEqual(set(self.sut.attribution),
+                         set([('ship', attacker), ('ship', target),
+                              ('empire', 1), ('empire', 2)]))
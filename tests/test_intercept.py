@@ -0,0 +1,158 @@
+from unittest import TestCase
+from mock import patch
+
+from fleet import Fleet
+from intercept import (INFINITY, InterceptPlanner, solve, solve_many,
+                       velocity)
+from helpers import make_ship
+from vector import Vector
+from vector_batch import VectorBatch
+
+
+class TestSolve(TestCase):
+    def test_solve__stationary(self):
+        """Should head straight for a target that is not moving"""
+        lead, time = solve(Vector(0, 0), 5, Vector(30, 40), Vector(0, 0))
+        self.assertItemsEqual(lead, (30, 40))
+        self.assertAlmostEqual(time, 10)
+
+    def test_solve__crossing(self):
+        """Should meet the target where both arrive at the same time"""
+        position = Vector(0, 0)
+        target_position = Vector(100, 0)
+        target_velocity = Vector(0, 3)
+
+        lead, time = solve(position, 5, target_position, target_velocity)
+
+        self.assertAlmostEqual(time, 25)
+        self.assertAlmostEqual(lead[0], 100)
+        self.assertAlmostEqual(lead[1], 75)
+        self.assertAlmostEqual((lead - position).norm(), 5 * time)
+
+    def test_solve__equal_speeds(self):
+        """Should still catch an approaching target as fast as the pursuer"""
+        lead, time = solve(Vector(0, 0), 2, Vector(10, 0), Vector(-2, 0))
+        self.assertAlmostEqual(time, 2.5)
+        self.assertAlmostEqual(lead[0], 5)
+
+    def test_solve__too_fast(self):
+        """Should give up on a target running away faster than the pursuer"""
+        self.assertIsNone(solve(Vector(0, 0), 2, Vector(10, 0),
+                                Vector(3, 0)))
+
+    def test_solve__same_position(self):
+        """Should intercept straight away"""
+        lead, time = solve(Vector(4, 4), 2, Vector(4, 4), Vector(3, 0))
+        self.assertEqual(time, 0)
+        self.assertItemsEqual(lead, (4, 4))
+
+    def test_solve_many(self):
+        """Should agree with solve for every pursuer"""
+        cases = [(Vector(0, 0), 5, Vector(100, 0), Vector(0, 3)),
+                 (Vector(-3, 8), 4, Vector(20, 1), Vector(-1, 2)),
+                 (Vector(0, 0), 2, Vector(10, 0), Vector(3, 0)),
+                 (Vector(1, 1), 3, Vector(1, 1), Vector(0, 1))]
+
+        leads, times = solve_many(
+            VectorBatch.from_vectors([case[0] for case in cases]),
+            [case[1] for case in cases],
+            VectorBatch.from_vectors([case[2] for case in cases]),
+            VectorBatch.from_vectors([case[3] for case in cases]))
+
+        for index, case in enumerate(cases):
+            expected = solve(*case)
+            if expected is None:
+                self.assertEqual(times[index], INFINITY)
+                self.assertItemsEqual(leads[index], case[2])
+            else:
+                self.assertAlmostEqual(times[index], expected[1])
+                self.assertAlmostEqual(leads[index][0], expected[0][0])
+                self.assertAlmostEqual(leads[index][1], expected[0][1])
+
+    def test_velocity(self):
+        """Should point at the destination, at the ship's speed"""
+        ship = make_ship('Runner', Vector(0, 0), Vector(30, 40), speed=5)
+        self.assertItemsEqual(velocity(ship), (3, 4))
+
+        ship._destination = None
+        self.assertItemsEqual(velocity(ship), (0, 0))
+
+
+class TestSolveFallback(TestSolve):
+    """Runs the same checks against the pure-Python backend"""
+    def setUp(self):
+        patcher = patch('vector_batch.numpy', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class TestInterceptPlanner(TestCase):
+    def setUp(self):
+        self.target = make_ship('Runner', Vector(100, 0), Vector(100, 300),
+                                speed=3)
+        self.hunter = make_ship('Hunter', Vector(0, 0), speed=5)
+        self.hunter.set_target(self.target)
+        self.sut = InterceptPlanner(threshold=0.5)
+
+    def test_plan(self):
+        """Should set a course for the lead point"""
+        planned = self.sut.plan([self.hunter, self.target])
+
+        self.assertEqual(planned, [self.hunter])
+        self.assertAlmostEqual(self.hunter._destination[0], 100)
+        self.assertAlmostEqual(self.hunter._destination[1], 75)
+
+    def test_plan__cached(self):
+        """Should keep the course while the target keeps its velocity"""
+        self.sut.plan([self.hunter])
+        course = self.hunter._destination
+
+        with patch('intercept.solve_many') as solve_mock:
+            self.assertEqual(self.sut.plan([self.hunter]), [])
+        self.assertFalse(solve_mock.called)
+        self.assertIs(self.hunter._destination, course)
+
+    def test_plan__within_threshold(self):
+        """Should ignore velocity changes smaller than the threshold"""
+        self.sut.plan([self.hunter])
+        self.target.speed = 3.4
+
+        self.assertEqual(self.sut.plan([self.hunter]), [])
+
+    def test_plan__velocity_changed(self):
+        """Should plan again once the target changes course"""
+        self.sut.plan([self.hunter])
+        self.target.set_course(Vector(100, -300))
+
+        self.assertEqual(self.sut.plan([self.hunter]), [self.hunter])
+        self.assertAlmostEqual(self.hunter._destination[1], -75)
+
+    def test_plan__course_cleared(self):
+        """Should plan again once the pursuer has arrived"""
+        self.sut.plan([self.hunter])
+        self.hunter._destination = None
+
+        self.assertEqual(self.sut.plan([self.hunter]), [self.hunter])
+
+    def test_plan__target_arrives_first(self):
+        """Should meet the target at its destination if it gets there first"""
+        self.target.set_course(Vector(100, 30))
+        self.sut.plan([self.hunter])
+
+        self.assertItemsEqual(self.hunter._destination, (100, 30))
+
+    def test_plan__target_destroyed(self):
+        """Should leave ships with dead targets alone"""
+        self.target._active = False
+
+        self.assertEqual(self.sut.plan([self.hunter]), [])
+        self.assertIsNone(self.hunter._destination)
+
+    def test_plan__fleet(self):
+        """Should steer fleets like ships"""
+        fleet = Fleet('Pack', [make_ship('Wolf', Vector(0, 0), speed=5),
+                               make_ship('Cub', Vector(0, 0), speed=6)])
+        fleet.set_target(self.target)
+
+        self.assertEqual(self.sut.plan([fleet]), [fleet])
+        self.assertAlmostEqual(fleet._destination[1], 75)
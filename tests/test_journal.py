@@ -0,0 +1,272 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+import journal
+from colony import Colony, FARM, RESEARCH
+from empire import Empire
+from fleet import Fleet
+from planet import Planet
+from ship import Ship
+from simulation import Simulation
+from spatial import SpatialGrid
+from system import System
+from vector import Vector
+
+
+def make_world():
+    federation, klingon = Empire('Federation'), Empire('Klingon')
+    colony = Colony(None, federation)
+    colony.add_colonists(2, FARM)
+
+    ships = []
+    for number, (empire, x) in enumerate([(federation, 0), (klingon, 40),
+                                          (klingon, 90)]):
+        ship = Ship('Ship {}'.format(number), 30, 10, 4, 30, 15)
+        ship.empire = empire
+        ship._move_to(x, 0)
+        ships.append(ship)
+    ships[0].set_course(Vector(100, 0.5))
+    sol = System('Sol', Vector(0, 0))
+    sol.add_planet(Planet('medium', 'terran', 'abundant'))
+    return [federation, klingon], [sol], ships, colony
+
+
+def state(ships, empires):
+    """Everything journaled, with reprs so that ints and floats differ"""
+    return ([repr((unicode(ship.name), ship.max_hull, ship.max_shield,
+                   ship.speed, ship.range, ship.damage,
+                   ship.empire and unicode(ship.empire.name),
+                   tuple(ship.position), ship.shield, ship.hull,
+                   ship._active,
+                   None if ship._destination is None
+                   else tuple(ship._destination),
+                   ship._target and unicode(ship._target.name),
+                   ship.system and unicode(ship.system.name)))
+             for ship in ships],
+            [empire.food_output for empire in empires],
+            [empire.science_output for empire in empires],
+            [(colony.name, colony.planet and unicode(colony.planet),
+              colony.job_count(RESEARCH))
+             for empire in empires for colony in empire.colonies])
+
+
+class TestJournal(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_construct__snapshot(self):
+        """Should write a snapshot of the starting state"""
+        empires, systems, ships, _ = make_world()
+        with journal.Journal(self.directory, empires, systems, ships):
+            pass
+
+        self.assertEqual(journal.snapshot_turns(self.directory), [0])
+
+    def test_construct__bad_interval(self):
+        """Should refuse a snapshot interval below one"""
+        with self.assertRaises(ValueError):
+            journal.Journal(self.directory, [], [], [], snapshot_interval=0)
+
+    def test_construct__fleet(self):
+        """Should refuse fleets, which snapshots have no room for"""
+        empires, systems, ships, _ = make_world()
+        fleet = Fleet('Alpha', ships[1:], empires[1])
+
+        with self.assertRaises(ValueError):
+            journal.Journal(self.directory, empires, systems,
+                            [ships[0], fleet])
+
+    def test_end_turn__only_changes(self):
+        """Should only write records for entities that changed"""
+        empires, systems, ships, _ = make_world()
+        with journal.Journal(self.directory, empires, systems, ships,
+                             snapshot_interval=100) as sut:
+            ships[0]._move_to(5, 0)
+            sut.record_move(ships[0])
+            sut.record_move(ships[0])
+            sut.end_turn(1)
+            sut.end_turn(2)
+
+        frames = list(journal._frames(
+            os.path.join(self.directory, journal.LOG_NAME.format(0))))
+        self.assertEqual([(turn, len(records))
+                          for turn, records, _ in frames],
+                         [(1, 1), (2, 0)])
+
+    def test_restore(self):
+        """Should rebuild the state at every turn from snapshots and deltas"""
+        empires, systems, ships, colony = make_world()
+        sut = journal.Journal(self.directory, empires, systems, ships,
+                              snapshot_interval=4)
+        simulation = Simulation(ships, index=SpatialGrid(30, ships),
+                                journal=sut)
+
+        def grow(simulation):
+            colony.add_colonist(RESEARCH)
+            sut.record_colonists(colony)
+
+        simulation.add_phase('colony', grow)
+
+        expected = {0: state(ships, empires)}
+        for turn in range(1, 11):
+            simulation.tick()
+            expected[turn] = state(ships, empires)
+        sut.close()
+
+        self.assertEqual(journal.snapshot_turns(self.directory), [0, 4, 8])
+        self.assertTrue(any(not ship._active for ship in ships))
+        for turn in (0, 3, 4, 7, 10):
+            restored_empires, _, restored_ships = journal.restore(
+                self.directory, turn)
+            self.assertEqual(state(restored_ships, restored_empires),
+                             expected[turn])
+
+    def test_restore__carry_on(self):
+        """Should carry on a journal in a new segment after reopening it"""
+        empires, systems, ships, colony = make_world()
+        sut = journal.Journal(self.directory, empires, systems, ships,
+                              snapshot_interval=4)
+        colony.add_colonist(RESEARCH)
+        sut.record_colonists(colony)
+        sut.end_turn(1)
+        sut.close()
+
+        empires, systems, ships = journal.restore(self.directory, 1)
+        colony = empires[0].colonies[0]
+        sut = journal.Journal(self.directory, empires, systems, ships,
+                              snapshot_interval=4)
+        colony.add_colonists(2, RESEARCH)
+        sut.record_colonists(colony)
+        ships[1].take_damage(12.5)
+        sut.record_damage(ships[1])
+        ships[2].set_target(ships[0])
+        ships[2].system = systems[0]
+        sut.record_links(ships)
+        sut.end_turn(2)
+        sut.close()
+
+        self.assertEqual(journal.log_segments(self.directory), [0, 1])
+        restored_empires, _, restored_ships = journal.restore(
+            self.directory, 2)
+        self.assertEqual(state(restored_ships, restored_empires),
+                         state(ships, empires))
+
+    def test_restore__new_colony(self):
+        """Should journal a colony founded since the last snapshot"""
+        empires, systems, ships, _ = make_world()
+        with journal.Journal(self.directory, empires, systems, ships,
+                             snapshot_interval=100) as sut:
+            sut.end_turn(1)
+            colony = Colony(systems[0].planets[0], empires[1], u'Qo\u2019noS')
+            colony.add_colonists(3, RESEARCH)
+            sut.record_colonists(colony)
+            sut.end_turn(2)
+            colony.add_colonist(RESEARCH)
+            sut.record_colonists(colony)
+            sut.end_turn(3)
+
+        self.assertEqual(journal.snapshot_turns(self.directory), [0])
+        restored_empires, _, restored_ships = journal.restore(
+            self.directory, 3)
+        self.assertEqual(state(restored_ships, restored_empires),
+                         state(ships, empires))
+
+    def test_restore__colony_elsewhere(self):
+        """Should snapshot the turn a colony off the journal's map is noted"""
+        empires, systems, ships, _ = make_world()
+        with journal.Journal(self.directory, empires, systems, ships,
+                             snapshot_interval=100) as sut:
+            sut.end_turn(1)
+            colony = Colony(Planet('small', 'barren', 'poor', None),
+                            empires[1])
+            colony.add_colonists(3, RESEARCH)
+            sut.record_colonists(colony)
+            sut.end_turn(2)
+
+        self.assertEqual(journal.snapshot_turns(self.directory), [0, 2])
+
+    def test_restore__new_ship(self):
+        """Should journal ships brought in after the journal began"""
+        empires, systems, ships, _ = make_world()
+        sut = journal.Journal(self.directory, empires, systems, ships,
+                              snapshot_interval=100)
+        simulation = Simulation(ships, index=SpatialGrid(30, ships),
+                                journal=sut)
+        simulation.tick()
+        expected = [state(ships, empires)]
+
+        raider = Ship(u'Raider \u2160', 40.5, 10, 6, 35, 12)
+        raider.empire = empires[1]
+        raider._move_to(20, 5)
+        raider.set_course(Vector(0, 0))
+        simulation.add_ship(raider)
+        for _ in range(3):
+            simulation.tick()
+            expected.append(state(simulation.ships, empires))
+        sut.close()
+
+        self.assertEqual(journal.snapshot_turns(self.directory), [0])
+        for turn in (1, 2, 4):
+            restored_empires, _, restored_ships = journal.restore(
+                self.directory, turn)
+            self.assertEqual(state(restored_ships, restored_empires),
+                             expected[turn - 1])
+
+    def test_restore__carry_on_new(self):
+        """Should carry on with ships and colonies the log added"""
+        empires, systems, ships, _ = make_world()
+        with journal.Journal(self.directory, empires, systems, ships,
+                             snapshot_interval=100) as sut:
+            colony = Colony(systems[0].planets[0], empires[1])
+            colony.add_colonist(RESEARCH)
+            sut.record_colonists(colony)
+            escort = Ship('Escort', 20, 5, 3, 10, 4)
+            escort.set_target(ships[1])
+            sut.add_ship(escort)
+            sut.end_turn(1)
+
+        empires, systems, ships = journal.restore(self.directory, 1)
+        with journal.Journal(self.directory, empires, systems, ships,
+                             snapshot_interval=100) as sut:
+            colony = empires[1].colonies[-1]
+            colony.add_colonists(2, RESEARCH)
+            sut.record_colonists(colony)
+            ships[-1].take_damage(7)
+            sut.record_damage(ships[-1])
+            sut.end_turn(2)
+
+        self.assertEqual(journal.snapshot_turns(self.directory), [0])
+        restored_empires, _, restored_ships = journal.restore(
+            self.directory, 2)
+        self.assertEqual(state(restored_ships, restored_empires),
+                         state(ships, empires))
+
+    def test_restore__cut_short(self):
+        """Should ignore a frame cut short at the end of the log"""
+        empires, systems, ships, _ = make_world()
+        with journal.Journal(self.directory, empires, systems, ships,
+                             snapshot_interval=100) as sut:
+            ships[0]._move_to(5, 0)
+            sut.record_move(ships[0])
+            sut.end_turn(1)
+            expected = state(ships, empires)
+            ships[0]._move_to(9, 0)
+            sut.record_move(ships[0])
+            sut.end_turn(2)
+        path = os.path.join(self.directory, journal.LOG_NAME.format(0))
+        with open(path, 'rb+') as stream:
+            stream.truncate(os.path.getsize(path) - 4)
+
+        restored_empires, _, restored_ships = journal.restore(
+            self.directory, 2)
+        self.assertEqual(state(restored_ships, restored_empires), expected)
+
+    def test_restore__no_snapshot(self):
+        """Should fail without a snapshot to start from"""
+        with self.assertRaises(ValueError):
+            journal.restore(self.directory, 3)
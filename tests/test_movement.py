@@ -0,0 +1,118 @@
+from unittest import TestCase
+from mock import patch
+
+from empire import Empire
+from fleet import Fleet
+from movement import advance, move_ships, move_fleets, move_empires
+from helpers import make_ship
+from vector import Vector
+from vector_batch import VectorBatch
+
+
+class TestMoveShips(TestCase):
+    def setUp(self):
+        self.ships = [
+            make_ship('Mover', Vector(0, 0), Vector(30, 40), speed=5),
+            make_ship('Mover', Vector(1, 1), Vector(4, 5), speed=10),
+            make_ship('Mover', Vector(-3, 7), Vector(-3, -1), speed=2),
+            make_ship('Mover', Vector(9, 9), speed=4),
+        ]
+
+    def assertMatchesSerial(self, ships):
+        """Asserts move_ships agrees with Ship._process_move on copies"""
+        serial = [make_ship(s.name, s.position, s._destination, speed=s.speed)
+                  for s in ships]
+        for ship in serial:
+            ship._process_move()
+
+        move_ships(ships)
+
+        for batched, expected in zip(ships, serial):
+            self.assertAlmostEqual(batched.position.x, expected.position.x)
+            self.assertAlmostEqual(batched.position.y, expected.position.y)
+            self.assertEqual(batched._destination is None,
+                             expected._destination is None)
+
+    def test_move_ships__matches_serial(self):
+        """Should produce the same positions as per-ship processing"""
+        self.assertMatchesSerial(self.ships)
+
+    def test_move_ships__fallback(self):
+        """Should produce the same positions without NumPy"""
+        with patch('vector_batch.numpy', None), \
+                patch('movement.numpy', None):
+            self.assertMatchesSerial(self.ships)
+
+    def test_move_ships__consecutive(self):
+        """Should carry positions kept in arrays into the next move"""
+        ships = self.ships[:1] + self.ships[2:]
+        move_ships(ships)
+
+        self.assertIsNone(ships[0]._position)
+        self.assertMatchesSerial(ships)
+
+    def test_move_ships__moved_between(self):
+        """Should start from a position set after the last move"""
+        move_ships(self.ships)
+        self.ships[0]._move_to(Vector(20, 20))
+
+        self.assertMatchesSerial(self.ships)
+
+    def test_move_ships__overshoot(self):
+        """Should stop ships on their destination"""
+        ship = self.ships[1]
+        destination = ship._destination
+        move_ships(self.ships)
+
+        self.assertIs(ship.position, destination)
+        self.assertIsNone(ship._destination)
+
+    def test_move_ships__skips_idle(self):
+        """Should only return ships that are active and have a course"""
+        self.ships[0]._die()
+        moved = move_ships(self.ships)
+
+        self.assertEqual(moved, self.ships[1:3])
+
+    def test_move_ships__empty(self):
+        """Should handle having nothing to move"""
+        self.assertEqual(move_ships([]), [])
+
+    def test_move_fleets(self):
+        """Should move grouped fleets as units, and expanded fleets by ship"""
+        empire = Empire('Federation')
+        grouped = Fleet('Alpha', self.ships[:2], empire)
+        expanded = Fleet('Beta', self.ships[2:], empire)
+        expanded.expand()
+
+        moved = move_fleets(empire)
+
+        # Expanding gave every ship in Beta the fleet's course
+        self.assertEqual(moved, [grouped] + self.ships[2:])
+        self.assertEqual(tuple(grouped.position), (3, 4))
+        self.assertEqual(tuple(self.ships[0].position), (0, 0))
+        self.assertEqual(tuple(self.ships[2].position), (-3, 5))
+        self.assertEqual(tuple(self.ships[3].position), (-3, 3))
+
+    def test_move_empires(self):
+        """Should move fleets across every empire"""
+        first, second = Empire('Federation'), Empire('Klingon')
+        Fleet('Alpha', self.ships[:1], first)
+        Fleet('Beta', self.ships[1:2], second)
+        Fleet('Gamma', self.ships[2:], second)
+
+        self.assertEqual(len(move_empires([first, second])), 3)
+
+
+class TestAdvance(TestCase):
+    def test_advance(self):
+        """Should step positions and flag arrivals"""
+        positions = VectorBatch([0, 0], [0, 0])
+        destinations = VectorBatch([30, 1], [40, 1])
+
+        new_positions, arrived = advance(positions, destinations, [5, 5])
+
+        self.assertEqual(list(arrived), [False, True])
+        self.assertAlmostEqual(new_positions[0].x, 3)
+        self.assertAlmostEqual(new_positions[0].y, 4)
+        self.assertEqual(tuple(new_positions[1]), (1, 1))
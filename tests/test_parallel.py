@@ -0,0 +1,177 @@
+import random
+from unittest import TestCase
+
+from parallel import ParallelTurnExecutor, shard_seed
+from ship import Ship
+from simulation import Simulation
+from spatial import SpatialGrid
+from system import System
+from vector import Vector
+
+
+def jitter(ships, rng):
+    """A shard phase that consumes the shard RNG"""
+    for ship in ships:
+        if ship._active:
+            ship.shield += rng.randint(0, 3)
+
+
+def make_world(seed=7):
+    rng = random.Random(seed)
+    systems = [System('Sol', Vector(0, 0)),
+               System('Vega', Vector(100, 0)),
+               System('Rigel', Vector(0, 100))]
+    empires = ['Federation', 'Klingon']
+    ships = []
+    for number in range(60):
+        home = rng.choice(systems).position
+        ship = Ship('Ship {}'.format(number), rng.randint(20, 60),
+                    rng.randint(0, 30), rng.randint(1, 8), rng.randint(5, 25),
+                    rng.randint(1, 10))
+        ship._move_to(home + Vector(rng.uniform(-15, 15),
+                                    rng.uniform(-15, 15)))
+        ship.empire = empires[number % 2]
+        if number % 5 == 0:
+            ship.set_course(rng.choice(systems).position + Vector(1, 1))
+        ships.append(ship)
+    return systems, ships
+
+
+def snapshot(ships):
+    return [(tuple(ship.position), ship.hull, ship.shield, ship._active,
+             ship.system.name if ship.system else None)
+            for ship in ships]
+
+
+class TestParallelTurnExecutor(TestCase):
+    def test_shard_seed(self):
+        """Should be stable and differ between shards"""
+        self.assertEqual(shard_seed(1, 2, 3), shard_seed(1, 2, 3))
+        self.assertNotEqual(shard_seed(1, 2, 3), shard_seed(1, 2, 4))
+
+    def test_shards(self):
+        """Should group ships by the system they are in"""
+        systems, ships = make_world()
+        sut = ParallelTurnExecutor(systems, ships, 30, processes=0)
+
+        for number, shard in sut.shards():
+            owners = set(ships[index].system for index in shard)
+            self.assertEqual(len(owners), 1)
+
+    def test_migration(self):
+        """Should move a ship into the shard of the system it flies to"""
+        systems, _ = make_world()
+        ship = Ship('Courier', 10, 10, 200, 5, 1)
+        ship.set_course(Vector(100, 0))
+        sut = ParallelTurnExecutor(systems, [ship], 30, processes=0)
+
+        self.assertIs(ship.system, systems[0])
+        sut.run_turn()
+        self.assertIs(ship.system, systems[1])
+
+    def test_cross_shard_attack(self):
+        """Should apply damage aimed at a ship in another shard"""
+        systems, _ = make_world()
+        attacker = Ship('Attacker', 10, 10, 1, 500, 15)
+        target = Ship('Target', 10, 10, 1, 5, 1)
+        attacker.empire, target.empire = 'Federation', 'Klingon'
+        target._move_to(100, 0)
+        attacker.set_target(target)
+        sut = ParallelTurnExecutor(systems, [attacker, target], 30,
+                                   processes=0)
+
+        report = sut.run_turn()
+
+        self.assertEqual(target.hull, 5)
+        self.assertEqual(report.damage[target], 15)
+
+    def test_cross_shard_attack__destroyed(self):
+        """Should keep a ship destroyed from another shard out of the fight"""
+        systems, _ = make_world()
+        attacker = Ship('Attacker', 10, 10, 1, 500, 15)
+        target = Ship('Target', 10, 10, 1, 5, 1)
+        bystander = Ship('Bystander', 10, 10, 1, 5, 1)
+        attacker.empire, target.empire = 'Federation', 'Klingon'
+        bystander.empire = 'Federation'
+        target._move_to(100, 0)
+        bystander._move_to(102, 0)
+        attacker.set_target(target)
+        sut = ParallelTurnExecutor(systems, [attacker, target, bystander],
+                                   30, processes=0)
+
+        for _ in range(3):
+            sut.run_turn()
+
+        self.assertFalse(target._active)
+        self.assertIsNone(attacker._target)
+        self.assertEqual((bystander.hull, bystander.shield), (10, 8))
+
+    def test_locate__overlapping_zones(self):
+        """Should put moving ships in the nearest system's shard"""
+        systems, ships = make_world()
+        for number, ship in enumerate(ships):
+            ship.set_course(systems[number % 3].position +
+                            Vector(number % 7 - 3, number % 5 - 2))
+        sut = ParallelTurnExecutor(systems, ships, 70, processes=0)
+
+        for _ in range(8):
+            sut.run_turn()
+            self.assertEqual([ship.system for ship in ships],
+                             [sut.locate(ship) for ship in ships])
+
+    def test_close__resume(self):
+        """Should carry on from the parent's ships after closing"""
+        systems, ships = make_world()
+        _, expected = make_world()
+        for number in range(0, 60, 4):
+            ships[number].set_target(ships[(number * 7 + 1) % 60])
+            expected[number].set_target(expected[(number * 7 + 1) % 60])
+        sut = ParallelTurnExecutor(systems, ships, 30, processes=0, seed=3,
+                                   shard_phase=jitter)
+        reference = ParallelTurnExecutor(systems, expected, 30, processes=0,
+                                         seed=3, shard_phase=jitter)
+
+        for _ in range(6):
+            sut.run_turn()
+            sut.close()
+            reference.run_turn()
+
+        self.assertEqual(snapshot(ships), snapshot(expected))
+        self.assertEqual([ship._target and ship._target.name
+                          for ship in ships],
+                         [ship._target and ship._target.name
+                          for ship in expected])
+
+    def test_matches_simulation__one_shard(self):
+        """Should play out like a Simulation when every ship is in one shard
+        """
+        systems, ships = make_world()
+        _, expected = make_world()
+        sut = ParallelTurnExecutor(systems[:1], ships, 1000, processes=0)
+        simulation = Simulation(expected, index=SpatialGrid(25, expected))
+
+        for _ in range(6):
+            sut.run_turn()
+            simulation.tick()
+
+        self.assertEqual(len(sut.shards()), 1)
+        self.assertEqual(snapshot(ships), [
+            state[:4] + (systems[0].name,) for state in snapshot(expected)])
+        self.assertTrue(any(not ship._active for ship in ships))
+
+    def test_matches_serial(self):
+        """Should give bit-identical results with and without a pool"""
+        serial_systems, serial_ships = make_world()
+        pooled_systems, pooled_ships = make_world()
+        serial = ParallelTurnExecutor(serial_systems, serial_ships, 30,
+                                      processes=0, seed=3, shard_phase=jitter)
+
+        with ParallelTurnExecutor(pooled_systems, pooled_ships, 30,
+                                  processes=2, seed=3,
+                                  shard_phase=jitter) as pooled:
+            for _ in range(6):
+                serial.run_turn()
+                pooled.run_turn()
+
+        self.assertEqual(snapshot(serial_ships), snapshot(pooled_ships))
+        self.assertTrue(any(not ship._active for ship in serial_ships))
@@ -0,0 +1,58 @@
+from unittest import TestCase
+
+from colony import Colony
+from planet import Planet
+from system import System
+from vector import Vector
+
+
+class TestPlanet(TestCase):
+    def setUp(self):
+        self.system = System('Sol', Vector(0, 0))
+        self.planet = Planet('medium', 'terran', 'abundant')
+
+    def test_str__rogue(self):
+        """Should name a planet outside any system a rogue planet"""
+        self.assertEqual(str(self.planet), 'Rogue Planet')
+
+    def test_str__orbit(self):
+        """Should name a planet after its system and orbit"""
+        self.system.add_planet(self.planet, 3)
+
+        self.assertEqual(str(self.planet), 'Sol IV')
+
+    def test_str__prime(self):
+        """Should name the innermost planet too"""
+        self.system.add_planet(self.planet, 0)
+
+        self.assertEqual(str(self.planet), 'Sol prime')
+
+    def test_str__colony(self):
+        """Should show a colony's name once one is founded"""
+        self.system.add_planet(self.planet, 1)
+        self.assertEqual(str(self.planet), 'Sol II')
+
+        colony = Colony(self.planet, None, 'New Terra')
+        self.assertEqual(str(self.planet), 'New Terra')
+        colony.name = 'Old Terra'
+        self.assertEqual(str(self.planet), 'Old Terra')
+
+    def test_str__unnamed_colony(self):
+        """Should keep the orbit name for a colony without a name"""
+        self.system.add_planet(self.planet, 1)
+        Colony(self.planet, None)
+
+        self.assertEqual(str(self.planet), 'Sol II')
+
+    def test_str__cached(self):
+        """Should reuse the label until the system or orbit changes"""
+        self.system.add_planet(self.planet, 2)
+        label = str(self.planet)
+
+        self.assertIs(str(self.planet), label)
+        self.system.name = 'Helios'
+        self.assertEqual(str(self.planet), 'Helios III')
+        System('Vega', Vector(1, 1)).add_planet(self.planet)
+        self.assertEqual(str(self.planet), 'Vega prime')
+        self.planet.system.remove_planet(self.planet)
+        self.assertEqual(str(self.planet), 'Rogue Planet')
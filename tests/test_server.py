@@ -0,0 +1,247 @@
+import os
+import shutil
+import tempfile
+import time
+from unittest import TestCase
+
+from mock import patch
+
+from colony import Colony, FARM
+from empire import Empire
+from server import GameClient, GameServer
+from ship import Ship
+from simulation import Simulation
+from vector import Vector
+
+
+class TestGameServer(TestCase):
+    def setUp(self):
+        self.federation = Empire('Federation')
+        self.klingon = Empire('Klingon')
+        self.colony = Colony(None, self.federation)
+
+        self.enterprise = Ship('Enterprise', 100, 150, 30, 75, 25)
+        self.enterprise.empire = self.federation
+        self.bird = Ship('Bird of Prey', 60, 40, 35, 50, 30)
+        self.bird.empire = self.klingon
+        self.bird._move_to(Vector(500, 0))
+
+        simulation = Simulation([self.enterprise, self.bird])
+        self.server = GameServer(simulation, [self.federation, self.klingon])
+        self.clients = []
+
+    def tearDown(self):
+        for client in self.clients:
+            client.close()
+        self.server.close()
+
+    def connect(self, empire=None):
+        client = GameClient(self.server.address)
+        self.clients.append(client)
+        if empire is not None:
+            client.send({'order': 'join', 'empire': empire})
+            self.assertEqual(self.receive(client)[0]['joined'], empire)
+        return client
+
+    def receive(self, client, count=1, timeout=5):
+        """Runs the server until the client has `count` messages"""
+        messages = []
+        deadline = time.time() + timeout
+        while len(messages) < count:
+            self.assertLess(time.time(), deadline, 'timed out')
+            self.server.poll(0.01)
+            messages.extend(client.messages())
+        return messages
+
+    def test_set_course(self):
+        """Should apply orders at the end of the turn and send the changes"""
+        client = self.connect('Federation')
+        client.send({'order': 'set_course', 'ship': 'Enterprise',
+                     'x': 300, 'y': 400})
+        self.receive_nothing(client)
+        self.assertIsNone(self.enterprise._destination)
+
+        self.server.end_turn()
+        delta, = self.receive(client)
+
+        self.assertEqual(delta['turn'], 1)
+        self.assertEqual(len(delta['ships']), 1)
+        ship = delta['ships'][0]
+        self.assertEqual(ship['name'], 'Enterprise')
+        self.assertAlmostEqual(ship['x'], 18)
+        self.assertAlmostEqual(ship['y'], 24)
+
+    def receive_nothing(self, client):
+        for _ in range(5):
+            self.server.poll(0.01)
+        self.assertEqual(client.messages(), [])
+
+    def test_set_target(self):
+        """Should queue targets for the sender's own ships"""
+        client = self.connect('Klingon')
+        client.send({'order': 'set_target', 'ship': 'Bird of Prey',
+                     'target': 'Enterprise'})
+        self.receive_nothing(client)
+        self.server.end_turn()
+        self.receive(client)
+
+        self.assertIs(self.bird._target, self.enterprise)
+
+    def test_add_colonist(self):
+        """Should staff colonies and report their new headcounts"""
+        client = self.connect('Federation')
+        client.send({'order': 'add_colonist', 'colony': 0, 'job': FARM})
+        self.receive_nothing(client)
+        self.server.end_turn()
+        delta, = self.receive(client)
+
+        self.assertEqual(self.colony.job_count(FARM), 1)
+        self.assertEqual(delta['colonies'], [
+            {'empire': 'Federation', 'colony': 0,
+             'jobs': {'farm': 1, 'build': 0, 'research': 0}}])
+
+    def test_orders__rejected(self):
+        """Should answer bad orders with an error straight away"""
+        client = self.connect()
+        orders = [
+            {'order': 'set_course', 'ship': 'Enterprise', 'x': 1, 'y': 1},
+            {'order': 'join', 'empire': 'Romulan'},
+            {'order': 'join', 'empire': 'Klingon'},
+            {'order': 'set_course', 'ship': 'Bird of Prey', 'x': 'far'},
+            {'order': 'add_colonist', 'colony': True},
+            {'order': 'warp'},
+        ]
+        for order in orders:
+            client.send(order)
+        client.socket.sendall(b'not json\n')
+
+        messages = self.receive(client, len(orders) + 1)
+
+        self.assertEqual(messages[2], {'joined': 'Klingon', 'turn': 0})
+        errors = messages[:2] + messages[3:]
+        self.assertTrue(all('error' in message for message in errors))
+        self.assertEqual(self.server._pending, [])
+
+    def test_orders__rejected_on_apply(self):
+        """Should answer orders the sender may not give when applying them"""
+        client = self.connect('Klingon')
+        orders = [
+            {'order': 'set_course', 'ship': 'Enterprise', 'x': 1, 'y': 1},
+            {'order': 'set_target', 'ship': 'Bird of Prey', 'target': 'Nope'},
+            {'order': 'add_colonist', 'colony': 0},
+            {'order': 'set_course', 'ship': 'Bird of Prey', 'x': 1, 'y': 1},
+        ]
+        for order in orders:
+            client.send(order)
+        deadline = time.time() + 5
+        while len(self.server._pending) < len(orders):
+            self.assertLess(time.time(), deadline, 'timed out')
+            self.server.poll(0.01)
+        self.server.end_turn()
+        messages = self.receive(client, 4)
+
+        self.assertTrue(all('error' in message for message in messages[:3]))
+        self.assertEqual(messages[3]['turn'], 1)
+        self.assertIsNone(self.enterprise._destination)
+        self.assertEqual(tuple(self.bird._destination), (1, 1))
+
+    def test_end_turn__error(self):
+        """Should report a turn that fails and carry on with the next"""
+        client = self.connect('Federation')
+        with patch.object(self.server.simulation, 'tick',
+                          side_effect=RuntimeError('boom')):
+            self.server.end_turn()
+            failed, = self.receive(client)
+
+        self.assertEqual(failed, {'turn': 0, 'error':
+                                  'Turn could not be resolved: '
+                                  'RuntimeError: boom'})
+        self.assertFalse(self.server._resolving)
+        self.assertTrue(self.server.end_turn())
+        self.assertEqual(self.receive(client)[0]['turn'], 1)
+
+    def test_end_turn__new_arrivals(self):
+        """Should send ships and colonies added since the server started"""
+        client = self.connect('Klingon')
+        raptor = Ship('Raptor', 50, 30, 40, 40, 20)
+        raptor.empire = self.klingon
+        self.server.simulation.ships.append(raptor)
+        Colony(None, self.klingon)
+
+        self.server.end_turn()
+        delta, = self.receive(client)
+
+        self.assertEqual([ship['name'] for ship in delta['ships']],
+                         ['Raptor'])
+        self.assertEqual([(colony['empire'], colony['colony'])
+                          for colony in delta['colonies']],
+                         [('Klingon', 0)])
+
+        client.send({'order': 'set_course', 'ship': 'Raptor',
+                     'x': 0, 'y': 80})
+        self.receive_nothing(client)
+        self.server.end_turn()
+        self.receive(client)
+        self.assertEqual(tuple(raptor._destination), (0, 80))
+
+    def test_init__duplicate_names(self):
+        """Should refuse ships that orders could not tell apart"""
+        twin = Ship('Enterprise', 100, 150, 30, 75, 25)
+        with self.assertRaises(ValueError):
+            GameServer(Simulation([self.enterprise, twin]), [self.federation])
+
+    def test_end_turn__busy(self):
+        """Should not start a turn while the last is being resolved"""
+        client = self.connect('Federation')
+
+        self.assertTrue(self.server.end_turn())
+        self.assertFalse(self.server.end_turn())
+        self.receive(client)
+        self.assertTrue(self.server.end_turn())
+
+    def test_turn_interval(self):
+        """Should end turns on its own once the interval is up"""
+        self.server.close()
+        now = [0.0]
+        self.server = GameServer(Simulation([self.enterprise]),
+                                 [self.federation], turn_interval=1,
+                                 clock=lambda: now[0])
+        client = self.connect('Federation')
+
+        now[0] = 1.0
+        delta, = self.receive(client)
+        self.assertEqual(delta['turn'], 1)
+
+    def test_many_clients(self):
+        """Should serve many connections at once"""
+        clients = [self.connect() for _ in range(200)]
+        for client in clients:
+            client.send({'order': 'join', 'empire': 'Klingon'})
+        for client in clients:
+            self.receive(client)
+
+        self.server.end_turn()
+        for client in clients:
+            self.assertEqual(self.receive(client)[0]['turn'], 1)
+
+
+class TestUnixSocket(TestCase):
+    def test_unix_socket(self):
+        """Should listen on a Unix socket path"""
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'game.sock')
+        server = GameServer(Simulation(), [Empire('Federation')], path)
+        try:
+            client = GameClient(path)
+            client.send({'order': 'join', 'empire': 'Federation'})
+            messages = []
+            while not messages:
+                server.poll(0.01)
+                messages = client.messages()
+            client.close()
+        finally:
+            server.close()
+            shutil.rmtree(directory)
+
+        self.assertEqual(messages, [{'joined': 'Federation', 'turn': 0}])
+        self.assertFalse(os.path.exists(path))
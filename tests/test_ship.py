@@ -1,7 +1,7 @@
 from unittest import TestCase
 from mock import patch
 
-from ship import Ship
+from ship import Ship, status_reports
 from vector import Vector
 
 
@@ -36,6 +36,13 @@ class TestShip(TestCase):
 
         self.assertIs(self.ship._destination, new_vector)
 
+    def test_set_course__vector_on_axis(self):
+        """Should accept a destination with a zero component"""
+        new_vector = Vector(100, 0)
+        self.ship.set_course(new_vector)
+
+        self.assertIs(self.ship._destination, new_vector)
+
     def test_set_course__components(self):
         """Should replace the ship's position"""
         self.ship.set_course(7, -2)
@@ -79,3 +86,61 @@ class TestShip(TestCase):
 
         self.assertEqual(self.ship.shield, 0)
         cm.assert_called_with(5)
+
+    def test_process_move__no_course(self):
+        """Should stay put without a destination"""
+        self.ship._process_move()
+        self.assertItemsEqual(self.ship.position, (0, 0))
+
+    def test_process_move__partial(self):
+        """Should move `speed` units towards the destination"""
+        self.ship.set_course(Vector(30, 40))
+        self.ship._process_move()
+
+        self.assertAlmostEqual(self.ship.position.x, 3)
+        self.assertAlmostEqual(self.ship.position.y, 4)
+        self.assertIsNotNone(self.ship._destination)
+
+    def test_process_move__overshoot(self):
+        """Should stop on the destination and clear the course"""
+        destination = Vector(3, 4)
+        self.ship.set_course(destination)
+        self.ship._process_move()
+
+        self.assertIs(self.ship.position, destination)
+        self.assertIsNone(self.ship._destination)
+
+    def test_slots(self):
+        """Should store state in slots rather than a per-instance dict"""
+        self.assertFalse(hasattr(self.ship, '__dict__'))
+        with self.assertRaises(AttributeError):
+            self.ship.cloaked = True
+
+    def test_status_report(self):
+        """Should report the ship's shield and hull"""
+        self.assertEqual(self.ship.status_report(),
+                         'Guinea: shield:50/50, hull:100/100')
+
+    def test_status_report__cached(self):
+        """Should reuse the report until a field changes"""
+        report = self.ship.status_report()
+
+        self.assertIs(self.ship.status_report(), report)
+        self.ship.take_damage(60)
+        self.assertEqual(self.ship.status_report(),
+                         'Guinea: shield:0/50, hull:90/100')
+        self.ship.shield = 12.5
+        self.assertEqual(self.ship.status_report(),
+                         'Guinea: shield:12.5/50, hull:90/100')
+        self.ship.name = 'Hamster'
+        self.assertEqual(self.ship.status_report(),
+                         'Hamster: shield:12.5/50, hull:90/100')
+
+    def test_status_reports(self):
+        """Should render a line per ship"""
+        other = Ship('Pig', 10, 5, 1, 1, 1)
+        other.take_damage(7)
+
+        self.assertEqual(status_reports([self.ship, other]),
+                         'Guinea: shield:50/50, hull:100/100\n'
+                         'Pig: shield:0/5, hull:8/10')
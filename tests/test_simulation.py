@@ -0,0 +1,214 @@
+from unittest import TestCase
+from mock import Mock
+
+from empire import Empire
+from fleet import Fleet
+
+from helpers import make_ship
+from instrumentation import Instrumentation
+from intercept import InterceptPlanner
+from ship import Ship
+from simulation import Simulation
+from spatial import SpatialGrid
+from vector import Vector
+from visibility import Visibility
+
+
+class FakeClock(object):
+    """A clock that advances a fixed step every time it is read"""
+    def __init__(self, step=0.5):
+        self.now = 0.0
+        self.step = step
+        self.slept = []
+
+    def __call__(self):
+        self.now += self.step
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+class TestSimulation(TestCase):
+    def setUp(self):
+        self.ship = Ship('Runner', 100, 50, 5, 10, 25)
+        self.ship.set_course(Vector(30, 40))
+        self.clock = FakeClock()
+        self.sut = Simulation([self.ship], clock=self.clock,
+                              sleep=self.clock.sleep)
+
+    def test_tick(self):
+        """Should run every phase and advance the turn"""
+        phase = Mock()
+        self.sut.add_phase('colony', phase)
+        self.sut.tick()
+
+        self.assertEqual(self.sut.turn, 1)
+        phase.assert_called_once_with(self.sut)
+        self.assertAlmostEqual(self.ship.position.x, 3)
+
+    def test_add_phase__duplicate(self):
+        """Should refuse two phases with the same name"""
+        with self.assertRaises(ValueError):
+            self.sut.add_phase('move', Mock())
+
+    def test_run__turns(self):
+        """Should stop after the requested number of turns"""
+        stats = self.sut.run(turns=4)
+
+        self.assertEqual(stats.turns, 4)
+        self.assertEqual(self.sut.turn, 4)
+        self.assertEqual(self.clock.slept, [])
+        self.assertEqual(set(stats.phase_times), set(['move', 'attack']))
+        self.assertAlmostEqual(stats.phase_mean('move'), 0.5)
+
+    def test_run__until(self):
+        """Should stop once the condition holds"""
+        stats = self.sut.run(
+            until=lambda sim: self.ship._destination is None)
+
+        self.assertEqual(stats.turns, 10)
+        self.assertEqual(tuple(self.ship.position), (30, 40))
+
+    def test_run__unbounded(self):
+        """Should refuse to run forever"""
+        with self.assertRaises(ValueError):
+            self.sut.run()
+
+    def test_run__tick_rate(self):
+        """Should sleep away the rest of each tick's period"""
+        self.sut.run(turns=2, tick_rate=0.25)
+
+        self.assertEqual(len(self.clock.slept), 2)
+        for seconds in self.clock.slept:
+            self.assertTrue(0 < seconds < 4)
+
+    def test_run__stats(self):
+        """Should report throughput for the run"""
+        stats = self.sut.run(turns=3)
+
+        self.assertAlmostEqual(stats.ticks_per_second,
+                               stats.turns / stats.elapsed)
+        self.assertIn('3 turns', stats.report())
+
+    def test_run__index(self):
+        """Should keep the spatial index up to date as ships move"""
+        index = SpatialGrid(5, [self.ship])
+        sut = Simulation([self.ship], index=index)
+        sut.run(turns=10)
+
+        self.assertEqual(index.query_radius(Vector(30, 40), 1), [self.ship])
+
+    def test_tick__instrumentation(self):
+        """Should hand phase timings and operation counts to instrumentation"""
+        instrumentation = Instrumentation()
+        sut = Simulation([self.ship], instrumentation=instrumentation,
+                         clock=self.clock)
+        sut.tick()
+
+        self.assertEqual(instrumentation.turns, 1)
+        self.assertEqual(instrumentation.phase_totals,
+                         {'move': 0.5, 'attack': 0.5})
+        self.assertEqual(instrumentation.count_totals['ships_moved'], 1)
+        self.assertEqual(instrumentation.count_totals['damage_events'], 0)
+
+    def test_tick__instrumentation_disabled(self):
+        """Should record nothing while instrumentation is disabled"""
+        instrumentation = Instrumentation(enabled=False)
+        sut = Simulation([self.ship], instrumentation=instrumentation)
+        sut.tick()
+
+        self.assertEqual(instrumentation.turns, 0)
+        self.assertEqual(instrumentation.count_totals, {})
+
+    def test_tick__pursuit(self):
+        """Should plan intercept courses before ships move"""
+        hunter = Ship('Hunter', 100, 50, 10, 10, 25)
+        hunter._move_to(Vector(0, 40))
+        hunter.set_target(self.ship)
+        sut = Simulation([self.ship, hunter], pursuit=InterceptPlanner())
+
+        sut.tick()
+
+        self.assertEqual([name for name, _ in sut.phases],
+                         ['pursue', 'move', 'attack'])
+        self.assertIsNotNone(hunter._destination)
+        self.assertNotEqual(hunter.position.values, (0, 40))
+
+    def test_tick__visibility(self):
+        """Should bring visibility up to date after combat"""
+        watcher = Ship('Watcher', 100, 50, 0, 6, 0)
+        watcher.empire = 'red'
+        watcher._move_to(Vector(9, 12))
+        sut = Simulation([self.ship, watcher],
+                         visibility=Visibility(10, [self.ship, watcher]))
+
+        sut.tick()
+        self.assertNotIn('red', sut.last_visibility)
+        sut.tick()
+
+        self.assertEqual(sut.last_visibility['red'],
+                         (set([self.ship]), set()))
+
+
+class TestSimulationFleets(TestCase):
+    def setUp(self):
+        self.federation, self.klingon = Empire('Federation'), Empire('Klingon')
+        self.ships = [make_ship('Lead', speed=8, range=10, damage=10),
+                      make_ship('Slow', speed=3, range=10, damage=20)]
+        self.fleet = Fleet('Alpha', self.ships, self.federation)
+        self.fleet.set_course(Vector(100, 0))
+
+    def test_tick__grouped(self):
+        """Should move a grouped fleet at its slowest ship's speed"""
+        sut = Simulation([self.fleet], index=SpatialGrid(10, [self.fleet]))
+        sut.tick()
+
+        self.assertEqual(tuple(self.fleet.position), (3, 0))
+        self.assertTrue(self.fleet.grouped)
+
+    def test_tick__expanded(self):
+        """Should move an expanded fleet's ships one by one"""
+        index = SpatialGrid(10, [self.fleet])
+        sut = Simulation([self.fleet], index=index)
+        self.fleet.expand()
+        sut.tick()
+
+        self.assertEqual([tuple(ship.position) for ship in self.ships],
+                         [(8, 0), (3, 0)])
+        self.assertNotIn(self.fleet, index)
+        self.assertTrue(all(ship in index for ship in self.ships))
+
+    def test_tick__engage(self):
+        """Should expand a fleet with an enemy in range before fighting"""
+        enemy = make_ship('Enemy', Vector(8, 0), empire=self.klingon,
+                          hull=100, shield=0, speed=0, range=6, damage=0)
+        units = [self.fleet, enemy]
+        sut = Simulation(units, index=SpatialGrid(10, units),
+                         visibility=Visibility(10, units))
+        sut.tick()
+
+        self.assertFalse(self.fleet.grouped)
+        self.assertEqual(enemy.hull, 70)
+        self.assertEqual(sut.last_combat.damage[enemy], 30)
+        self.assertTrue(sut.visibility.can_see(self.klingon, self.ships[0]))
+        self.assertNotIn(self.fleet, sut.visibility)
+
+        enemy._die()
+        self.fleet.regroup()
+        sut.tick()
+        self.assertIn(self.fleet, sut.index)
+        self.assertFalse(any(ship in sut.index for ship in self.ships))
+
+    def test_init__journal(self):
+        """Should refuse a journal along with fleets"""
+        with self.assertRaises(ValueError):
+            Simulation([self.fleet], journal=Mock())
+
+    def test_add_ship__fleet_journal(self):
+        """Should refuse to add a fleet to a journaled simulation"""
+        sut = Simulation(self.ships[:1], journal=Mock())
+
+        with self.assertRaises(ValueError):
+            sut.add_ship(Fleet('Beta', [make_ship('Spare')], self.klingon))
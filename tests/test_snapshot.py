@@ -0,0 +1,181 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+from mock import patch
+
+import snapshot
+from colony import Colony, FARM, RESEARCH
+from empire import Empire
+from planet import Planet
+from ship import Ship
+from system import System
+from vector import Vector
+
+
+def make_world():
+    federation, klingon = Empire('Federation'), Empire('Klingon')
+    sol = System('Sol', Vector(0, 0))
+    vega = System('Vega', Vector(120.5, -40))
+    earth = Planet('large', 'terran', 'abundant')
+    sol.add_planet(earth, 2)
+    barren = Planet('small', 'barren', 'poor', special='ruins')
+    vega.add_planet(barren, 0)
+
+    colony = Colony(earth, federation, 'New Terra')
+    colony.add_colonists(4, FARM)
+    colony.add_colonists(2, RESEARCH)
+
+    enterprise = Ship('Enterprise', 100, 150, 30, 75, 25)
+    enterprise.empire, enterprise.system = federation, sol
+    enterprise._move_to(3.5, -2)
+    enterprise.set_course(Vector(120, -40))
+    bird = Ship('Bird of Prey', 60, 40, 35, 50, 30)
+    bird.empire = klingon
+    bird.take_damage(55)
+    bird.set_target(enterprise)
+    enterprise.set_target(bird)
+
+    return [federation, klingon], [sol, vega], [enterprise, bird]
+
+
+class TestSnapshot(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'game.snap')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def round_trip(self):
+        snapshot.save(self.path, *make_world())
+        with snapshot.load(self.path) as loaded:
+            return loaded.restore()
+
+    def assertRoundTrip(self):
+        empires, systems, ships = self.round_trip()
+        federation, klingon = empires
+        sol, vega = systems
+        enterprise, bird = ships
+
+        self.assertEqual([empire.name for empire in empires],
+                         ['Federation', 'Klingon'])
+        self.assertEqual(tuple(vega.position), (120.5, -40))
+        earth = sol.planets[0]
+        self.assertIs(earth.system, sol)
+        self.assertEqual((earth.orbit, earth.size, earth.biome,
+                          earth.minerals), (2, 'large', 'terran', 'abundant'))
+        self.assertEqual(vega.planets[0].special, 'ruins')
+        self.assertIsNone(earth.special)
+        self.assertIs(earth.colony.empire, federation)
+        self.assertEqual(str(earth), 'New Terra')
+        self.assertEqual(federation.food_output, 4)
+        self.assertEqual(federation.science_output, 2)
+
+        self.assertEqual(enterprise.status_report(),
+                         'Enterprise: shield:150/150, hull:100/100')
+        self.assertEqual(bird.status_report(),
+                         'Bird of Prey: shield:0/40, hull:45/60')
+        self.assertEqual(tuple(enterprise.position), (3.5, -2))
+        self.assertEqual(tuple(enterprise._destination), (120, -40))
+        self.assertIsNone(bird._destination)
+        self.assertIs(enterprise.empire, federation)
+        self.assertIs(enterprise.system, sol)
+        self.assertIsNone(bird.system)
+        self.assertIs(enterprise._target, bird)
+        self.assertIs(bird._target, enterprise)
+
+    def test_round_trip(self):
+        """Should restore every entity and reference"""
+        self.assertRoundTrip()
+
+    def test_round_trip__fallback(self):
+        """Should restore the same state without NumPy"""
+        with patch('snapshot.numpy', None):
+            self.assertRoundTrip()
+
+    def test_column(self):
+        """Should expose raw columns without restoring objects"""
+        snapshot.save(self.path, *make_world())
+        with snapshot.load(self.path) as loaded:
+            self.assertEqual(loaded.count('ships'), 2)
+            self.assertEqual(list(loaded.column('ships', 'hull')), [100, 45])
+            self.assertEqual(list(loaded.column('ships', 'target')), [1, 0])
+
+    def test_column__after_close(self):
+        """Should keep columns usable once the snapshot is closed"""
+        snapshot.save(self.path, *make_world())
+        with snapshot.load(self.path) as loaded:
+            hull = loaded.column('ships', 'hull')
+
+        self.assertEqual(sum(hull), 145)
+        with self.assertRaises(ValueError):
+            loaded.column('ships', 'hull')
+
+    def test_round_trip__number_types(self):
+        """Should give back ints and floats as they were saved"""
+        empires, systems, ships = make_world()
+        fresh = Ship('Fresh', 100, 50, 10, 20, 5)
+        fresh._move_to(4, 2.5)
+        ships.append(fresh)
+        ships[1].take_damage(0.5)
+        reports = [ship.status_report() for ship in ships]
+        snapshot.save(self.path, empires, systems, ships)
+
+        for numpy in (snapshot.numpy, None):
+            with patch('snapshot.numpy', numpy):
+                with snapshot.load(self.path) as loaded:
+                    _, _, restored = loaded.restore()
+            self.assertEqual([ship.status_report() for ship in restored],
+                             reports)
+            self.assertEqual([type(value) for value in restored[2].position],
+                             [int, float])
+
+    def test_load__not_a_snapshot(self):
+        """Should reject files that are not snapshots"""
+        with open(self.path, 'wb') as stream:
+            stream.write(b'definitely not a snapshot')
+
+        with self.assertRaises(snapshot.SnapshotError):
+            snapshot.load(self.path)
+
+    def test_load__other_version(self):
+        """Should reject snapshots from another format version"""
+        with open(self.path, 'wb') as stream:
+            stream.write(snapshot.HEADER.pack(snapshot.MAGIC, 99))
+
+        with self.assertRaises(snapshot.SnapshotError):
+            snapshot.load(self.path)
+
+    def test_load__empty(self):
+        """Should reject empty files"""
+        open(self.path, 'wb').close()
+
+        with self.assertRaises(snapshot.SnapshotError):
+            snapshot.load(self.path)
+
+    def test_load__truncated(self):
+        """Should reject snapshots cut short"""
+        snapshot.save(self.path, *make_world())
+        with open(self.path, 'rb') as stream:
+            data = stream.read()
+        with open(self.path, 'wb') as stream:
+            stream.write(data[:-10])
+
+        with self.assertRaises(snapshot.SnapshotError):
+            snapshot.load(self.path)
+
+    def test_load__closes_on_error(self):
+        """Should close the file when it is not a snapshot"""
+        with open(self.path, 'wb') as stream:
+            stream.write(b'definitely not a snapshot')
+        opened = []
+
+        def tracking_open(*args):
+            opened.append(open(*args))
+            return opened[-1]
+
+        with patch('snapshot.open', tracking_open, create=True):
+            with self.assertRaises(snapshot.SnapshotError):
+                snapshot.load(self.path)
+        self.assertTrue(opened[0].closed)
@@ -0,0 +1,138 @@
+import random
+from unittest import TestCase
+
+from helpers import make_ship
+from spatial import SpatialGrid
+from vector import Vector
+
+
+class TestSpatialGrid(TestCase):
+    def setUp(self):
+        rng = random.Random(1701)
+        self.ships = [make_ship('Blip', Vector(rng.uniform(-100, 100),
+                                               rng.uniform(-100, 100)))
+                      for _ in range(300)]
+        self.sut = SpatialGrid(15, self.ships)
+
+    def brute_force(self, position, radius):
+        return set(ship for ship in self.ships
+                   if (ship.position - position).norm() <= radius)
+
+    def test_construct__bad_cell_size(self):
+        """Should reject non-positive cell sizes"""
+        with self.assertRaises(ValueError):
+            SpatialGrid(0)
+
+    def test_insert__twice(self):
+        """Should refuse to file the same ship twice"""
+        with self.assertRaises(ValueError):
+            self.sut.insert(self.ships[0])
+
+    def test_query_radius(self):
+        """Should find exactly the ships a brute force scan finds"""
+        for position in (Vector(0, 0), Vector(-90, 40), Vector(33.3, -71)):
+            found = self.sut.query_radius(position, 27)
+            self.assertEqual(set(found), self.brute_force(position, 27))
+
+    def test_query_radius__predicate(self):
+        """Should filter results through the predicate"""
+        found = self.sut.query_radius(Vector(0, 0), 50, lambda s: False)
+        self.assertEqual(found, [])
+
+    def test_nearest(self):
+        """Should find the same ship as a brute force scan"""
+        for position in (Vector(0, 0), Vector(-250, 300), Vector(12, -7)):
+            expected = min(self.ships,
+                           key=lambda s: (s.position - position).norm())
+            self.assertIs(self.sut.nearest(position), expected)
+
+    def test_nearest__max_radius(self):
+        """Should ignore ships beyond the radius"""
+        self.assertIsNone(self.sut.nearest(Vector(1000, 1000), 50))
+
+    def test_nearest__empty(self):
+        """Should return None for an empty grid"""
+        self.assertIsNone(SpatialGrid(10).nearest(Vector(0, 0)))
+
+    def test_update(self):
+        """Should find a ship at its new position after it moves"""
+        ship = self.ships[0]
+        ship._move_to(500, 500)
+        self.sut.update(ship)
+
+        self.assertEqual(self.sut.query_radius(Vector(500, 500), 1), [ship])
+        self.assertEqual(len(self.sut), len(self.ships))
+
+    def test_remove(self):
+        """Should no longer find a removed ship"""
+        ship = self.ships[0]
+        self.sut.remove(ship)
+
+        self.assertNotIn(ship, self.sut)
+        self.assertNotIn(ship, self.sut.query_radius(ship.position, 1))
+
+    def test_neighbourhoods(self):
+        """Should group ships by cell, every ship in range a candidate"""
+        ships = self.ships[:60]
+        groups = list(self.sut.neighbourhoods(ships, 27))
+
+        self.assertItemsEqual([ship for group, _ in groups for ship in group],
+                              ships)
+        for group, candidates in groups:
+            for ship in group:
+                self.assertLessEqual(self.brute_force(ship.position, 27),
+                                     set(candidates))
+
+    def test_around(self):
+        """Should offer every ship in range of anywhere in the cell"""
+        ship = self.ships[0]
+        cell = self.sut.cell(ship)
+        candidates = set(self.sut.around(cell, 27))
+
+        self.assertIn(ship, self.sut.in_cell(cell))
+        for corner in [(0, 0), (1, 0), (0, 1), (1, 1)]:
+            position = Vector((cell[0] + corner[0]) * self.sut.cell_size,
+                              (cell[1] + corner[1]) * self.sut.cell_size)
+            self.assertLessEqual(self.brute_force(position, 27), candidates)
+
+
+class TestTargeting(TestCase):
+    def setUp(self):
+        self.attacker = make_ship('Attacker', Vector(0, 0),
+                                  empire='Federation')
+        self.friend = make_ship('Friend', Vector(1, 0), empire='Federation')
+        self.near = make_ship('Near', Vector(0, 6), empire='Klingon')
+        self.far = make_ship('Far', Vector(0, 30), empire='Klingon')
+        self.sut = SpatialGrid(
+            5, [self.attacker, self.friend, self.near, self.far])
+
+    def test_enemies_in_range(self):
+        """Should only return enemies within the ship's range"""
+        self.assertEqual(self.sut.enemies_in_range(self.attacker),
+                         [self.near])
+
+    def test_nearest_enemy(self):
+        """Should skip friendly ships"""
+        self.assertIs(self.sut.nearest_enemy(self.attacker), self.near)
+
+    def test_process_attack__acquires_target(self):
+        """Should pick the nearest enemy and damage it"""
+        self.attacker._process_attack(self.sut)
+
+        self.assertIs(self.attacker._target, self.near)
+        self.assertEqual(self.near.shield, 25)
+
+    def test_process_attack__out_of_range(self):
+        """Should not damage a target out of range"""
+        self.attacker.set_target(self.far)
+        self.attacker._process_attack(self.sut)
+
+        self.assertEqual(self.far.shield, self.far.max_shield)
+
+    def test_process_attack__dead_target(self):
+        """Should drop a dead target and pick a new one"""
+        self.attacker.set_target(self.far)
+        self.far._die()
+        self.attacker._process_attack(self.sut)
+
+        self.assertIs(self.attacker._target, self.near)
@@ -0,0 +1,105 @@
+from unittest import TestCase
+
+from planet import Planet
+from system import System, FIRST_FREE, ALL_FREE
+from vector import Vector
+
+
+def planet():
+    return Planet('medium', 'terran', 'abundant')
+
+
+class TestSystem(TestCase):
+    def setUp(self):
+        self.sut = System('Sol', Vector(0, 0))
+
+    def test_first_free(self):
+        """Should know the lowest free orbit of every bitmap"""
+        self.assertEqual(FIRST_FREE[ALL_FREE], 0)
+        self.assertEqual(FIRST_FREE[0b11100], 2)
+        self.assertIsNone(FIRST_FREE[0])
+
+    def test_add_planet(self):
+        """Should fill the innermost free orbit and set back-references"""
+        first, second = planet(), planet()
+        self.sut.add_planet(first, 1)
+
+        self.assertEqual(self.sut.add_planet(second), 0)
+        self.assertEqual(self.sut.planets, [second, first])
+        self.assertIs(first.system, self.sut)
+        self.assertEqual(first.orbit, 1)
+        self.assertEqual(self.sut.first_free_orbit(), 2)
+
+    def test_add_planet__taken(self):
+        """Should refuse an orbit that already has a planet"""
+        self.sut.add_planet(planet(), 3)
+
+        with self.assertRaises(ValueError):
+            self.sut.add_planet(planet(), 3)
+
+    def test_add_planet__out_of_range(self):
+        """Should refuse orbits outside the table"""
+        with self.assertRaises(ValueError):
+            self.sut.add_planet(planet(), -1)
+        with self.assertRaises(ValueError):
+            self.sut.add_planet(planet(), 5)
+
+    def test_add_planet__full(self):
+        """Should refuse a sixth planet"""
+        for _ in range(5):
+            self.sut.add_planet(planet())
+
+        self.assertIsNone(self.sut.first_free_orbit())
+        with self.assertRaises(ValueError):
+            self.sut.add_planet(planet())
+
+    def test_add_planet__moves(self):
+        """Should take the planet out of its previous system"""
+        moved = planet()
+        self.sut.add_planet(moved, 2)
+        other = System('Vega', Vector(5, 5))
+        other.add_planet(moved)
+
+        self.assertTrue(self.sut.is_free(2))
+        self.assertEqual(self.sut.planets, [])
+        self.assertEqual((moved.system, moved.orbit), (other, 0))
+
+    def test_remove_planet(self):
+        """Should free the orbit and clear the back-references"""
+        removed = planet()
+        self.sut.add_planet(removed, 4)
+        self.sut.remove_planet(removed)
+
+        self.assertTrue(self.sut.is_free(4))
+        self.assertIsNone(removed.system)
+        self.assertIsNone(removed.orbit)
+        with self.assertRaises(ValueError):
+            self.sut.remove_planet(removed)
+
+    def test_populate(self):
+        """Should fill every orbit in the bitmap, innermost first"""
+        planets = [planet(), planet(), planet()]
+        self.sut.populate(0b10110, planets)
+
+        self.assertEqual(self.sut.orbits, [None, planets[0], planets[1],
+                                           None, planets[2]])
+        self.assertEqual([p.orbit for p in planets], [1, 2, 4])
+        self.assertEqual(self.sut.first_free_orbit(), 0)
+
+    def test_populate__taken(self):
+        """Should refuse a batch overlapping a taken orbit"""
+        self.sut.add_planet(planet(), 2)
+
+        with self.assertRaises(ValueError):
+            self.sut.populate(0b00110, [planet(), planet()])
+        self.assertEqual(len(self.sut.planets), 1)
+
+    def test_populate__mismatch(self):
+        """Should refuse bad orbits or planet counts, changing nothing"""
+        for occupied, count in ((0b00110, 1), (0b00110, 3), (0b100000, 1),
+                                (-1, 5)):
+            with self.assertRaises(ValueError):
+                self.sut.populate(occupied, [planet() for _ in range(count)])
+
+        self.assertEqual(self.sut.orbits, [None] * 5)
+        self.assertEqual(self.sut.first_free_orbit(), 0)
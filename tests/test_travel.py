@@ -0,0 +1,149 @@
+import random
+from unittest import TestCase
+
+from system import System
+from travel import INFINITY, TravelGraph
+from vector import Vector
+
+
+def make_systems(*positions):
+    return [System('System {}'.format(number), Vector(*position))
+            for number, position in enumerate(positions)]
+
+
+class TestTravelGraph(TestCase):
+    def setUp(self):
+        # A square with one diagonal, and a tail off the far corner:
+        #   0 - 1
+        #   | / |
+        #   3 - 2 - 4
+        self.systems = make_systems((0, 0), (10, 0), (10, 10), (0, 10),
+                                    (20, 10))
+        a, b, c, d, e = self.systems
+        self.sut = TravelGraph(self.systems,
+                               [(a, b), (b, c), (c, d), (d, a), (b, d),
+                                (c, e)])
+
+    def assertMatchesRebuild(self, graph):
+        """Asserts the tables agree with ones built from scratch"""
+        fresh = TravelGraph(graph.systems)
+        for system in graph.systems:
+            for other, length in graph.lanes(system):
+                fresh.add_lane(system, other, length)
+        for origin in graph.systems:
+            for destination in graph.systems:
+                expected = fresh.distance(origin, destination)
+                actual = graph.distance(origin, destination)
+                if expected == INFINITY:
+                    self.assertEqual(actual, INFINITY)
+                    self.assertEqual(graph.route(origin, destination), ())
+                    continue
+                self.assertAlmostEqual(actual, expected)
+                route = graph.route(origin, destination)
+                self.assertEqual(route[0], origin)
+                self.assertEqual(route[-1], destination)
+                self.assertAlmostEqual(
+                    sum(dict(graph.lanes(here))[there]
+                        for here, there in zip(route, route[1:])),
+                    expected)
+
+    def test_distance(self):
+        """Should give the length of the shortest route"""
+        a, b, c, d, e = self.systems
+        self.assertEqual(self.sut.distance(a, e), 30)
+        self.assertEqual(self.sut.distance(c, c), 0)
+
+    def test_route(self):
+        """Should list every system along the shortest route"""
+        a, b, c, d, e = self.systems
+        self.assertIn(self.sut.route(a, e), ((a, b, c, e), (a, d, c, e)))
+        self.assertEqual(self.sut.route(e, e), (e,))
+
+    def test_next_hop(self):
+        """Should give the first system along the route"""
+        a, b, c, d, e = self.systems
+        self.assertEqual(self.sut.next_hop(b, d), d)
+        self.assertEqual(self.sut.next_hop(e, a), c)
+
+    def test_unreachable(self):
+        """Should report no route to systems with no lanes"""
+        lonely = System('Lonely', Vector(500, 500))
+        self.sut.add_system(lonely)
+
+        self.assertEqual(self.sut.distance(self.systems[0], lonely), INFINITY)
+        self.assertIsNone(self.sut.next_hop(self.systems[0], lonely))
+        self.assertEqual(self.sut.route(lonely, self.systems[0]), ())
+
+    def test_add_lane__updates_routes(self):
+        """Should reroute through a new shortcut"""
+        a, b, c, d, e = self.systems
+        self.sut.distance(a, e)
+        self.sut.add_lane(a, e, 5)
+
+        self.assertEqual(self.sut.distance(d, e), 15)
+        self.assertEqual(self.sut.route(d, e), (d, a, e))
+        self.assertMatchesRebuild(self.sut)
+
+    def test_remove_lane__updates_routes(self):
+        """Should route around a removed lane, or find there is no route"""
+        a, b, c, d, e = self.systems
+        self.sut.build()
+        self.sut.remove_lane(b, d)
+        self.assertAlmostEqual(self.sut.distance(b, d), 20)
+
+        self.sut.remove_lane(c, e)
+        self.assertEqual(self.sut.distance(a, e), INFINITY)
+        self.assertMatchesRebuild(self.sut)
+
+    def test_remove_lane__missing(self):
+        """Should refuse to remove a lane that is not there"""
+        a, b, c, d, e = self.systems
+        with self.assertRaises(ValueError):
+            self.sut.remove_lane(a, e)
+
+    def test_add_lane__unknown_system(self):
+        """Should refuse lanes to systems outside the graph"""
+        with self.assertRaises(ValueError):
+            self.sut.add_lane(self.systems[0], System('Elsewhere', Vector()))
+
+    def test_incremental__random(self):
+        """Should keep the tables right through many lane changes"""
+        rng = random.Random(3)
+        systems = make_systems(*[(rng.uniform(0, 100), rng.uniform(0, 100))
+                                 for _ in range(25)])
+        sut = TravelGraph.from_proximity(systems, 30)
+        sut.build()
+
+        for _ in range(60):
+            a, b = rng.sample(systems, 2)
+            if rng.random() < 0.4 and dict(sut.lanes(a)).get(b) is not None:
+                sut.remove_lane(a, b)
+            else:
+                sut.add_lane(a, b, rng.uniform(1, 80))
+        self.assertMatchesRebuild(sut)
+
+    def test_from_proximity(self):
+        """Should join systems close enough together, and only those"""
+        a, b, c, d, e = self.systems
+        sut = TravelGraph.from_proximity(self.systems, 10)
+
+        self.assertEqual(sut.lanes(c), [(b, 10), (d, 10), (e, 10)])
+        self.assertEqual(sut.distance(a, c), 20)
+
+    def test_next_hops(self):
+        """Should answer many trips at once, like next_hop"""
+        a, b, c, d, e = self.systems
+        origins = [a, e, c, b]
+        destinations = [e, a, c, d]
+
+        self.assertEqual(self.sut.next_hops(origins, destinations),
+                         [self.sut.next_hop(*trip)
+                          for trip in zip(origins, destinations)])
+
+    def test_routes(self):
+        """Should share one route between identical trips"""
+        a, b, c, d, e = self.systems
+        routes = self.sut.routes([a, a, e], [e, e, b])
+
+        self.assertIs(routes[0], routes[1])
+        self.assertEqual(routes[2], (e, c, b))
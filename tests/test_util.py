@@ -0,0 +1,22 @@
+from unittest import TestCase
+
+import util
+import vector
+
+
+class TestUtil(TestCase):
+    def test_vector(self):
+        """Should be the same class as vector.Vector"""
+        self.assertIs(util.Vector, vector.Vector)
+
+    def test_get_direction_vector(self):
+        """Should return the unit vector from a to b"""
+        direction = util.get_direction_vector(util.Vector(1, 2),
+                                              util.Vector(4, -2))
+        self.assertAlmostEqual(direction.x, 0.6)
+        self.assertAlmostEqual(direction.y, -0.8)
+
+    def test_get_direction_vector__same_position(self):
+        """Should return the zero vector rather than dividing by zero"""
+        direction = util.get_direction_vector((3, 3), (3, 3))
+        self.assertEqual((direction.x, direction.y), (0, 0))
@@ -1,7 +1,10 @@
+import math
+import pickle
 from unittest import TestCase
 from mock import patch
 
-from vector import Vector, TAU
+from vector import (Vector, TAU, UNIT_X, UNIT_Y, ZERO, direction_vector,
+                    direction_vectors, rotate_all, rotation_matrix)
 
 
 class TestVector(TestCase):
@@ -160,3 +163,131 @@ class TestVector(TestCase):
         sut = Vector(2, -4)
 
         self.assertEqual(sut.y, -4)
+
+    def test_slots(self):
+        """Should not carry a per-instance dict"""
+        sut = Vector(1, 2)
+
+        with self.assertRaises(AttributeError):
+            sut.__dict__
+
+    def test_norm__memoized(self):
+        """Should only compute the norm once"""
+        sut = Vector(3, 4)
+        sut.norm()
+
+        with patch('vector.math.sqrt') as sqrt_mock:
+            self.assertEqual(sut.norm(), 5)
+        self.assertFalse(sqrt_mock.called)
+
+    def test_norm__3d(self):
+        """Should handle vectors of other dimensions"""
+        sut = Vector(2, 3, 6)
+        self.assertEqual(sut.norm(), 7)
+
+    def test_add__3d(self):
+        """Should add vectors of other dimensions component-wise"""
+        sut = Vector(1, 2, 3) + Vector(4, 5, 6)
+        self.assertItemsEqual(sut, (5, 7, 9))
+
+    def test_add__tuple(self):
+        """Should still add plain sequences"""
+        sut = Vector(1, 2) + (3, 4)
+        self.assertItemsEqual(sut, (4, 6))
+
+    def test_matrix_mult(self):
+        """Should multiply by a 2x2 matrix"""
+        sut = Vector(1, 2).matrix_mult(((0.5, -1.5), (2, 0.25)))
+        self.assertItemsAlmostEqual(sut, (-2.5, 2.5))
+
+    def test_matrix_mult__mismatch(self):
+        """Should refuse a matrix of the wrong size"""
+        with self.assertRaises(AssertionError):
+            Vector(1, 2).matrix_mult(((1, 0, 0), (0, 1, 0)))
+
+    def test_constants(self):
+        """Should provide the zero vector and unit axes"""
+        self.assertItemsEqual(ZERO, (0, 0))
+        self.assertItemsEqual(UNIT_X, (1, 0))
+        self.assertItemsEqual(UNIT_Y, (0, 1))
+
+    def test_pickle(self):
+        """Should survive a pickle round trip"""
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            sut = pickle.loads(pickle.dumps(Vector(1.5, -2), protocol))
+            self.assertEqual(sut.values, (1.5, -2))
+            self.assertEqual(sut.norm(), 2.5)
+
+    def test_rotate_by_angle__matches_trigonometry(self):
+        """Should agree with rotating by cos and sin directly"""
+        sut = Vector(3, -4.5)
+        for theta in (0.1, 1, TAU / 3, -2.5):
+            dc, ds = math.cos(theta), math.sin(theta)
+            self.assertItemsAlmostEqual(sut.rotate_by_angle(theta),
+                                        (dc * 3 + ds * 4.5,
+                                         ds * 3 - dc * 4.5))
+
+    def test_rotation_matrix__cached(self):
+        """Should only work out each rotation once"""
+        first = rotation_matrix(1.25)
+
+        with patch('vector.math.cos') as cos_mock:
+            self.assertIs(rotation_matrix(1.25), first)
+        self.assertFalse(cos_mock.called)
+
+    def test_rotation_matrix__degrees(self):
+        """Should cache degrees apart from radians"""
+        degrees = rotation_matrix(90, Vector.UNIT_DEGREES)
+        self.assertItemsAlmostEqual(degrees[0], (0, -1))
+        self.assertItemsAlmostEqual(rotation_matrix(90)[0],
+                                    (math.cos(90), -math.sin(90)))
+
+    def test_rotate_all(self):
+        """Should rotate every vector like rotate_by_angle does"""
+        vectors = [Vector(3, 2), Vector(-1, 0.5), Vector(0, -7)]
+        rotated = rotate_all(vectors, TAU / 7)
+
+        for vector, result in zip(vectors, rotated):
+            self.assertEqual(result.values,
+                             vector.rotate_by_angle(TAU / 7).values)
+
+    def test_pseudo_argument(self):
+        """Should order directions the same way as argument"""
+        vectors = [Vector(math.sin(angle), math.cos(angle)) * length
+                   for angle, length in ((5.5, 1), (0.3, 2), (3.1, 0.5),
+                                         (TAU / 2, 4), (0, 3), (1.7, 1),
+                                         (4.2, 9))]
+        vectors.append(Vector(-1, 0))
+
+        self.assertEqual(sorted(vectors, key=Vector.pseudo_argument),
+                         sorted(vectors, key=Vector.argument))
+        self.assertEqual(Vector(0, 5).pseudo_argument(), 0)
+        self.assertEqual(Vector(2, 0).pseudo_argument(), 1)
+        self.assertEqual(Vector(0, -1).pseudo_argument(), 2)
+        self.assertEqual(Vector(-3, 0).pseudo_argument(), 3)
+
+    def test_direction_vectors(self):
+        """Should return unit vectors from each origin to its destination"""
+        origins = [Vector(1, 1), (0, 0), Vector(-2, 5)]
+        destinations = [Vector(4, 5), Vector(0, -3), (-2, 5)]
+
+        directions = direction_vectors(origins, destinations)
+
+        self.assertItemsAlmostEqual(directions[0], (0.6, 0.8))
+        self.assertItemsAlmostEqual(directions[1], (0, -1))
+        self.assertEqual(directions[0].norm(), 1.0)
+
+    def test_direction_vectors__zero_length(self):
+        """Should give the zero vector when there is nowhere to go"""
+        directions = direction_vectors([Vector(-2, 5)], [Vector(-2, 5)])
+        self.assertEqual(directions[0].values, (0, 0))
+
+    def test_direction_vectors__mismatched(self):
+        """Should refuse different numbers of origins and destinations"""
+        with self.assertRaises(ValueError):
+            direction_vectors([Vector(1, 1)], [])
+
+    def test_direction_vector(self):
+        """Should match the batched version for a single pair"""
+        self.assertEqual(direction_vector(Vector(1, 1), Vector(1, -4)).values,
+                         (0, -1))
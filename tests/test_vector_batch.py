@@ -0,0 +1,120 @@
+from unittest import TestCase
+from mock import patch
+
+from vector import Vector, TAU
+from vector_batch import VectorBatch
+
+
+VECTORS = [Vector(3, 4), Vector(-1.5, 2), Vector(7, -2), Vector(0.25, 9)]
+OTHERS = [Vector(1, 1), Vector(4, -3), Vector(-6, 0.5), Vector(2, 2)]
+
+
+class TestVectorBatch(TestCase):
+    def assertVectorsAlmostEqual(self, actual, expected):
+        """Asserts both sequences hold the same vectors to 7 decimal places"""
+        self.assertEqual(len(actual), len(expected))
+        for a, b in zip(actual, expected):
+            self.assertAlmostEqual(a[0], b[0])
+            self.assertAlmostEqual(a[1], b[1])
+
+    def setUp(self):
+        self.sut = VectorBatch.from_vectors(VECTORS)
+        self.other = VectorBatch.from_vectors(OTHERS)
+
+    def test_construct__mismatched(self):
+        """Should raise when component lengths differ"""
+        with self.assertRaises(ValueError):
+            VectorBatch([1, 2], [3])
+
+    def test_round_trip(self):
+        """Should convert to and from lists of Vectors"""
+        self.assertVectorsAlmostEqual(self.sut.to_vectors(), VECTORS)
+        self.assertVectorsAlmostEqual(list(self.sut), VECTORS)
+
+    def test_add__batch(self):
+        """Should match Vector addition"""
+        expected = [a + b for a, b in zip(VECTORS, OTHERS)]
+        self.assertVectorsAlmostEqual(self.sut + self.other, expected)
+
+    def test_add__vector(self):
+        """Should broadcast a single Vector across the batch"""
+        offset = Vector(1, -1)
+        expected = [a + offset for a in VECTORS]
+        self.assertVectorsAlmostEqual(self.sut + offset, expected)
+
+    def test_sub__batch(self):
+        """Should match Vector subtraction"""
+        expected = [a - b for a, b in zip(VECTORS, OTHERS)]
+        self.assertVectorsAlmostEqual(self.sut - self.other, expected)
+
+    def test_mul__number(self):
+        """Should match Vector scalar multiplication"""
+        expected = [a * 2.5 for a in VECTORS]
+        self.assertVectorsAlmostEqual(self.sut * 2.5, expected)
+        self.assertVectorsAlmostEqual(2.5 * self.sut, expected)
+
+    def test_mul__string(self):
+        """Should raise exception"""
+        with self.assertRaises(TypeError):
+            self.sut * 'string'
+
+    def test_dot(self):
+        """Should match Vector dot products"""
+        expected = [a * b for a, b in zip(VECTORS, OTHERS)]
+        for actual, value in zip(self.sut * self.other, expected):
+            self.assertAlmostEqual(actual, value)
+
+    def test_norm(self):
+        """Should match Vector norms"""
+        for actual, vector in zip(self.sut.norm(), VECTORS):
+            self.assertAlmostEqual(actual, vector.norm())
+
+    def test_normalize(self):
+        """Should match Vector unit vectors"""
+        expected = [v.normalize() for v in VECTORS]
+        self.assertVectorsAlmostEqual(self.sut.normalize(), expected)
+
+    def test_normalize__zero(self):
+        """Should raise ZeroDivisionError, like Vector"""
+        with self.assertRaises(ZeroDivisionError):
+            VectorBatch([1, 0], [0, 0]).normalize()
+
+    def test_normalize__safe(self):
+        """Should leave zero vectors as they are when asked to"""
+        self.assertVectorsAlmostEqual(
+            VectorBatch([3, 0], [4, 0]).normalize(safe=True),
+            [(0.6, 0.8), (0, 0)])
+
+    def test_scale(self):
+        """Should scale each vector by its own factor"""
+        factors = [1, 2, 3, 4]
+        expected = [v * f for v, f in zip(VECTORS, factors)]
+        self.assertVectorsAlmostEqual(self.sut.scale(factors), expected)
+
+    def test_rotate_by_angle(self):
+        """Should match Vector rotation"""
+        expected = [v.rotate_by_angle(TAU / 3) for v in VECTORS]
+        self.assertVectorsAlmostEqual(self.sut.rotate_by_angle(TAU / 3),
+                                      expected)
+
+    def test_rotate_by_angle__degrees(self):
+        """Should match Vector rotation in degrees"""
+        expected = [v.rotate_by_angle(90, unit=Vector.UNIT_DEGREES)
+                    for v in VECTORS]
+        rotated = self.sut.rotate_by_angle(90, unit=VectorBatch.UNIT_DEGREES)
+        self.assertVectorsAlmostEqual(rotated, expected)
+
+    def test_matrix_mult(self):
+        """Should match Vector matrix multiplication"""
+        matrix = ((1, 2), (-3, 0.5))
+        expected = [v.matrix_mult(matrix) for v in VECTORS]
+        self.assertVectorsAlmostEqual(self.sut.matrix_mult(matrix), expected)
+
+
+class TestVectorBatchFallback(TestVectorBatch):
+    """Runs the same checks against the pure-Python backend"""
+    def setUp(self):
+        patcher = patch('vector_batch.numpy', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        super(TestVectorBatchFallback, self).setUp()
@@ -0,0 +1,135 @@
+import random
+from unittest import TestCase
+from mock import patch
+
+from planet import Planet
+from helpers import make_ship
+from system import System
+from vector import Vector
+from visibility import Visibility
+
+
+class TestVisibility(TestCase):
+    def setUp(self):
+        self.scout = make_ship('Scout', Vector(0, 0), empire='red')
+        self.raider = make_ship('Raider', Vector(8, 0), empire='blue')
+        self.far = make_ship('Far', Vector(100, 100), empire='blue')
+        self.system = System('Sol', Vector(0, 9))
+        self.planet = Planet('medium', 'terran', 'abundant', None)
+        self.system.add_planet(self.planet)
+        self.sut = Visibility(10, [self.scout, self.raider, self.far],
+                              [self.system])
+
+    def assertMatchesBruteForce(self, sut, ships, systems):
+        """Asserts every empire sees what checking every pair would find"""
+        for empire in set(ship.empire for ship in ships):
+            observers = [ship for ship in ships
+                         if ship.empire == empire and ship._active]
+            expected = set(entity for entity in
+                           [ship for ship in ships if ship._active] + systems
+                           if any((entity.position - observer.position).norm()
+                                  <= observer.range
+                                  for observer in observers))
+            self.assertEqual(sut.visible_ships(empire) |
+                             sut.visible_systems(empire), expected)
+
+    def test_visible(self):
+        """Should see own ships and whatever is within sensor range"""
+        self.assertEqual(self.sut.visible_ships('red'),
+                         set([self.scout, self.raider]))
+        self.assertEqual(self.sut.visible_systems('red'), set([self.system]))
+        self.assertEqual(self.sut.visible_ships('blue'),
+                         set([self.scout, self.raider, self.far]))
+        self.assertEqual(self.sut.visible_systems('blue'), set())
+
+    def test_visible_planets(self):
+        """Should see the planets of visible systems"""
+        self.assertEqual(self.sut.visible_planets('red'), [self.planet])
+        self.assertTrue(self.sut.can_see('red', self.planet))
+        self.assertFalse(self.sut.can_see('blue', self.planet))
+
+    def test_update(self):
+        """Should report what came into and dropped out of view"""
+        self.raider._move_to(Vector(4, 9))
+        self.far._move_to(Vector(5, 5))
+
+        changes = self.sut.update([self.raider, self.far])
+
+        self.assertEqual(changes['red'], (set([self.far]), set()))
+        self.assertEqual(changes['blue'], (set([self.system]), set()))
+
+    def test_update__no_change(self):
+        """Should leave out empires whose view did not change"""
+        self.far._move_to(Vector(120, 100))
+        self.assertEqual(self.sut.update([self.far]), {})
+
+    def test_update__destroyed(self):
+        """Should forget destroyed ships, and what only they could see"""
+        self.scout._active = False
+
+        changes = self.sut.update([], [self.scout])
+
+        self.assertEqual(changes['red'],
+                         (set(), set([self.scout, self.raider, self.system])))
+        self.assertEqual(changes['blue'], (set(), set([self.scout])))
+        self.assertFalse(self.sut.can_see('blue', self.scout))
+
+    def test_add(self):
+        """Should start seeing with, and showing, a new ship"""
+        probe = make_ship('Probe', Vector(5, 5), empire='green')
+        self.sut.add(probe)
+
+        self.assertEqual(self.sut.visible_ships('green'),
+                         set([probe, self.scout, self.raider]))
+        self.assertTrue(self.sut.can_see('red', probe))
+        self.assertEqual(self.sut.update()['green'][0],
+                         set([probe, self.scout, self.raider, self.system]))
+
+    def test_refresh(self):
+        """Should pick up a changed sensor range"""
+        self.scout.range = 200
+        self.sut.refresh(self.scout)
+
+        self.assertTrue(self.sut.can_see('red', self.far))
+
+    def test_sensor_range(self):
+        """Should use the given sensor range instead of weapon range"""
+        sut = Visibility(10, [self.scout, self.raider, self.far],
+                         [self.system], sensor_range=lambda ship: 200)
+        self.assertEqual(sut.visible_ships('red'),
+                         set([self.scout, self.raider, self.far]))
+
+    def assertAgreesOverRandomTurns(self):
+        """Asserts a random galaxy matches checking every pair, turn by turn"""
+        rng = random.Random(5)
+        ships = [make_ship('Ship {}'.format(number),
+                           Vector(rng.uniform(0, 200), rng.uniform(0, 200)),
+                           empire=number % 4, range=rng.uniform(5, 40))
+                 for number in range(60)]
+        systems = [System('System {}'.format(number),
+                          Vector(rng.uniform(0, 200), rng.uniform(0, 200)))
+                   for number in range(20)]
+        sut = Visibility(20, ships, systems)
+        self.assertMatchesBruteForce(sut, ships, systems)
+
+        for _ in range(10):
+            moved = rng.sample(ships, 15)
+            for ship in moved:
+                ship._move_to(ship.position +
+                              Vector(rng.uniform(-15, 15),
+                                     rng.uniform(-15, 15)))
+            destroyed = [ship for ship in rng.sample(ships, 2)
+                         if ship._active]
+            for ship in destroyed:
+                ship._active = False
+            sut.update(moved, destroyed)
+            self.assertMatchesBruteForce(sut, ships, systems)
+
+    def test_update__random(self):
+        """Should always agree with checking every pair"""
+        self.assertAgreesOverRandomTurns()
+
+    def test_update__random_fallback(self):
+        """Should always agree with checking every pair without NumPy"""
+        with patch('visibility.numpy', None):
+            self.assertAgreesOverRandomTurns()
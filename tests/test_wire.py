@@ -0,0 +1,214 @@
+import json
+from unittest import TestCase
+
+import wire
+from colony import Colony, BUILD, FARM
+from empire import Empire
+from planet import Planet
+from ship import Ship
+from wire import DeltaDecoder, DeltaEncoder
+
+
+def make_ships(count):
+    ships = []
+    for number in range(count):
+        ship = Ship('Ship {}'.format(number), 100, 50, 4, 20, 10)
+        ship._move_to(number * 10.5, -number * 3.25)
+        ships.append(ship)
+    return ships
+
+
+def fly(ships, turns=1):
+    for _ in range(turns):
+        for ship in ships:
+            ship._process_move()
+
+
+class TestDeltaEncoder(TestCase):
+    def setUp(self):
+        self.ships = make_ships(5)
+        self.colony = Colony(Planet('huge', 'terran', 'rich'),
+                             Empire('Federation'))
+        self.colony.add_colonists(3, FARM)
+        self.sut = DeltaEncoder()
+        self.decoder = DeltaDecoder()
+
+    def send(self, turn):
+        return self.decoder.feed(self.sut.encode(turn, self.ships,
+                                                 [self.colony]))
+
+    def assertDecoded(self, decoder=None):
+        decoder = decoder or self.decoder
+        for index, ship in enumerate(self.ships):
+            x, y, shield, hull, active = decoder.ships[index]
+            self.assertAlmostEqual(x, ship.position[0],
+                                   delta=wire.QUANTUM / 2)
+            self.assertAlmostEqual(y, ship.position[1],
+                                   delta=wire.QUANTUM / 2)
+            self.assertEqual(shield, round(ship.shield))
+            self.assertEqual(hull, round(ship.hull))
+            self.assertEqual(active, ship._active)
+        self.assertEqual(decoder.colonies[0],
+                         [self.colony.job_count(job) for job in wire.JOBS])
+
+    def test_encode__first(self):
+        """Should send every ship and colony in full the first time"""
+        frames = self.send(0)
+
+        self.assertEqual(frames, [(0, [0, 1, 2, 3, 4], [0])])
+        self.assertDecoded()
+
+    def test_encode__unchanged(self):
+        """Should send no records when nothing changed"""
+        self.send(0)
+        frame = self.sut.encode(1, self.ships, [self.colony])
+
+        self.assertEqual(len(frame), wire.FRAME.size)
+        self.assertEqual(self.decoder.feed(frame), [(1, [], [])])
+
+    def test_encode__changed_fields(self):
+        """Should only send the fields that changed"""
+        self.send(0)
+        self.ships[3].take_damage(20)
+        self.colony.add_colonists(1, BUILD)
+
+        frame = self.sut.encode(1, self.ships, [self.colony])
+        layout = wire.SHIP_LAYOUTS[wire.SHIELD]
+        self.assertEqual(len(frame), wire.FRAME.size + layout.size +
+                         wire.COLONY_LAYOUTS[wire.COLONY | 0b010].size)
+        self.assertEqual(layout.unpack_from(frame, wire.FRAME.size),
+                         (wire.SHIELD, 4, 30))
+
+        self.assertEqual(self.decoder.feed(frame), [(1, [3], [0])])
+        self.assertDecoded()
+
+    def test_encode__moving(self):
+        """Should only send the positions of ships that change how they move
+        """
+        for ship in self.ships:
+            ship.set_course(ship.position[0] + 100, ship.position[1])
+        self.send(0)
+        fly(self.ships)
+        self.send(1)
+        fly(self.ships)
+
+        self.ships[2].set_course(self.ships[2].position)
+        frame = self.sut.encode(2, self.ships, [self.colony])
+        self.assertEqual(len(frame), wire.FRAME.size)
+        self.assertEqual(self.decoder.feed(frame),
+                         [(2, [0, 1, 2, 3, 4], [])])
+        self.assertDecoded()
+
+        fly(self.ships)
+        frame = self.sut.encode(3, self.ships, [self.colony])
+        self.assertEqual(len(frame), wire.FRAME.size +
+                         wire.SHIP_LAYOUTS[wire.X].size)
+        self.decoder.feed(frame)
+        self.assertDecoded()
+
+    def test_encode__destroyed(self):
+        """Should flag ships that were destroyed"""
+        self.send(0)
+        self.ships[1].take_damage(1000)
+
+        self.assertEqual(self.send(1), [(1, [1], [])])
+        self.assertFalse(self.decoder.ships[1][4])
+        self.assertDecoded()
+
+    def test_encode__new_ships(self):
+        """Should send ships added to the end of the roster in full"""
+        self.send(0)
+        self.ships.extend(make_ships(7)[5:])
+
+        self.assertEqual(self.send(1), [(1, [5, 6], [])])
+        self.assertDecoded()
+
+    def test_encode__large_colony(self):
+        """Should send job counts too big for 16 bits"""
+        self.send(0)
+        self.colony.add_colonists(70000, BUILD)
+
+        self.assertEqual(self.send(1), [(1, [], [0])])
+        self.assertDecoded()
+
+    def test_encode__uncompressed(self):
+        """Should leave payloads alone when told not to compress"""
+        self.sut = DeltaEncoder(compress=False)
+        self.ships = make_ships(100)
+        frame = self.sut.encode(0, self.ships, [self.colony])
+
+        magic, flags, turn, length = wire.FRAME.unpack_from(frame)
+        self.assertEqual((magic, flags), (wire.MAGIC, 0))
+        self.assertEqual(len(frame), wire.FRAME.size + length)
+        self.decoder.feed(frame)
+        self.assertDecoded()
+
+    def test_encode__compressed(self):
+        """Should compress payloads that shrink"""
+        self.ships = make_ships(100)
+        frame = self.sut.encode(0, self.ships, [self.colony])
+
+        self.assertEqual(wire.FRAME.unpack_from(frame)[1], wire.FLAG_ZLIB)
+        self.decoder.feed(frame)
+        self.assertDecoded()
+
+    def test_encode__smaller_than_json(self):
+        """Should be at least ten times smaller than status reports"""
+        self.ships = make_ships(1000)
+        for number, ship in enumerate(self.ships):
+            ship.set_course(number * 7 % 300, number * 13 % 200)
+        self.send(0)
+        fly(self.ships, 3)
+        for ship in self.ships[::10]:
+            ship.take_damage(15)
+        self.ships[4].set_course(self.ships[4].position)
+
+        frame = self.sut.encode(3, self.ships, [self.colony])
+        reports = json.dumps([ship.status_report() for ship in self.ships])
+        self.assertGreaterEqual(len(reports), 10 * len(frame))
+
+    def test_keyframe(self):
+        """Should bring a fresh decoder up to date, moving ships included"""
+        for number, ship in enumerate(self.ships):
+            ship.set_course(number * 20, 50)
+        self.send(0)
+        for turn in range(1, 3):
+            fly(self.ships)
+            self.send(turn)
+
+        late = DeltaDecoder()
+        self.assertEqual(len(late.feed(self.sut.keyframe(2))), 2)
+        self.assertDecoded(late)
+
+        for turn in range(3, 6):
+            fly(self.ships)
+            frame = self.sut.encode(turn, self.ships, [self.colony])
+            self.decoder.feed(frame)
+            late.feed(frame)
+            self.assertDecoded()
+            self.assertDecoded(late)
+
+
+class TestDeltaDecoder(TestCase):
+    def setUp(self):
+        self.ships = make_ships(50)
+        self.encoder = DeltaEncoder()
+        self.sut = DeltaDecoder()
+
+    def test_feed__partial(self):
+        """Should wait for the rest of a frame split across reads"""
+        first = self.encoder.encode(0, self.ships)
+        self.ships[0].take_damage(10)
+        data = first + self.encoder.encode(1, self.ships)
+
+        self.assertEqual(self.sut.feed(data[:3]), [])
+        self.assertEqual(self.sut.feed(data[3:len(first) + 5]),
+                         [(0, range(50), [])])
+        self.assertEqual(self.sut.feed(data[len(first) + 5:]),
+                         [(1, [0], [])])
+        self.assertEqual(self.sut.ships[0][2], 40)
+
+    def test_feed__not_a_frame(self):
+        """Should raise ValueError for a stream that is not made of frames"""
+        with self.assertRaises(ValueError):
+            self.sut.feed(b'{"turn": 1}\n')
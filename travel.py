@@ -0,0 +1,394 @@
+"""Lanes between star systems, and routing tables for travelling along them
+
+A `TravelGraph` joins systems with two-way lanes, either given explicitly or
+laid between every pair of systems close enough together. Shortest routes
+between every pair of systems are worked out once, into a table of
+distances and a table of next hops, so finding the way from one system to
+another is a lookup per jump instead of a search. When lanes are added or
+removed afterwards, only the parts of the tables the change can affect are
+worked out again.
+
+The tables take memory quadratic in the number of systems, which suits
+galaxies of up to a few thousand systems.
+"""
+import heapq
+
+from spatial import SpatialGrid
+
+INFINITY = float('inf')
+# Relative slack when checking whether a route runs along a lane, so that
+# rounding in summed lengths never hides a route that uses it
+_TOLERANCE = 1e-9
+
+
+def _length(a, b):
+    dx = b.position[0] - a.position[0]
+    dy = b.position[1] - a.position[1]
+    return (dx * dx + dy * dy) ** 0.5
+
+
+class TravelGraph(object):
+    """Systems joined by lanes, with precomputed shortest routes"""
+    def __init__(self, systems=(), lanes=()):
+        """Create a travel graph
+
+        Parameters
+        ----------
+        systems : iterable of System
+        lanes : iterable of tuple of (System, System)
+            optional, pairs of systems to join. Each lane is as long as the
+            distance between its systems.
+        """
+        self.systems = []
+        self._indices = {}
+        # Per system index, a dict of neighbour index to lane length
+        self._lanes = []
+
+        # Routing tables, one row per origin: _distances[a][b] is the length
+        # of the shortest route from a to b, _next[a][b] the index of the
+        # first system along it. None until first needed.
+        self._distances = None
+        self._next = None
+        self._routes = {}
+
+        for system in systems:
+            self.add_system(system)
+        for a, b in lanes:
+            self.add_lane(a, b)
+
+    @classmethod
+    def from_proximity(cls, systems, max_distance):
+        """Join every pair of systems no more than `max_distance` apart
+
+        Parameters
+        ----------
+        systems : iterable of System
+        max_distance : int or float
+
+        Returns
+        -------
+        TravelGraph
+        """
+        graph = cls(systems)
+        grid = SpatialGrid(max_distance, graph.systems)
+        indices = graph._indices
+        for system in graph.systems:
+            index = indices[system]
+            for other in grid.query_radius(system.position, max_distance):
+                if indices[other] > index:
+                    graph.add_lane(system, other)
+        return graph
+
+    def __len__(self):
+        return len(self.systems)
+
+    def __contains__(self, system):
+        return system in self._indices
+
+    def _index(self, system):
+        try:
+            return self._indices[system]
+        except KeyError:
+            raise ValueError('{} is not in the travel graph'.format(system))
+
+    def add_system(self, system):
+        """Add a system, with no lanes yet
+
+        Parameters
+        ----------
+        system : System
+
+        Raises
+        ------
+        ValueError
+            if the system is already in the graph
+        """
+        if system in self._indices:
+            raise ValueError('{} is already in the travel graph'
+                             .format(system))
+
+        index = len(self.systems)
+        self.systems.append(system)
+        self._indices[system] = index
+        self._lanes.append({})
+
+        if self._distances is not None:
+            for row, hops in zip(self._distances, self._next):
+                row.append(INFINITY)
+                hops.append(None)
+            self._distances.append([INFINITY] * index + [0.0])
+            self._next.append([None] * index + [index])
+
+    def lanes(self, system):
+        """The systems one lane away, with the lengths of the lanes
+
+        Parameters
+        ----------
+        system : System
+
+        Returns
+        -------
+        list of tuple of (System, float)
+        """
+        systems = self.systems
+        return [(systems[other], length) for other, length
+                in sorted(self._lanes[self._index(system)].items())]
+
+    def add_lane(self, a, b, length=None):
+        """Join two systems, or change the length of the lane between them
+
+        Parameters
+        ----------
+        a : System
+        b : System
+        length : int or float
+            optional, defaults to the distance between the systems
+
+        Raises
+        ------
+        ValueError
+            if either system is not in the graph, the systems are the same,
+            or the length is negative
+        """
+        i, j = self._index(a), self._index(b)
+        if i == j:
+            raise ValueError('A lane needs two different systems')
+        if length is None:
+            length = _length(a, b)
+        if length < 0:
+            raise ValueError('Lanes cannot have a negative length')
+
+        previous = self._lanes[i].get(j)
+        self._lanes[i][j] = self._lanes[j][i] = length
+        if self._distances is None:
+            return
+
+        self._routes = {}
+        if previous is not None and length > previous:
+            self._lane_lengthened(i, j, previous)
+        else:
+            self._lane_shortened(i, j, length)
+
+    def remove_lane(self, a, b):
+        """Take away the lane between two systems
+
+        Parameters
+        ----------
+        a : System
+        b : System
+
+        Raises
+        ------
+        ValueError
+            if there is no lane between the systems
+        """
+        i, j = self._index(a), self._index(b)
+        previous = self._lanes[i].pop(j, None)
+        if previous is None:
+            raise ValueError('There is no lane between {} and {}'
+                             .format(a, b))
+        del self._lanes[j][i]
+
+        if self._distances is not None:
+            self._routes = {}
+            self._lane_lengthened(i, j, previous)
+
+    def _lane_shortened(self, i, j, length):
+        """Routes every pair through a new or shorter lane where that helps
+
+        A shortest route through the lane i-j is a shortest route to one end,
+        the lane, then a shortest route on from the other end, so checking
+        both directions for every pair covers every route that can improve.
+        """
+        distances = self._distances
+        hops = self._next
+        from_i = distances[i]
+        from_j = distances[j]
+        for source in range(len(distances)):
+            row = distances[source]
+            next_row = hops[source]
+            for near, far, from_far in ((i, j, from_j), (j, i, from_i)):
+                to_near = row[near]
+                if to_near == INFINITY:
+                    continue
+                first = far if source == near else next_row[near]
+                via = to_near + length
+                for target, onwards in enumerate(from_far):
+                    total = via + onwards
+                    if total < row[target]:
+                        row[target] = total
+                        next_row[target] = first
+
+    def _lane_lengthened(self, i, j, previous):
+        """Works out again the rows of routes that ran along the lane i-j"""
+        distances = self._distances
+        for source in range(len(distances)):
+            row = distances[source]
+            for near, far in ((i, j), (j, i)):
+                expected = row[near] + previous
+                if (expected != INFINITY and abs(expected - row[far]) <=
+                        _TOLERANCE * max(1.0, expected)):
+                    self._build_row(source)
+                    break
+
+    def _build_row(self, source):
+        """Dijkstra's algorithm from one system, filling its table rows"""
+        count = len(self.systems)
+        row = [INFINITY] * count
+        next_row = [None] * count
+        row[source] = 0.0
+        next_row[source] = source
+
+        lanes = self._lanes
+        queue = [(0.0, source, source)]
+        done = [False] * count
+        while queue:
+            distance, index, first = heapq.heappop(queue)
+            if done[index]:
+                continue
+            done[index] = True
+            for neighbour, length in lanes[index].items():
+                total = distance + length
+                if total < row[neighbour]:
+                    row[neighbour] = total
+                    hop = neighbour if index == source else first
+                    next_row[neighbour] = hop
+                    heapq.heappush(queue, (total, neighbour, hop))
+
+        self._distances[source] = row
+        self._next[source] = next_row
+
+    def build(self):
+        """Works out the routing tables from scratch
+
+        Called automatically by the first route query, so only needed to
+        choose when the work is done.
+        """
+        count = len(self.systems)
+        self._distances = [None] * count
+        self._next = [None] * count
+        self._routes = {}
+        for source in range(count):
+            self._build_row(source)
+
+    def _tables(self):
+        if self._distances is None:
+            self.build()
+        return self._distances, self._next
+
+    def distance(self, origin, destination):
+        """Length of the shortest route between two systems
+
+        Parameters
+        ----------
+        origin : System
+        destination : System
+
+        Returns
+        -------
+        float
+            infinite if there is no route
+        """
+        distances, _ = self._tables()
+        return distances[self._index(origin)][self._index(destination)]
+
+    def next_hop(self, origin, destination):
+        """The next system along the shortest route
+
+        Parameters
+        ----------
+        origin : System
+        destination : System
+
+        Returns
+        -------
+        System
+            `destination` itself if the systems are the same, or None if
+            there is no route
+        """
+        _, hops = self._tables()
+        hop = hops[self._index(origin)][self._index(destination)]
+        return None if hop is None else self.systems[hop]
+
+    def route(self, origin, destination):
+        """Every system along the shortest route, both ends included
+
+        Parameters
+        ----------
+        origin : System
+        destination : System
+
+        Returns
+        -------
+        tuple of System
+            empty if there is no route
+        """
+        _, hops = self._tables()
+        return self._route(hops, self._index(origin),
+                           self._index(destination))
+
+    def _route(self, hops, source, target):
+        key = (source, target)
+        route = self._routes.get(key)
+        if route is None:
+            if hops[source][target] is None:
+                route = ()
+            else:
+                systems = self.systems
+                path = [systems[source]]
+                while source != target:
+                    source = hops[source][target]
+                    path.append(systems[source])
+                route = tuple(path)
+            self._routes[key] = route
+        return route
+
+    def next_hops(self, origins, destinations):
+        """The next system along the shortest route, for many trips at once
+
+        Parameters
+        ----------
+        origins : sequence of System
+        destinations : sequence of System
+            as many as there are origins
+
+        Returns
+        -------
+        list of System
+            None for trips with no route
+        """
+        if len(origins) != len(destinations):
+            raise ValueError('Got {} origins but {} destinations'
+                             .format(len(origins), len(destinations)))
+        _, hops = self._tables()
+        index = self._index
+        systems = self.systems
+        result = []
+        for origin, destination in zip(origins, destinations):
+            hop = hops[index(origin)][index(destination)]
+            result.append(None if hop is None else systems[hop])
+        return result
+
+    def routes(self, origins, destinations):
+        """Shortest routes for many trips at once, like `route`
+
+        Trips between the same pair of systems share one route, which is
+        also kept for later queries until the lanes change.
+
+        Parameters
+        ----------
+        origins : sequence of System
+        destinations : sequence of System
+            as many as there are origins
+
+        Returns
+        -------
+        list of tuple of System
+        """
+        if len(origins) != len(destinations):
+            raise ValueError('Got {} origins but {} destinations'
+                             .format(len(origins), len(destinations)))
+        _, hops = self._tables()
+        index = self._index
+        return [self._route(hops, index(origin), index(destination))
+                for origin, destination in zip(origins, destinations)]
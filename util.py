@@ -1,26 +1,8 @@
-from collections import namedtuple
-from math import sqrt
+"""Old home of the geometry helpers, kept so existing imports still work
 
-Vector = namedtuple('Vector', ['x', 'y'])
-
-
-class Vector(object):
-    def __init__(self, x, y):
-        self._vector = (x, y)
-
-    @property
-    def x(self):
-        return self._vector[0]
-
-    @property
-    def y(self):
-        return self._vector[1]
-
-    def __repr__(self):
-        return '({},{})'.format(self.x, self.y)
-
-    def __str__(self):
-        return repr(self)
+`vector` is the one geometry module; new code should import from there.
+"""
+from vector import Vector, direction_vector
 
 
 def get_direction_vector(a, b):
@@ -28,14 +10,12 @@ def get_direction_vector(a, b):
 
     Parameters
     ----------
-    a: 2-tuple of floats (position coordinates)
-    b: 2-tuple of floats (position coordinates)
+    a: Vector or 2-tuple of floats (position coordinates)
+    b: Vector or 2-tuple of floats (position coordinates)
 
     Returns
     -------
-    2-tuple of floats
+    Vector
+        the zero vector if a and b are the same position
     """
-
-    direction = Vector(b.x - a.x, b.y - a.y)
-    magnitude = sqrt(direction.x ** 2, direction.y ** 2)
-    return Vector(direction.x / magnitude, direction.y / magnitude)
+    return direction_vector(a, b)
@@ -31,6 +31,133 @@ TAU = 2 * math.pi
 UNSUPPORTED_TYPES_FORMAT = (
     "unsupported operand type(s) for {op}: '{t1}' and '{t2}'")
 
+# Rotation matrices by angle, per unit. Headings tend to turn by the same
+# few angles every tick, so the table stays small; it is emptied if not.
+ROTATION_CACHE_SIZE = 4096
+_ROTATIONS = {}
+_DEGREE_ROTATIONS = {}
+
+
+def rotation_matrix(theta, unit=UNIT_RADIANS):
+    """The 2D matrix rotating vectors clockwise by an angle, cached
+
+    Parameters
+    ----------
+    theta : int or float
+    unit : UNIT_DEGREES or UNIT_RADIANS
+        optional, defaults to UNIT_RADIANS
+
+    Returns
+    -------
+    tuple of tuples
+        ((cos, -sin), (sin, cos)), suitable for `Vector.rotate_by_matrix`
+    """
+    degrees = unit == UNIT_DEGREES
+    cache = _DEGREE_ROTATIONS if degrees else _ROTATIONS
+    matrix = cache.get(theta)
+    if matrix is None:
+        radians = math.radians(theta) if degrees else theta
+        dc, ds = math.cos(radians), math.sin(radians)
+        matrix = ((dc, -ds), (ds, dc))
+        if len(cache) >= ROTATION_CACHE_SIZE:
+            cache.clear()
+        cache[theta] = matrix
+    return matrix
+
+
+def rotate_all(vectors, theta, unit=UNIT_RADIANS):
+    """Rotates many vectors clockwise by the same angle
+
+    The rotation matrix is worked out once and applied to every vector, the
+    same way `Vector.rotate_by_matrix` would.
+
+    Parameters
+    ----------
+    vectors : iterable of Vector
+    theta : int or float
+    unit : UNIT_DEGREES or UNIT_RADIANS
+        optional, defaults to UNIT_RADIANS
+
+    Returns
+    -------
+    list of Vector
+    """
+    matrix = rotation_matrix(theta, unit)
+    (a, b), (c, d) = matrix
+    rotated = []
+    for vector in vectors:
+        values = vector.values
+        if len(values) == 2:
+            x, y = values
+            rotated.append(Vector(a * x + b * y, c * x + d * y))
+        else:
+            rotated.append(vector.rotate_by_matrix(matrix))
+    return rotated
+
+
+def direction_vector(origin, destination):
+    """Returns the unit vector pointing from `origin` to `destination`
+
+    Parameters
+    ----------
+    origin : Vector or sequence of 2 numbers
+    destination : Vector or sequence of 2 numbers
+
+    Returns
+    -------
+    Vector
+        the zero vector if the two positions are the same
+    """
+    return direction_vectors((origin,), (destination,))[0]
+
+
+def direction_vectors(origins, destinations):
+    """Returns the unit vectors pointing from each origin to its destination
+
+    Works on the components directly rather than through `Vector`
+    arithmetic, so only the resulting unit vectors get allocated. Pairs with
+    no distance between them get the zero vector, rather than a division by
+    zero. For a `vector_batch.VectorBatch`, use
+    ``(destinations - origins).normalize(safe=True)`` instead.
+
+    Parameters
+    ----------
+    origins : sequence of Vector or of sequences of 2 numbers
+    destinations : sequence of Vector or of sequences of 2 numbers
+        as many as there are origins
+
+    Raises
+    ------
+    ValueError
+        if the number of origins and destinations differ
+
+    Returns
+    -------
+    list of Vector
+    """
+    if len(origins) != len(destinations):
+        raise ValueError('Got {} origins but {} destinations'
+                         .format(len(origins), len(destinations)))
+
+    sqrt = math.sqrt
+    directions = []
+    append = directions.append
+    for origin, destination in zip(origins, destinations):
+        if isinstance(origin, Vector):
+            origin = origin.values
+        if isinstance(destination, Vector):
+            destination = destination.values
+        x = destination[0] - origin[0]
+        y = destination[1] - origin[1]
+        norm = sqrt(x * x + y * y)
+        if norm:
+            unit = Vector(x / norm, y / norm)
+            unit._norm = 1.0
+            append(unit)
+        else:
+            append(ZERO)
+    return directions
+
 
 class Vector(object):
     UNIT_DEGREES = UNIT_DEGREES
@@ -39,7 +166,13 @@ class Vector(object):
 
     A vector is simply an array of numbers (usually 2 or 3 for spacial vectors)
     but this includes a bunch of useful vector math operations too.
+
+    Operations on 2D vectors, by far the most common, take fast paths that
+    work on the two components directly.
     """
+    # Vectors are created by the million, so skip the per-instance __dict__
+    __slots__ = ('values', '_norm')
+
     def __init__(self, *args):
         """Create a vector
 
@@ -48,10 +181,12 @@ class Vector(object):
         >>>v = Vector(1, 2)
         Vector(1, 2)
         """
-        if len(args) == 0:
-            self.values = (0, 0)
-        else:
-            self.values = args
+        self.values = args or (0, 0)
+        # Memoized by norm(), which is safe since the values never change
+        self._norm = None
+
+    def __reduce__(self):
+        return Vector, self.values
 
     def norm(self):
         """Returns the norm (length, magnitude) of the vector
@@ -60,7 +195,16 @@ class Vector(object):
         -------
         float
         """
-        return math.sqrt(sum(comp**2 for comp in self))
+        norm = self._norm
+        if norm is None:
+            values = self.values
+            if len(values) == 2:
+                x, y = values
+                norm = math.sqrt(x * x + y * y)
+            else:
+                norm = math.sqrt(sum(comp * comp for comp in values))
+            self._norm = norm
+        return norm
 
     def argument(self, unit=UNIT_RADIANS):
         """Returns the argument of the vector
@@ -77,7 +221,8 @@ class Vector(object):
         -------
         float
         """
-        argument = math.acos(Vector(0, 1) * self / self.norm())
+        # The dot product with [0, 1] is just the y component
+        argument = math.acos(self.values[1] / self.norm())
         if self.values[0] < 0:
             argument = TAU - argument
 
@@ -86,6 +231,24 @@ class Vector(object):
 
         return argument
 
+    def pseudo_argument(self):
+        """A cheap stand-in for `argument` that sorts the same way
+
+        Grows monotonically with the argument, from 0 for [0, 1] up to 4
+        for a full clockwise turn, using neither `acos` nor a square root.
+        Only useful for comparing and ordering directions.
+
+        Returns
+        -------
+        float
+        """
+        values = self.values
+        x, y = values[0], values[1]
+        slope = y / (abs(x) + abs(y) + 0.0)
+        if x < 0:
+            return 3 + slope
+        return 1 - slope
+
     def normalize(self):
         """Returns a normalized unit vector
 
@@ -94,8 +257,13 @@ class Vector(object):
         Vector
         """
         norm = self.norm()
-        normed = tuple(comp / norm for comp in self)
-        return Vector(*normed)
+        values = self.values
+        if len(values) == 2:
+            unit = Vector(values[0] / norm, values[1] / norm)
+        else:
+            unit = Vector(*[comp / norm for comp in values])
+        unit._norm = 1.0
+        return unit
 
     def rotate_by_angle(self, theta, unit=UNIT_RADIANS):
         """Rotate this vector clockwise by the provided angle
@@ -112,19 +280,16 @@ class Vector(object):
         -------
         Vector
         """
-        assert len(self) == 2, (
+        assert len(self.values) == 2, (
             'Rotation axis not defined for greater than 2D vector (this: {})'
             .format(len(self))
         )
 
-        if unit == UNIT_DEGREES:
-            theta = math.radians(theta)
-
-        # Just applying the 2D rotation matrix
-        dc, ds = math.cos(theta), math.sin(theta)
+        cache = _DEGREE_ROTATIONS if unit == UNIT_DEGREES else _ROTATIONS
+        matrix = cache.get(theta) or rotation_matrix(theta, unit)
+        (dc, nds), (ds, _) = matrix
         x, y = self.values
-        x, y = dc * x - ds * y, ds * x + dc * y
-        return Vector(x, y)
+        return Vector(dc * x + nds * y, ds * x + dc * y)
 
     def rotate_by_matrix(self, matrix):
         """Rotate this vector by the provided matrix
@@ -138,6 +303,10 @@ class Vector(object):
         -------
         Vector
         """
+        if len(matrix) == 2 and len(self.values) == 2:
+            # matrix_mult checks both rows have two columns
+            return self.matrix_mult(matrix)
+
         assert all(len(row) == len(matrix) for row in matrix), (
             'Rotation matrix must be square: {}'
             .format(matrix)
@@ -157,6 +326,13 @@ class Vector(object):
         -------
         Vector
         """
+        values = self.values
+        if len(values) == 2 and len(matrix) == 2 and \
+                len(matrix[0]) == 2 and len(matrix[1]) == 2:
+            (a, b), (c, d) = matrix
+            x, y = values
+            return Vector(a * x + b * y, c * x + d * y)
+
         assert all(len(row) == len(self) for row in matrix), (
             'Matrix must match vector dimensions: {}'
             .format(matrix)
@@ -171,12 +347,12 @@ class Vector(object):
     @property
     def x(self):
         """2D vector x-component"""
-        return self[0]
+        return self.values[0]
 
     @property
     def y(self):
         """2D vector y-component"""
-        return self[1]
+        return self.values[1]
 
     def _dot_product(self, other):
         """Dot product (inner product) of self and other vector
@@ -189,7 +365,10 @@ class Vector(object):
         -------
         float
         """
-        return sum(a * b for a, b in zip(self, other))
+        a, b = self.values, other.values
+        if len(a) == 2 and len(b) == 2:
+            return a[0] * b[0] + a[1] * b[1]
+        return sum(x * y for x, y in zip(a, b))
 
     def __mul__(self, other):
         """Multiplication operation
@@ -219,8 +398,10 @@ class Vector(object):
                 t2=str(type(other)),
             )), None, exc_info[2]
 
-        products = (a * operand for a in self)
-        return Vector(*products)
+        values = self.values
+        if len(values) == 2:
+            return Vector(values[0] * operand, values[1] * operand)
+        return Vector(*[a * operand for a in values])
 
     def __rmul__(self, other):
         """Multiplication operation when second operand
@@ -256,8 +437,10 @@ class Vector(object):
                 t2=str(type(other)),
             )), None, exc_info[2]
 
-        quotients = tuple(a / operand for a in self)
-        return Vector(*quotients)
+        values = self.values
+        if len(values) == 2:
+            return Vector(values[0] / operand, values[1] / operand)
+        return Vector(*[a / operand for a in values])
 
     def __add__(self, other):
         """Addition operation
@@ -270,6 +453,11 @@ class Vector(object):
         -------
         Vector
         """
+        if isinstance(other, Vector):
+            a, b = self.values, other.values
+            if len(a) == 2 and len(b) == 2:
+                return Vector(a[0] + b[0], a[1] + b[1])
+
         try:
             sums = tuple(a + b for a, b in zip(self, other))
         except TypeError:
@@ -297,6 +485,11 @@ class Vector(object):
         -------
         Vector
         """
+        if isinstance(other, Vector):
+            a, b = self.values, other.values
+            if len(a) == 2 and len(b) == 2:
+                return Vector(a[0] - b[0], a[1] - b[1])
+
         try:
             differences = tuple(a - b for a, b in zip(self, other))
         except TypeError:
@@ -320,3 +513,9 @@ class Vector(object):
 
     def __repr__(self):
         return str(self.values)
+
+
+# Shared constants; vectors never change, so these are safe to hand out
+ZERO = Vector(0, 0)
+UNIT_X = Vector(1, 0)
+UNIT_Y = Vector(0, 1)
@@ -0,0 +1,302 @@
+import math
+from itertools import chain
+
+from vector import Vector, UNIT_DEGREES, UNIT_RADIANS, rotation_matrix
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class VectorBatch(object):
+    """A batch of 2D vectors stored as parallel x and y component arrays.
+
+    Supports the same math as `vector.Vector`, applied elementwise across the
+    whole batch. Components are kept in NumPy arrays when NumPy is installed,
+    and in plain lists otherwise.
+    """
+    UNIT_DEGREES = UNIT_DEGREES
+    UNIT_RADIANS = UNIT_RADIANS
+
+    def __init__(self, xs=(), ys=()):
+        """Create a batch from sequences of x and y components
+
+        Parameters
+        ----------
+        xs : sequence of int or float
+        ys : sequence of int or float
+            must be the same length as `xs`
+        """
+        if len(xs) != len(ys):
+            raise ValueError('Component lengths differ: {} and {}'
+                             .format(len(xs), len(ys)))
+
+        if numpy is not None:
+            self.xs = numpy.asarray(xs, dtype=float)
+            self.ys = numpy.asarray(ys, dtype=float)
+        else:
+            self.xs = [float(x) for x in xs]
+            self.ys = [float(y) for y in ys]
+
+    @classmethod
+    def from_vectors(cls, vectors):
+        """Build a batch out of a sequence of 2D `Vector`s
+
+        Parameters
+        ----------
+        vectors : sequence of Vector
+
+        Returns
+        -------
+        VectorBatch
+        """
+        values = [vector.values for vector in vectors]
+        if numpy is not None:
+            pairs = numpy.fromiter(chain.from_iterable(values), float,
+                                   2 * len(values)).reshape(-1, 2)
+            return cls(pairs[:, 0], pairs[:, 1])
+        return cls([x for x, _ in values], [y for _, y in values])
+
+    def take(self, indices):
+        """A new batch of the vectors at the given indices, in that order
+
+        Parameters
+        ----------
+        indices : sequence of int
+
+        Returns
+        -------
+        VectorBatch
+        """
+        if self._vectorized:
+            indices = numpy.asarray(indices, dtype=int)
+            return VectorBatch(self.xs[indices], self.ys[indices])
+        return VectorBatch([self.xs[index] for index in indices],
+                           [self.ys[index] for index in indices])
+
+    def to_vectors(self):
+        """Convert the batch back into a list of `Vector`s
+
+        Returns
+        -------
+        list of Vector
+        """
+        return [Vector(x, y) for x, y in zip(*self.components())]
+
+    def components(self):
+        """Returns the x and y components as plain lists of floats
+
+        Returns
+        -------
+        tuple of (list of float, list of float)
+        """
+        return self._list(self.xs), self._list(self.ys)
+
+    @property
+    def _vectorized(self):
+        return numpy is not None and isinstance(self.xs, numpy.ndarray)
+
+    @staticmethod
+    def _list(column):
+        if numpy is not None and isinstance(column, numpy.ndarray):
+            return column.tolist()
+        return column
+
+    def _components(self, other):
+        """Returns x and y columns for `other`, broadcasting single vectors"""
+        if isinstance(other, VectorBatch):
+            if len(other) != len(self):
+                raise ValueError('Batch lengths differ: {} and {}'
+                                 .format(len(self), len(other)))
+            return other.xs, other.ys
+
+        if isinstance(other, Vector) and len(other) == 2:
+            if self._vectorized:
+                return other[0], other[1]
+            count = len(self)
+            return [other[0]] * count, [other[1]] * count
+
+        raise TypeError('Expected a VectorBatch or 2D Vector, got {}'
+                        .format(type(other)))
+
+    def norm(self):
+        """Returns the norm of every vector in the batch
+
+        Returns
+        -------
+        numpy.ndarray or list of float
+        """
+        if self._vectorized:
+            return numpy.hypot(self.xs, self.ys)
+        return [math.sqrt(x * x + y * y) for x, y in zip(self.xs, self.ys)]
+
+    def normalize(self, safe=False):
+        """Returns a batch of unit vectors
+
+        Parameters
+        ----------
+        safe : bool
+            optional, leave zero-length vectors as zero vectors instead of
+            raising
+
+        Raises
+        ------
+        ZeroDivisionError
+            if any vector in the batch has zero length, like
+            `Vector.normalize`, unless `safe` is set
+
+        Returns
+        -------
+        VectorBatch
+        """
+        norms = self.norm()
+        if self._vectorized:
+            if len(norms) and not norms.all():
+                if not safe:
+                    raise ZeroDivisionError('Cannot normalize a zero vector')
+                # Zero vectors have zero components, so any divisor keeps them
+                norms = numpy.where(norms == 0, 1.0, norms)
+            return VectorBatch(self.xs / norms, self.ys / norms)
+
+        if safe:
+            norms = [n or 1.0 for n in norms]
+        return VectorBatch([x / n for x, n in zip(self.xs, norms)],
+                           [y / n for y, n in zip(self.ys, norms)])
+
+    def dot(self, other):
+        """Elementwise dot product with another batch or a single vector
+
+        Parameters
+        ----------
+        other : VectorBatch or Vector
+
+        Returns
+        -------
+        numpy.ndarray or list of float
+        """
+        oxs, oys = self._components(other)
+        if self._vectorized:
+            return self.xs * oxs + self.ys * oys
+        return [x * ox + y * oy
+                for x, y, ox, oy in zip(self.xs, self.ys, oxs, oys)]
+
+    def scale(self, factors):
+        """Multiply each vector by its own scalar factor
+
+        Parameters
+        ----------
+        factors : sequence of int or float
+            one factor per vector in the batch
+
+        Returns
+        -------
+        VectorBatch
+        """
+        if len(factors) != len(self):
+            raise ValueError('Expected {} factors, got {}'
+                             .format(len(self), len(factors)))
+        if self._vectorized:
+            factors = numpy.asarray(factors, dtype=float)
+            return VectorBatch(self.xs * factors, self.ys * factors)
+        return VectorBatch([x * f for x, f in zip(self.xs, factors)],
+                           [y * f for y, f in zip(self.ys, factors)])
+
+    def rotate_by_angle(self, theta, unit=UNIT_RADIANS):
+        """Rotate every vector clockwise by the provided angle
+
+        Parameters
+        ----------
+        theta : int or float
+        unit : VectorBatch.UNIT_DEGREES or VectorBatch.UNIT_RADIANS
+            defaults to VectorBatch.UNIT_RADIANS
+
+        Returns
+        -------
+        VectorBatch
+        """
+        return self.matrix_mult(rotation_matrix(theta, unit))
+
+    def matrix_mult(self, matrix):
+        """Multiply every vector by the same 2x2 matrix
+
+        Parameters
+        ----------
+        matrix : sequence
+            2x2 matrix, given as a sequence of rows
+
+        Returns
+        -------
+        VectorBatch
+        """
+        assert len(matrix) == 2 and all(len(row) == 2 for row in matrix), (
+            'Matrix must match vector dimensions: {}'
+            .format(matrix)
+        )
+
+        (a, b), (c, d) = matrix
+        if self._vectorized:
+            return VectorBatch(a * self.xs + b * self.ys,
+                               c * self.xs + d * self.ys)
+        return VectorBatch([a * x + b * y for x, y in zip(self.xs, self.ys)],
+                           [c * x + d * y for x, y in zip(self.xs, self.ys)])
+
+    def __mul__(self, other):
+        """Multiplication operation
+
+        If multiplied with a `VectorBatch` or `Vector`, returns the elementwise
+        dot products. If multiplied with a number, returns a new batch with
+        every vector scaled by `other`.
+
+        Parameters
+        ----------
+        other : VectorBatch, Vector, int, or float
+
+        Returns
+        -------
+        VectorBatch, numpy.ndarray or list of float
+        """
+        if isinstance(other, (VectorBatch, Vector)):
+            return self.dot(other)
+
+        try:
+            operand = float(other)
+        except (TypeError, ValueError):
+            raise TypeError('Cannot multiply a VectorBatch by {}'
+                            .format(type(other)))
+
+        if self._vectorized:
+            return VectorBatch(self.xs * operand, self.ys * operand)
+        return VectorBatch([x * operand for x in self.xs],
+                           [y * operand for y in self.ys])
+
+    def __rmul__(self, other):
+        return self.__mul__(other)
+
+    def __add__(self, other):
+        """Elementwise addition with another batch or a single vector"""
+        oxs, oys = self._components(other)
+        if self._vectorized:
+            return VectorBatch(self.xs + oxs, self.ys + oys)
+        return VectorBatch([a + b for a, b in zip(self.xs, oxs)],
+                           [a + b for a, b in zip(self.ys, oys)])
+
+    def __sub__(self, other):
+        """Elementwise subtraction of another batch or a single vector"""
+        oxs, oys = self._components(other)
+        if self._vectorized:
+            return VectorBatch(self.xs - oxs, self.ys - oys)
+        return VectorBatch([a - b for a, b in zip(self.xs, oxs)],
+                           [a - b for a, b in zip(self.ys, oys)])
+
+    def __len__(self):
+        return len(self.xs)
+
+    def __getitem__(self, index):
+        return Vector(float(self.xs[index]), float(self.ys[index]))
+
+    def __iter__(self):
+        return iter(self.to_vectors())
+
+    def __repr__(self):
+        return 'VectorBatch({})'.format(self.to_vectors())
@@ -0,0 +1,331 @@
+"""Fog of war: which ships, systems and planets each empire can see
+
+Every ship is a sensor. It sees every ship, its own included, and every
+system within its sensor range, which is `Ship.range` unless told otherwise.
+An empire sees whatever any of its ships sees, along with the planets of
+the systems it sees.
+
+Rather than checking every sensor against everything each turn, the
+`Visibility` layer remembers which empires see each ship and system. It only
+has to look again at the grid cells around the ships that moved or were
+destroyed, since nothing else can have come into or gone out of sight, and
+it works out a whole cell at once. Each update reports, per empire, what
+came into view and what dropped out of it.
+"""
+from itertools import compress
+import math
+
+from planet import Planet
+from spatial import SpatialGrid
+from vector_batch import numpy
+
+NOBODY = frozenset()
+
+
+class Visibility(object):
+    """What every empire can see, kept up to date as ships move"""
+    def __init__(self, cell_size, ships=(), systems=(), sensor_range=None):
+        """Create a visibility layer
+
+        Parameters
+        ----------
+        cell_size : int or float
+            width of the grid cells used to find what is in range. Close to
+            typical sensor ranges is best.
+        ships : iterable of Ship
+            optional, destroyed ships are left out
+        systems : iterable of System
+            optional
+        sensor_range : callable
+            optional, called with a ship to get how far it can see. Defaults
+            to the ship's weapon range.
+        """
+        self._sensor_range = sensor_range or (lambda ship: ship.range)
+        systems = list(systems)
+        self._ships = SpatialGrid(cell_size)
+        self._systems = SpatialGrid(cell_size, systems)
+        # Per ship and system, the tuple `_look` checks it with
+        self._entries = {}
+        for system in systems:
+            self._entry(system)
+        self._ranges = {}
+        # Conservative, never shrinks; bounds searches for ships that can
+        # see a given position
+        self._max_range = 0
+        # Which empires see each ship or system, and what each empire sees
+        self._observers = {}
+        self._visible = {}
+        # Per empire, whether each ship or system touched since the last
+        # update was visible before it
+        self._touched = {}
+
+        for ship in ships:
+            if ship._active:
+                self._ships.insert(ship)
+                self._set_range(ship)
+        cells = set(self._ships.cell(ship) for ship in self._ranges)
+        cells.update(self._systems.cell(system) for system in systems)
+        self._look_in(cells)
+        self._touched = {}
+
+    def _set_range(self, ship):
+        sensor_range = self._ranges[ship] = self._sensor_range(ship)
+        if sensor_range > self._max_range:
+            self._max_range = sensor_range
+        self._entry(ship, sensor_range)
+
+    def __contains__(self, ship):
+        return ship in self._ranges
+
+    def add(self, ship):
+        """Start tracking a new ship
+
+        Parameters
+        ----------
+        ship : Ship
+        """
+        self._ships.insert(ship)
+        self._set_range(ship)
+        self._look_near([self._ships.cell(ship)])
+
+    def remove(self, ship):
+        """Stop tracking a ship, such as one that was destroyed
+
+        Everything it saw, and everyone who saw it, forget about it.
+
+        Parameters
+        ----------
+        ship : Ship
+        """
+        self._look_near([self._forget(ship)])
+
+    def _forget(self, ship):
+        """Drops a ship, returning the cell around which to look again"""
+        cell = self._ships.cell(ship)
+        self._ships.remove(ship)
+        del self._ranges[ship]
+        del self._entries[ship]
+        self._observe(ship, NOBODY)
+        return cell
+
+    def refresh(self, ship):
+        """Looks again around a ship whose sensor range changed
+
+        Parameters
+        ----------
+        ship : Ship
+        """
+        self._set_range(ship)
+        self._look_near([self._ships.cell(ship)])
+
+    def update(self, moved=(), destroyed=()):
+        """Brings visibility up to date after a turn
+
+        Parameters
+        ----------
+        moved : iterable of Ship
+            ships that moved, such as those `movement.move_ships` returns
+        destroyed : iterable of Ship
+            optional, ships to stop tracking
+
+        Returns
+        -------
+        dict of empire to tuple of (set, set)
+            for each empire whose view changed, the ships and systems that
+            came into view and those that dropped out of it
+        """
+        ranges = self._ranges
+        grid = self._ships
+        # Where anything could have come into or gone out of sight
+        cells = set()
+        for ship in destroyed:
+            if ship in ranges:
+                cells.add(self._forget(ship))
+
+        for ship in moved:
+            if ship not in ranges:
+                continue
+            if not ship._active:
+                cells.add(self._forget(ship))
+                continue
+            cells.add(grid.cell(ship))
+            grid.update(ship)
+            cells.add(grid.cell(ship))
+            self._entry(ship, ranges[ship])
+        self._look_near(cells)
+
+        return self._changes()
+
+    def _entry(self, entity, sensor_range=None):
+        """Records an entity's coordinates, squared sensor range and empire
+
+        Systems never see anything, so they get a negative squared range.
+        """
+        position = entity.position
+        if sensor_range is None:
+            entry = (entity, position[0], position[1], -1.0, None)
+        else:
+            entry = (entity, position[0], position[1],
+                     sensor_range * sensor_range, entity.empire)
+        self._entries[entity] = entry
+
+    def _look_near(self, cells):
+        """Works out again who sees everything a sensor in `cells` could"""
+        reach = int(math.ceil(self._max_range / self._ships.cell_size))
+        offsets = range(-reach, reach + 1)
+        self._look_in(set((x + dx, y + dy) for x, y in cells
+                          for dx in offsets for dy in offsets))
+
+    def _look_in(self, cells):
+        """Works out again which empires see what is in `cells`"""
+        max_range = self._max_range
+        for cell in cells:
+            targets = self._ships.in_cell(cell)
+            targets.extend(self._systems.in_cell(cell))
+            if targets:
+                self._look(targets, self._ships.around(cell, max_range))
+
+    def _look(self, targets, sensors):
+        """Works out again which empires see each of `targets`
+
+        Parameters
+        ----------
+        targets : list of Ship or System
+            ships and systems sharing a cell
+        sensors : list of Ship
+            every ship that could have any of `targets` in range
+        """
+        entries = self._entries
+        if not sensors:
+            for target in targets:
+                self._observe(target, NOBODY)
+            return
+
+        _, xs, ys, limits, empires = zip(*[entries[sensor]
+                                           for sensor in sensors])
+        if numpy is not None:
+            _, txs, tys, _, _ = zip(*[entries[target] for target in targets])
+            dx = numpy.subtract.outer(txs, xs)
+            dy = numpy.subtract.outer(tys, ys)
+            # One row per target, one column per sensor
+            sees = (dx * dx + dy * dy <= numpy.array(limits)).tolist()
+            for target, row in zip(targets, sees):
+                self._observe(target, set(compress(empires, row)))
+            return
+
+        sensors = zip(xs, ys, limits, empires)
+        for target in targets:
+            _, tx, ty, _, _ = entries[target]
+            observers = set()
+            for x, y, limit, empire in sensors:
+                dx = x - tx
+                dy = y - ty
+                if dx * dx + dy * dy <= limit:
+                    observers.add(empire)
+            self._observe(target, observers)
+
+    def _observe(self, entity, empires):
+        """Records which empires now see a ship or system"""
+        # Most things are seen by the same empires turn after turn, so first
+        # check whether there is anything to do
+        previous = self._observers.get(entity, NOBODY)
+        if empires == previous:
+            return
+
+        for empire in empires - previous:
+            self._touch(empire, entity, False)
+            visible = self._visible.get(empire)
+            if visible is None:
+                visible = self._visible[empire] = set()
+            visible.add(entity)
+        for empire in previous - empires:
+            self._touch(empire, entity, True)
+            self._visible[empire].discard(entity)
+
+        if empires:
+            self._observers[entity] = empires
+        else:
+            del self._observers[entity]
+
+    def _touch(self, empire, entity, visible):
+        touched = self._touched.get(empire)
+        if touched is None:
+            touched = self._touched[empire] = {}
+        if entity not in touched:
+            touched[entity] = visible
+
+    def _changes(self):
+        """What came into and dropped out of view since the last update"""
+        changes = {}
+        for empire, touched in self._touched.items():
+            visible = self._visible.get(empire, NOBODY)
+            # Looked up by key rather than through `items`, which would
+            # build a pair for every entity touched this turn
+            appeared = set(entity for entity in touched
+                           if not touched[entity] and entity in visible)
+            vanished = set(entity for entity in touched
+                           if touched[entity] and entity not in visible)
+            if appeared or vanished:
+                changes[empire] = (appeared, vanished)
+        self._touched = {}
+        return changes
+
+    def can_see(self, empire, entity):
+        """Whether an empire can see a ship, system or planet
+
+        Parameters
+        ----------
+        empire : Empire
+        entity : Ship, System or Planet
+
+        Returns
+        -------
+        bool
+        """
+        if isinstance(entity, Planet):
+            entity = entity.system
+        return empire in self._observers.get(entity, NOBODY)
+
+    def visible_ships(self, empire):
+        """Every ship an empire can see, its own included
+
+        Parameters
+        ----------
+        empire : Empire
+
+        Returns
+        -------
+        set of Ship
+        """
+        ranges = self._ranges
+        return set(entity for entity in self._visible.get(empire, ())
+                   if entity in ranges)
+
+    def visible_systems(self, empire):
+        """Every system an empire can see
+
+        Parameters
+        ----------
+        empire : Empire
+
+        Returns
+        -------
+        set of System
+        """
+        systems = self._systems
+        return set(entity for entity in self._visible.get(empire, ())
+                   if entity in systems)
+
+    def visible_planets(self, empire):
+        """Every planet in the systems an empire can see
+
+        Parameters
+        ----------
+        empire : Empire
+
+        Returns
+        -------
+        list of Planet
+        """
+        return [planet for system in self.visible_systems(empire)
+                for planet in system.planets]
@@ -0,0 +1,395 @@
+"""Compact binary encoding of ship and colony changes, turn by turn
+
+Each turn's changes go out as one frame: a fixed header, then one record
+per ship or colony that changed. Ships and colonies are numbered by their
+place in a roster both ends agree on, such as `Simulation.ships`.
+
+A record starts with a mask byte and how far the entity's number is past
+the previous record's of the same kind, counting from -1. The mask says
+which fields follow, each with a fixed width, so the layout of every
+possible record is known in advance and a record packs or unpacks with a
+single precompiled `struct` call. Shields and hulls are rounded to whole
+points. Positions are quantized to `quantum` units and dead reckoned: both
+ends assume a ship moves as far this frame as it did the last, so only
+ships that turn, speed up or stop send their position at all, as 32-bit
+integers saying how far off that guess was. A ship's first record places
+it rather than moving it, so it carries the whole position. Payloads are
+zlib compressed when that makes them smaller.
+
+Since every ship under way moves each frame, a receiver has to apply every
+frame, in order, from the start or from a keyframe.
+
+`server.GameServer` does not send these frames yet; its turn updates are
+still newline-delimited JSON.
+
+::
+
+    frame:   magic:B flags:B turn:I length:I payload
+    ship:    mask:B gap:I [dx:i] [dy:i] [shield:I] [hull:I]
+    colony:  mask:B gap:I [count:I for each job in colony.JOBS]
+"""
+import struct
+import zlib
+
+from colony import JOBS
+
+MAGIC = 0xb5
+FLAG_ZLIB = 0x01
+FRAME = struct.Struct('<BBII')
+
+# Ship mask bits; DESTROYED carries no field
+X = 0x01
+Y = 0x02
+SHIELD = 0x04
+HULL = 0x08
+DESTROYED = 0x10
+SHIP_FIELDS = ((X, 'i'), (Y, 'i'), (SHIELD, 'I'), (HULL, 'I'))
+ALL_SHIP_FIELDS = X | Y | SHIELD | HULL
+
+# Colony records set the top bit; the rest flag which job counts follow
+COLONY = 0x80
+COLONY_FIELDS = tuple((1 << index, 'I') for index in range(len(JOBS)))
+ALL_COLONY_FIELDS = (1 << len(JOBS)) - 1
+
+# Positions are sent as whole multiples of this
+QUANTUM = 1 / 16.0
+# Payloads smaller than this are not worth compressing
+COMPRESS_MINIMUM = 64
+
+
+def _layouts(fields, flag):
+    """A precompiled record layout for every combination of fields"""
+    layouts = {}
+    every = 0
+    for bit, _ in fields:
+        every |= bit
+    for mask in range(every + 1):
+        layouts[flag | mask] = struct.Struct(
+            '<BI' + ''.join(code for bit, code in fields if mask & bit))
+    return layouts
+
+
+SHIP_LAYOUTS = _layouts(SHIP_FIELDS, 0)
+SHIP_LAYOUTS.update(dict((DESTROYED | mask, layout)
+                         for mask, layout in list(SHIP_LAYOUTS.items())))
+COLONY_LAYOUTS = _layouts(COLONY_FIELDS, COLONY)
+
+
+def _points(value):
+    """Rounds a shield or hull value to the whole points that are sent"""
+    return max(0, int(round(value)))
+
+
+class DeltaEncoder(object):
+    """Encodes what changed since the last frame, for a fixed roster"""
+    def __init__(self, quantum=QUANTUM, compress=True, level=6):
+        """Create an encoder
+
+        Parameters
+        ----------
+        quantum : float
+            optional, positions are rounded to multiples of this
+        compress : bool
+            optional, zlib compress payloads where that helps
+        level : int
+            optional, zlib compression level
+        """
+        self.quantum = quantum
+        self.compress = compress
+        self.level = level
+        # What the receiving end last heard about each ship and colony
+        self._ships = []
+        self._colonies = []
+        self._buffer = bytearray(4096)
+
+    def _reserve(self, offset, size):
+        if offset + size > len(self._buffer):
+            self._buffer.extend(bytearray(max(len(self._buffer), size)))
+
+    def encode(self, turn, ships=(), colonies=()):
+        """A frame with every ship and colony that changed since the last
+
+        Parameters
+        ----------
+        turn : int
+        ships : sequence of Ship
+            the ship roster, in the same order every time. Ships added to
+            its end are sent in full.
+        colonies : sequence of Colony
+            the colony roster, likewise
+
+        Returns
+        -------
+        bytes
+        """
+        scale = 1.0 / self.quantum
+        states = self._ships
+        offset = 0
+        last = -1
+        for index, ship in enumerate(ships):
+            position = ship.position
+            x = int(round(position[0] * scale))
+            y = int(round(position[1] * scale))
+            shield, hull = _points(ship.shield), _points(ship.hull)
+            active = ship._active
+            if index < len(states):
+                px, py, vx, vy, old_shield, old_hull, was_active = \
+                    states[index]
+                states[index] = (x, y, x - px, y - py, shield, hull, active)
+                # How far off the receiver's guess, that the ship kept going
+                # as it did last turn, turned out to be
+                dx = x - px - vx
+                dy = y - py - vy
+                if (not dx and not dy and shield == old_shield and
+                        hull == old_hull and active == was_active):
+                    continue
+                mask = ((X if dx else 0) | (Y if dy else 0) |
+                        (SHIELD if shield != old_shield else 0) |
+                        (HULL if hull != old_hull else 0))
+                sent = (dx, dy, shield, hull, active)
+            else:
+                states.append((x, y, 0, 0, shield, hull, active))
+                mask = ALL_SHIP_FIELDS
+                sent = (x, y, shield, hull, active)
+            offset = self._pack_ship(offset, index - last, mask, sent)
+            last = index
+
+        states = self._colonies
+        last = -1
+        for index, colony in enumerate(colonies):
+            state = tuple(colony.job_count(job) for job in JOBS)
+            if index < len(states):
+                previous = states[index]
+                if state == previous:
+                    continue
+                states[index] = state
+                mask = 0
+                for field, (bit, _) in enumerate(COLONY_FIELDS):
+                    if state[field] != previous[field]:
+                        mask |= bit
+            else:
+                states.append(state)
+                mask = ALL_COLONY_FIELDS
+            offset = self._pack_colony(offset, index - last, mask, state)
+            last = index
+
+        return self._frame(turn, offset)
+
+    def keyframe(self, turn):
+        """Frames with everything sent so far, for a receiver joining late
+
+        Only for a fresh `DeltaDecoder`. The first frame places every ship
+        where it was a turn ago, and the second moves the ships that are
+        under way to where they are now, so the receiver learns how they
+        are moving too. Leaves what the encoder remembers alone, so the
+        frames it encodes next apply on top of these as they do for
+        everyone else.
+
+        Parameters
+        ----------
+        turn : int
+
+        Returns
+        -------
+        bytes
+            two frames, both for `turn`
+        """
+        offset = 0
+        for x, y, vx, vy, shield, hull, active in self._ships:
+            offset = self._pack_ship(offset, 1, ALL_SHIP_FIELDS,
+                                     (x - vx, y - vy, shield, hull, active))
+        for state in self._colonies:
+            offset = self._pack_colony(offset, 1, ALL_COLONY_FIELDS, state)
+        placed = self._frame(turn, offset)
+
+        offset = 0
+        last = -1
+        for index, (_, _, vx, vy, _, _, active) in enumerate(self._ships):
+            if vx or vy:
+                mask = (X if vx else 0) | (Y if vy else 0)
+                offset = self._pack_ship(offset, index - last, mask,
+                                         (vx, vy, 0, 0, active))
+                last = index
+        return placed + self._frame(turn, offset)
+
+    def _pack_ship(self, offset, gap, mask, state):
+        if not state[4]:
+            mask |= DESTROYED
+        layout = SHIP_LAYOUTS[mask]
+        self._reserve(offset, layout.size)
+        if mask & ALL_SHIP_FIELDS == ALL_SHIP_FIELDS:
+            layout.pack_into(self._buffer, offset, mask, gap, *state[:4])
+        else:
+            layout.pack_into(self._buffer, offset, mask, gap,
+                             *[state[field] for field, (bit, _)
+                               in enumerate(SHIP_FIELDS) if mask & bit])
+        return offset + layout.size
+
+    def _pack_colony(self, offset, gap, mask, state):
+        layout = COLONY_LAYOUTS[COLONY | mask]
+        self._reserve(offset, layout.size)
+        layout.pack_into(self._buffer, offset, COLONY | mask, gap,
+                         *[state[field] for field, (bit, _)
+                           in enumerate(COLONY_FIELDS) if mask & bit])
+        return offset + layout.size
+
+    def _frame(self, turn, length):
+        payload = bytes(self._buffer[:length])
+        flags = 0
+        if self.compress and length >= COMPRESS_MINIMUM:
+            compressed = zlib.compress(payload, self.level)
+            if len(compressed) < length:
+                payload = compressed
+                flags |= FLAG_ZLIB
+        return FRAME.pack(MAGIC, flags, turn, len(payload)) + payload
+
+
+class DeltaDecoder(object):
+    """Rebuilds ship and colony state from a stream of frames
+
+    Attributes
+    ----------
+    ships : dict of int to list
+        for each ship heard of, ``[x, y, shield, hull, active]``
+    colonies : dict of int to list
+        for each colony heard of, its job counts in `colony.JOBS` order
+    """
+    def __init__(self, quantum=QUANTUM):
+        """Create a decoder
+
+        Parameters
+        ----------
+        quantum : float
+            optional, must match the encoder's
+        """
+        self.quantum = quantum
+        self.ships = {}
+        self.colonies = {}
+        # Per ship, its position and how far it moved last frame, in whole
+        # quanta so that moves add up exactly
+        self._quanta = {}
+        self._pending = bytearray()
+
+    def feed(self, data):
+        """Takes in bytes as they arrive, decoding every complete frame
+
+        Parameters
+        ----------
+        data : bytes
+
+        Raises
+        ------
+        ValueError
+            if the stream is not made of frames
+
+        Returns
+        -------
+        list of tuple of (int, list of int, list of int)
+            for each frame, its turn and the ships and colonies it changed
+        """
+        pending = self._pending
+        pending.extend(data)
+        frames = []
+        offset = 0
+        while len(pending) - offset >= FRAME.size:
+            magic, flags, turn, length = FRAME.unpack_from(pending, offset)
+            if magic != MAGIC:
+                raise ValueError('Not a frame: starts with {:#x}'
+                                 .format(magic))
+            end = offset + FRAME.size + length
+            if end > len(pending):
+                break
+            payload = bytes(pending[offset + FRAME.size:end])
+            if flags & FLAG_ZLIB:
+                payload = zlib.decompress(payload)
+            ships, colonies = self.apply(payload)
+            frames.append((turn, ships, colonies))
+            offset = end
+        del pending[:offset]
+        return frames
+
+    def apply(self, payload):
+        """Applies one frame's records to the state
+
+        Ships under way first move on as they did last frame; records then
+        correct that guess.
+
+        Parameters
+        ----------
+        payload : bytes
+            uncompressed
+
+        Returns
+        -------
+        tuple of (list of int, list of int)
+            the ships and colonies that changed
+        """
+        quantum = self.quantum
+        quanta = self._quanta
+        ship_states = self.ships
+        colony_states = self.colonies
+
+        changed_ships = set()
+        for index, motion in quanta.items():
+            if motion[2] or motion[3]:
+                motion[0] += motion[2]
+                motion[1] += motion[3]
+                state = ship_states[index]
+                state[0] = motion[0] * quantum
+                state[1] = motion[1] * quantum
+                changed_ships.add(index)
+
+        changed_colonies = []
+        offset = 0
+        end = len(payload)
+        ship = colony = -1
+        while offset < end:
+            mask = ord(payload[offset])
+            if mask & COLONY:
+                layout = COLONY_LAYOUTS[mask]
+                values = layout.unpack_from(payload, offset)
+                index = colony = colony + values[1]
+                state = colony_states.get(index)
+                if state is None:
+                    state = colony_states[index] = [0] * len(JOBS)
+                value = 2
+                for field, (bit, _) in enumerate(COLONY_FIELDS):
+                    if mask & bit:
+                        state[field] = values[value]
+                        value += 1
+                changed_colonies.append(index)
+            else:
+                layout = SHIP_LAYOUTS[mask]
+                values = layout.unpack_from(payload, offset)
+                index = ship = ship + values[1]
+                state = ship_states.get(index)
+                motion = quanta.get(index)
+                first = state is None
+                if first:
+                    state = ship_states[index] = [0.0, 0.0, 0, 0, True]
+                    motion = quanta[index] = [0, 0, 0, 0]
+                value = 2
+                # Whatever the guess was out by, the ship also moved by
+                # that much more than last frame
+                if mask & X:
+                    motion[0] += values[value]
+                    motion[2] += values[value]
+                    state[0] = motion[0] * quantum
+                    value += 1
+                if mask & Y:
+                    motion[1] += values[value]
+                    motion[3] += values[value]
+                    state[1] = motion[1] * quantum
+                    value += 1
+                if mask & SHIELD:
+                    state[2] = values[value]
+                    value += 1
+                if mask & HULL:
+                    state[3] = values[value]
+                state[4] = not mask & DESTROYED
+                if first:
+                    # A first record places the ship, rather than moving it
+                    motion[2] = motion[3] = 0
+                changed_ships.add(index)
+            offset += layout.size
+        return sorted(changed_ships), changed_colonies